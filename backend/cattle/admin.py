@@ -1,7 +1,10 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.db.models import Count
-from .models import Cattle, CattleImage, HealthDocument
+from .models import Cattle, CattleImage, HealthDocument, MarketPriceStat, SavedSearch, SavedSearchMatch
+from .response_cache import bump_generation
+from .saved_searches import match_listings
+from .seller_stats import invalidate_seller_stats
 
 
 class CattleImageInline(admin.TabularInline):
@@ -133,10 +136,11 @@ class CattleAdmin(admin.ModelAdmin):
     
     def primary_image_preview(self, obj):
         """Show primary image preview"""
-        if obj.primary_image:
+        primary_image = obj.primary_image
+        if primary_image:
             return format_html(
                 '<img src="{}" style="max-width: 300px; max-height: 300px;" />',
-                obj.primary_image.image.url
+                primary_image.image.url
             )
         return "No image"
     primary_image_preview.short_description = 'Primary Image'
@@ -150,20 +154,29 @@ class CattleAdmin(admin.ModelAdmin):
     
     def mark_as_active(self, request, queryset):
         """Mark selected cattle as active"""
+        # queryset.update skips signals, so match reactivated listings here
+        reactivated = list(queryset.filter(is_active=False, is_sold=False))
         updated = queryset.update(is_active=True)
+        for cattle in reactivated:
+            cattle.is_active = True
+        match_listings(reactivated)
+        invalidate_seller_stats(*set(queryset.values_list('seller_id', flat=True)))
+        bump_generation()
         self.message_user(request, f'{updated} cattle marked as active.')
     mark_as_active.short_description = 'Mark selected as active'
     
     def mark_as_inactive(self, request, queryset):
         """Mark selected cattle as inactive"""
         updated = queryset.update(is_active=False)
+        invalidate_seller_stats(*set(queryset.values_list('seller_id', flat=True)))
+        bump_generation()
         self.message_user(request, f'{updated} cattle marked as inactive.')
     mark_as_inactive.short_description = 'Mark selected as inactive'
     
     def get_queryset(self, request):
         """Optimize queryset with select_related"""
         qs = super().get_queryset(request)
-        return qs.select_related('seller').prefetch_related('images', 'health_documents')
+        return qs.select_related('seller').with_primary_image().prefetch_related('health_documents')
 
 
 @admin.register(CattleImage)
@@ -251,3 +264,77 @@ class HealthDocumentAdmin(admin.ModelAdmin):
             return format_html('<span style="color: green;">Valid</span>')
         return 'N/A'
     is_expired_display.short_description = 'Status'
+
+
+@admin.register(MarketPriceStat)
+class MarketPriceStatAdmin(admin.ModelAdmin):
+    """Read-only admin for the market price index"""
+    
+    list_display = [
+        'month',
+        'kind',
+        'breed',
+        'region',
+        'gender',
+        'listing_count',
+        'price_median',
+        'price_per_kg_median',
+        'updated_at',
+    ]
+    
+    list_filter = [
+        'kind',
+        'breed',
+        'region',
+        'gender',
+        'month',
+    ]
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(SavedSearch)
+class SavedSearchAdmin(admin.ModelAdmin):
+    """Admin interface for saved searches"""
+    
+    list_display = [
+        'name',
+        'user',
+        'breed',
+        'region',
+        'is_active',
+        'created_at',
+    ]
+    
+    list_filter = [
+        'is_active',
+        'breed',
+        'region',
+    ]
+    
+    search_fields = ['name', 'user__email']
+    
+    readonly_fields = ['breed', 'region', 'price_band_low', 'price_band_high', 'created_at', 'updated_at']
+    
+    raw_id_fields = ['user']
+
+
+@admin.register(SavedSearchMatch)
+class SavedSearchMatchAdmin(admin.ModelAdmin):
+    """Admin interface for saved search inbox entries"""
+    
+    list_display = [
+        'saved_search',
+        'user',
+        'cattle',
+        'is_read',
+        'created_at',
+    ]
+    
+    list_filter = ['is_read']
+    
+    raw_id_fields = ['saved_search', 'user', 'cattle']
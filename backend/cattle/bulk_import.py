@@ -0,0 +1,190 @@
+"""
+Streaming bulk import of cattle listings from CSV or JSON Lines.
+
+Rows are read one at a time from the uploaded (or on-disk) file, validated
+with the same rules as CattleCreateUpdateSerializer and inserted with
+bulk_create in batches of CATTLE_IMPORT_BATCH_SIZE, each batch in its own
+transaction. Only the current batch and up to CATTLE_IMPORT_MAX_ERRORS
+error entries are held in memory, so memory use does not grow with the
+size of the file.
+
+CSV files need a header row with the serializer field names; empty cells
+are treated as missing values. JSON Lines files have one object per line.
+"""
+import codecs
+import csv
+import json
+from types import SimpleNamespace
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers
+from .market import listing_buckets, refresh_buckets
+from .models import Cattle
+from .response_cache import bump_generation
+from .saved_searches import match_listings
+from .seller_stats import invalidate_seller_stats
+from .serializers import CattleCreateUpdateSerializer
+from .similarity import similarity_index
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+
+FORMAT_EXTENSIONS = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+}
+
+
+class ImportFormatError(Exception):
+    """Raised when an import file cannot be read at all"""
+
+
+def detect_format(filename, requested=None):
+    """Return the import format from an explicit choice or the file extension"""
+    if requested:
+        if requested not in IMPORT_FORMATS:
+            raise ImportFormatError(f'Unsupported format: {requested}')
+        return requested
+    for extension, file_format in FORMAT_EXTENSIONS.items():
+        if filename.lower().endswith(extension):
+            return file_format
+    raise ImportFormatError('Cannot detect the file format, use a .csv or .jsonl file')
+
+
+def read_csv(lines):
+    reader = csv.DictReader(lines)
+    try:
+        fieldnames = reader.fieldnames
+    except csv.Error as exc:
+        raise ImportFormatError(f'Invalid CSV header: {exc}')
+    if not fieldnames:
+        raise ImportFormatError('The CSV file has no header row')
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as exc:
+            # The reader has skipped the bad record and can carry on
+            yield reader.line_num + 1, ValueError(f'Invalid CSV: {exc}')
+            continue
+        # Empty cells mean "not provided", so optional fields get their defaults
+        yield reader.line_num, {
+            key.strip(): value for key, value in row.items()
+            if key and value not in (None, '')
+        }
+
+
+def read_jsonl(lines):
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_number, ValueError(f'Invalid JSON: {exc}')
+            continue
+        if not isinstance(row, dict):
+            yield line_number, ValueError('Each line must be a JSON object')
+            continue
+        yield line_number, row
+
+
+def read_rows(stream, file_format):
+    """
+    Yield (row number, data) for each row of a binary stream.
+
+    Rows that cannot be parsed yield an exception instead of a dict. Text
+    that is not UTF-8 raises ImportFormatError, since decoding cannot resume.
+    """
+    lines = codecs.iterdecode(stream, 'utf-8-sig')
+    rows = read_csv(lines) if file_format == 'csv' else read_jsonl(lines)
+    row_number = 0
+    try:
+        for row_number, row in rows:
+            yield row_number, row
+    except UnicodeDecodeError:
+        raise ImportFormatError(f'The file is not valid UTF-8 text (after row {row_number})')
+
+
+class ImportReport:
+    """Counts and per-row errors for an import"""
+
+    def __init__(self, max_errors):
+        self.max_errors = max_errors
+        self.rows = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'row': row, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+def import_listings(stream, file_format, seller, batch_size=None, max_errors=None, dry_run=False):
+    """
+    Validate and insert listings from a binary stream for a seller.
+
+    Returns an ImportReport. Valid rows are created even if other rows fail.
+    """
+    batch_size = batch_size or getattr(settings, 'CATTLE_IMPORT_BATCH_SIZE', 500)
+    if max_errors is None:
+        max_errors = getattr(settings, 'CATTLE_IMPORT_MAX_ERRORS', 1000)
+    report = ImportReport(max_errors)
+
+    # One serializer for all rows, so fields are only built once
+    serializer = CattleCreateUpdateSerializer(context={'request': SimpleNamespace(user=seller)})
+    batch = []
+    buckets = set()
+
+    def flush():
+        if batch and not dry_run:
+            with transaction.atomic():
+                Cattle.objects.bulk_create(batch)
+            match_listings(batch)
+            for cattle in batch:
+                buckets.update(listing_buckets(cattle, kinds=('LISTED',)))
+        report.created += len(batch)
+        batch.clear()
+
+    try:
+        for row_number, row in read_rows(stream, file_format):
+            report.rows += 1
+            if isinstance(row, Exception):
+                report.add_error(row_number, {'non_field_errors': [str(row)]})
+                continue
+            try:
+                attrs = serializer.run_validation(row)
+            except serializers.ValidationError as exc:
+                report.add_error(row_number, exc.detail)
+                continue
+            cattle = Cattle(seller=seller, **attrs)
+            # bulk_create skips Cattle.save()
+            cattle.set_coordinates()
+            batch.append(cattle)
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+    except ImportFormatError as exc:
+        if report.created and not dry_run:
+            raise ImportFormatError(f'{exc}; {report.created} listings before it were imported') from exc
+        raise
+    finally:
+        # bulk_create skips model signals; batches already committed still need this
+        if report.created and not dry_run:
+            refresh_buckets(buckets)
+            similarity_index.mark_stale()
+            invalidate_seller_stats(seller.pk)
+            bump_generation()
+    return report
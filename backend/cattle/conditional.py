@@ -0,0 +1,83 @@
+"""
+Conditional GET support (ETag / Last-Modified) for cattle listings.
+
+Detail validators come from the listing's `updated_at`, its active/sold
+flags (which admin bulk actions change without touching `updated_at`) and
+the newest image and health document upload, read in a single query
+without serializing.
+List validators come from the listing generation (see
+cattle.response_cache), so they cost no database queries at all; they are
+not issued when the generation is not shared between workers.
+"""
+import hashlib
+from django.db.models import Max, OuterRef, Subquery
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from .models import Cattle, CattleImage, HealthDocument
+from .response_cache import cache_is_shared, get_generation, normalized_query
+
+
+def latest_upload(model):
+    """Subquery for the newest `uploaded_at` of a listing's related rows"""
+    return Subquery(
+        model.objects.filter(cattle=OuterRef('pk')).order_by().values('cattle').annotate(
+            latest=Max('uploaded_at')
+        ).values('latest')[:1]
+    )
+
+
+def detail_validators(cattle_id):
+    """Return (etag, last_modified) for a listing, or (None, None) if it does not exist"""
+    row = Cattle.objects.filter(pk=cattle_id).annotate(
+        latest_image=latest_upload(CattleImage),
+        latest_document=latest_upload(HealthDocument),
+    ).values_list('updated_at', 'latest_image', 'latest_document', 'is_active', 'is_sold').first()
+    if row is None:
+        return None, None
+
+    *row, is_active, is_sold = row
+    parts = [str(cattle_id), str(is_active), str(is_sold)]
+    parts += [timestamp.isoformat() if timestamp else '-' for timestamp in row]
+    digest = hashlib.sha1(':'.join(parts).encode()).hexdigest()
+    last_modified = max(timestamp for timestamp in row if timestamp is not None)
+    return f'W/"{digest}"', int(last_modified.timestamp())
+
+
+def list_etag(request, view_name):
+    """Return an ETag for a list request based on the listing generation, or None"""
+    if not cache_is_shared():
+        # Another worker's writes would not change it, so clients would get stale 304s
+        return None
+    user_id = request.user.pk if request.user.is_authenticated else None
+    key = repr([
+        view_name,
+        get_generation(),
+        request.path,
+        normalized_query(request),
+        user_id,
+        request.META.get('HTTP_ACCEPT', ''),
+    ])
+    return f'W/"{hashlib.sha1(key.encode()).hexdigest()}"'
+
+
+def conditional_response(request, get_response, etag=None, last_modified=None, on_not_modified=None):
+    """
+    Return 304 Not Modified if the request's validators match, otherwise build
+    the response and attach ETag / Last-Modified headers.
+
+    `on_not_modified` runs for 304 responses, for side effects such as view counting.
+    """
+    if request.method == 'GET':
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            if not_modified.status_code == 304 and on_not_modified is not None:
+                on_not_modified()
+            return not_modified
+
+    response = get_response()
+    if response.status_code == 200:
+        if etag:
+            response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+    return response
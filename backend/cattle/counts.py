@@ -0,0 +1,60 @@
+"""
+Result counts for paginated cattle lists.
+
+Exact counts are cached per normalized filter signature and listing
+generation for CATTLE_COUNT_CACHE_TIMEOUT seconds. On PostgreSQL the
+planner's row estimate is checked first, and queries estimated to match at
+least CATTLE_COUNT_ESTIMATE_THRESHOLD rows (unfiltered and broad searches)
+report the estimate instead of running COUNT(*).
+"""
+import hashlib
+import json
+from django.conf import settings
+from django.db import connections
+from .response_cache import get_cache, get_generation, normalized_query
+
+# Query parameters that do not change which rows match
+NON_FILTER_PARAMS = {'page', 'page_size', 'cursor', 'ordering', 'format', 'facets'}
+
+
+def filter_signature(request):
+    """Return a stable key for the filters applied by a request"""
+    params = normalized_query(request, ignore=NON_FILTER_PARAMS)
+    for param in params:
+        if param[0] == 'search':
+            param[1] = [' '.join(value.lower().split()) for value in param[1]]
+    payload = json.dumps([request.path, params], separators=(',', ':'))
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def estimate_count(queryset):
+    """Return the PostgreSQL planner's row estimate for a queryset"""
+    connection = connections[queryset.db]
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def get_result_count(queryset, request):
+    """
+    Count the rows matched by a filtered listing queryset.
+
+    Returns a (count, is_exact) tuple.
+    """
+    threshold = getattr(settings, 'CATTLE_COUNT_ESTIMATE_THRESHOLD', 10000)
+    if threshold and connections[queryset.db].vendor == 'postgresql':
+        estimate = estimate_count(queryset)
+        if estimate >= threshold:
+            return estimate, False
+
+    cache = get_cache()
+    key = f'cattle:count:{get_generation()}:{filter_signature(request)}'
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, getattr(settings, 'CATTLE_COUNT_CACHE_TIMEOUT', 30))
+    return count, True
@@ -0,0 +1,104 @@
+"""
+Streaming export of cattle listings as CSV or NDJSON.
+
+Rows are read with values_list().iterator(chunk_size=CATTLE_EXPORT_CHUNK_SIZE)
+(a server-side cursor on PostgreSQL), so no model instances are built and
+memory use stays constant however many listings are exported. Output is
+produced one chunk of rows at a time and can be gzip-compressed on the fly.
+"""
+import csv
+import zlib
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+# (column name, queryset lookup)
+EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('title', 'title'),
+    ('breed', 'breed'),
+    ('gender', 'gender'),
+    ('age_months', 'age_months'),
+    ('weight_kg', 'weight_kg'),
+    ('price', 'price'),
+    ('is_negotiable', 'is_negotiable'),
+    ('health_status', 'health_status'),
+    ('vaccination_status', 'vaccination_status'),
+    ('last_vaccination_date', 'last_vaccination_date'),
+    ('has_health_certificate', 'health_certificate_exists'),
+    ('has_vaccination_record', 'vaccination_record_exists'),
+    ('region', 'region'),
+    ('city', 'city'),
+    ('latitude', 'latitude'),
+    ('longitude', 'longitude'),
+    ('seller_id', 'seller_id'),
+    ('is_active', 'is_active'),
+    ('is_sold', 'is_sold'),
+    ('view_count', 'view_count'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+]
+
+
+class Echo:
+    """File-like object that returns what is written, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset, file_format):
+    """
+    Yield the export as text chunks, one per CATTLE_EXPORT_CHUNK_SIZE rows.
+
+    The queryset should come from CattleQuerySet.with_document_flags().
+    """
+    chunk_size = getattr(settings, 'CATTLE_EXPORT_CHUNK_SIZE', 2000)
+    columns = [name for name, _ in EXPORT_COLUMNS]
+    rows = queryset.values_list(*[lookup for _, lookup in EXPORT_COLUMNS]).iterator(chunk_size=chunk_size)
+
+    if file_format == 'csv':
+        writer = csv.writer(Echo())
+        encode = writer.writerow
+        yield encode(columns)
+    else:
+        encoder = DjangoJSONEncoder(separators=(',', ':'))
+
+        def encode(row):
+            return encoder.encode(dict(zip(columns, row))) + '\n'
+
+    lines = []
+    for row in rows:
+        lines.append(encode(row))
+        if len(lines) >= chunk_size:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+def gzip_stream(chunks):
+    """Gzip-compress text chunks incrementally"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(queryset, file_format, compress=False):
+    """Yield the export as bytes, gzip-compressed if requested"""
+    chunks = export_rows(queryset, file_format)
+    if compress:
+        return gzip_stream(chunks)
+    return (chunk.encode() for chunk in chunks)
+
+
+def export_filename(file_format, compress=False, stem='cattle-export'):
+    extension = EXPORT_FORMATS[file_format][1]
+    return f'{stem}.{extension}.gz' if compress else f'{stem}.{extension}'
@@ -0,0 +1,67 @@
+"""
+Facet counts for the browse filter panel (`?facets=breed,region`).
+
+Each facet is counted with one grouped query over the listings matching
+the current search and filters, except the facet's own filter, so the
+panel can show how many listings every alternative value would match.
+Counts are cached per facet, filter signature and listing generation for
+CATTLE_COUNT_CACHE_TIMEOUT seconds.
+"""
+from django.conf import settings
+from django.db.models import Count
+from .counts import filter_signature
+from .models import Cattle
+from .response_cache import get_cache, get_generation
+
+FACET_FIELDS = ['breed', 'region', 'gender', 'health_status', 'vaccination_status']
+
+
+class FacetError(ValueError):
+    """Raised for unknown facet names"""
+
+
+def requested_facets(request):
+    """Return the facet names requested with `?facets=`, or an empty list"""
+    names = []
+    for value in request.query_params.getlist('facets'):
+        names.extend(name.strip() for name in value.split(',') if name.strip())
+    unknown = [name for name in names if name not in FACET_FIELDS]
+    if unknown:
+        raise FacetError(f'Unknown facets: {", ".join(unknown)}. Choose from: {", ".join(FACET_FIELDS)}')
+    return list(dict.fromkeys(names))
+
+
+def facet_values(queryset, field_name):
+    """Count listings per value of a field with one grouped query"""
+    field = Cattle._meta.get_field(field_name)
+    labels = dict(field.flatchoices) if field.choices else {}
+    rows = queryset.order_by().values(field_name).annotate(count=Count('pk')).order_by('-count', field_name)
+    return [
+        {'value': row[field_name], 'label': labels.get(row[field_name], row[field_name]), 'count': row['count']}
+        for row in rows
+    ]
+
+
+def facet_counts(view, request, queryset, facets):
+    """
+    Return {facet: [{value, label, count}, ...]} for a browse request.
+
+    `queryset` is the view's base queryset with search applied; the view's
+    filterset is applied to it without the facet's own parameters.
+    """
+    cache = get_cache()
+    prefix = f'cattle:facets:{get_generation()}:{filter_signature(request)}'
+    results = {}
+    for facet in facets:
+        key = f'{prefix}:{facet}'
+        values = cache.get(key)
+        if values is None:
+            params = request.query_params.copy()
+            for param in list(params):
+                if param == facet or param.startswith(f'{facet}__'):
+                    del params[param]
+            filterset = view.filterset_class(params, queryset=queryset, request=request)
+            values = facet_values(filterset.qs, facet) if filterset.is_valid() else []
+            cache.set(key, values, getattr(settings, 'CATTLE_COUNT_CACHE_TIMEOUT', 30))
+        results[facet] = values
+    return results
@@ -0,0 +1,57 @@
+import django_filters
+from rest_framework.exceptions import ValidationError
+from .geo import filter_near
+from .models import Cattle, MarketPriceStat
+
+DEFAULT_RADIUS_KM = 50
+MAX_RADIUS_KM = 1000
+
+
+class CattleFilter(django_filters.FilterSet):
+    """Filters for the cattle browse endpoint"""
+    # Backed by CattleQuerySet.with_document_flags()
+    has_health_certificate = django_filters.BooleanFilter(field_name='health_certificate_exists')
+    has_vaccination_record = django_filters.BooleanFilter(field_name='vaccination_record_exists')
+    
+    # Distance search: ?near=lat,lon&radius_km=50 (see cattle.geo)
+    near = django_filters.CharFilter(method='filter_near')
+    radius_km = django_filters.NumberFilter(method='filter_radius', min_value=0)
+    
+    class Meta:
+        model = Cattle
+        fields = {
+            'breed': ['exact'],
+            'gender': ['exact'],
+            'region': ['exact'],
+            'price': ['gte', 'lte'],
+            'age_months': ['gte', 'lte'],
+            'weight_kg': ['gte', 'lte'],
+            'health_status': ['exact'],
+            'vaccination_status': ['exact'],
+        }
+    
+    def filter_near(self, queryset, name, value):
+        try:
+            latitude, longitude = (float(part) for part in value.split(','))
+        except ValueError:
+            raise ValidationError({'near': 'Use "latitude,longitude", e.g. near=9.40,-0.84'})
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ValidationError({'near': 'Coordinates are out of range.'})
+        
+        radius_km = self.form.cleaned_data.get('radius_km')
+        radius_km = DEFAULT_RADIUS_KM if radius_km is None else float(radius_km)
+        return filter_near(queryset, latitude, longitude, min(radius_km, MAX_RADIUS_KM))
+    
+    def filter_radius(self, queryset, name, value):
+        # Applied together with `near`
+        return queryset
+
+
+class MarketPriceStatFilter(django_filters.FilterSet):
+    """Filters for the market price index"""
+    month_from = django_filters.DateFilter(field_name='month', lookup_expr='gte')
+    month_to = django_filters.DateFilter(field_name='month', lookup_expr='lte')
+    
+    class Meta:
+        model = MarketPriceStat
+        fields = ['kind', 'breed', 'region', 'gender', 'month']
@@ -0,0 +1,184 @@
+"""
+Distance search for cattle listings without PostGIS.
+
+Listings store latitude/longitude (exact when the seller provides them,
+otherwise the centroid of their city or region) and a geohash of those
+coordinates in an indexed column. A `near=lat,lon&radius_km=` search:
+
+1. picks the longest geohash prefix whose cells are at least radius_km
+   wide and keeps listings in the 3x3 block of cells around the point
+   (an indexed prefix match),
+2. narrows those to the bounding box of the circle, and
+3. computes the exact haversine distance in SQL, keeping listings within
+   radius_km and annotating `distance_km`.
+
+Only standard math functions are used, so this runs on PostgreSQL and SQLite.
+"""
+import math
+from decimal import Decimal
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cast, Cos, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.195
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 8
+
+DISTANCE_ANNOTATION = 'distance_km'
+
+# Approximate centroids (regional capitals) used when a listing has no coordinates
+REGION_CENTROIDS = {
+    'ASHANTI': (6.6885, -1.6244),
+    'BRONG_AHAFO': (7.3349, -2.3123),
+    'CENTRAL': (5.1053, -1.2466),
+    'EASTERN': (6.0940, -0.2591),
+    'GREATER_ACCRA': (5.6037, -0.1870),
+    'NORTHERN': (9.4008, -0.8393),
+    'UPPER_EAST': (10.7856, -0.8514),
+    'UPPER_WEST': (10.0601, -2.5099),
+    'VOLTA': (6.6008, 0.4713),
+    'WESTERN': (4.9340, -1.7137),
+    'SAVANNAH': (9.0833, -1.8167),
+    'BONO_EAST': (7.5909, -1.9390),
+    'AHAFO': (6.8036, -2.5172),
+    'WESTERN_NORTH': (6.2058, -2.4894),
+    'NORTH_EAST': (10.5273, -0.3698),
+    'OTI': (8.0686, 0.1797),
+}
+
+# Towns with cattle markets, keyed by lower-case name
+CITY_CENTROIDS = {
+    'accra': (5.6037, -0.1870),
+    'aflao': (6.1185, 1.1906),
+    'bawku': (11.0616, -0.2417),
+    'bolgatanga': (10.7856, -0.8514),
+    'cape coast': (5.1053, -1.2466),
+    'damongo': (9.0833, -1.8167),
+    'dambai': (8.0686, 0.1797),
+    'goaso': (6.8036, -2.5172),
+    'ho': (6.6008, 0.4713),
+    'hohoe': (7.1519, 0.4736),
+    'kintampo': (8.0563, -1.7306),
+    'koforidua': (6.0940, -0.2591),
+    'kumasi': (6.6885, -1.6244),
+    'nalerigu': (10.5273, -0.3698),
+    'nkawkaw': (6.5505, -0.7660),
+    'obuasi': (6.2020, -1.6640),
+    'salaga': (8.5526, -0.5189),
+    'savelugu': (9.6244, -0.8253),
+    'sefwi wiawso': (6.2058, -2.4894),
+    'sekondi': (4.9340, -1.7137),
+    'sunyani': (7.3349, -2.3123),
+    'takoradi': (4.8845, -1.7554),
+    'tamale': (9.4008, -0.8393),
+    'techiman': (7.5909, -1.9390),
+    'tema': (5.6698, -0.0166),
+    'wa': (10.0601, -2.5099),
+    'winneba': (5.3511, -0.6231),
+    'yendi': (9.4427, -0.0099),
+}
+
+COORDINATE = Decimal('0.000001')
+
+
+def location_centroid(city, region):
+    """Return approximate (latitude, longitude) Decimals for a city or region, or None"""
+    centroid = CITY_CENTROIDS.get((city or '').strip().lower()) or REGION_CENTROIDS.get(region)
+    if centroid is None:
+        return None
+    return tuple(Decimal(str(value)).quantize(COORDINATE) for value in centroid)
+
+
+def geohash_cell_size(precision):
+    """Return the (latitude, longitude) size in degrees of a geohash cell"""
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    latitude_range, longitude_range = [-90.0, 90.0], [-180.0, 180.0]
+    geohash, bit, value, even = [], 0, 0, True
+    while len(geohash) < precision:
+        interval, coordinate = (longitude_range, longitude) if even else (latitude_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bit += 1
+        if bit == 5:
+            geohash.append(GEOHASH_ALPHABET[value])
+            bit, value = 0, 0
+    return ''.join(geohash)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """Return (min_lat, max_lat, min_lon, max_lon) enclosing a circle"""
+    delta_latitude = radius_km / KM_PER_DEGREE
+    delta_longitude = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+    return (
+        max(latitude - delta_latitude, -90.0),
+        min(latitude + delta_latitude, 90.0),
+        longitude - delta_longitude,
+        longitude + delta_longitude,
+    )
+
+
+def covering_geohashes(latitude, longitude, radius_km):
+    """Return geohash prefixes whose cells cover a circle (empty for huge radii)"""
+    _, _, min_longitude, max_longitude = bounding_box(latitude, longitude, radius_km)
+    delta_latitude = radius_km / KM_PER_DEGREE
+    delta_longitude = (max_longitude - min_longitude) / 2
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        cell_latitude, cell_longitude = geohash_cell_size(precision)
+        if cell_latitude >= delta_latitude and cell_longitude >= delta_longitude:
+            break
+    else:
+        return set()
+    return {
+        encode_geohash(
+            min(max(latitude + row * cell_latitude, -90.0), 90.0),
+            (longitude + column * cell_longitude + 180.0) % 360.0 - 180.0,
+            precision
+        )
+        for row in (-1, 0, 1)
+        for column in (-1, 0, 1)
+    }
+
+
+def haversine_km(latitude, longitude):
+    """Expression for the great-circle distance from a point to a listing"""
+    listing_latitude = Radians(Cast(F('latitude'), FloatField()))
+    listing_longitude = Radians(Cast(F('longitude'), FloatField()))
+    origin_latitude = math.radians(latitude)
+    half_chord = (
+        Power(Sin((listing_latitude - Value(origin_latitude)) / 2), 2)
+        + Value(math.cos(origin_latitude)) * Cos(listing_latitude)
+        * Power(Sin((listing_longitude - Value(math.radians(longitude))) / 2), 2)
+    )
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(half_chord))
+
+
+def filter_near(queryset, latitude, longitude, radius_km):
+    """Keep listings within radius_km of a point and annotate `distance_km`"""
+    cells = covering_geohashes(latitude, longitude, radius_km)
+    if cells:
+        cell_filter = Q()
+        for cell in cells:
+            cell_filter |= Q(geohash__startswith=cell)
+        queryset = queryset.filter(cell_filter)
+
+    min_latitude, max_latitude, min_longitude, max_longitude = bounding_box(latitude, longitude, radius_km)
+    queryset = queryset.filter(
+        latitude__gte=min_latitude,
+        latitude__lte=max_latitude,
+        longitude__gte=min_longitude,
+        longitude__lte=max_longitude,
+    )
+    return queryset.annotate(**{
+        DISTANCE_ANNOTATION: haversine_km(latitude, longitude)
+    }).filter(**{f'{DISTANCE_ANNOTATION}__lte': radius_km})
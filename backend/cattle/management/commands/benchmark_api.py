@@ -0,0 +1,256 @@
+import json
+import math
+import secrets
+import time
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.db.models import Count, Q
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+from users.models import User
+from cattle.models import Cattle
+from cattle.response_cache import bump_generation
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'api_baseline.json'
+
+BENCHMARK_EMAIL_DOMAIN = 'benchmark.beefline.local'
+
+# Name: (method, URL name, URL arguments, query parameters, authenticated)
+SCENARIOS = {
+    'list': ('get', 'cattle:cattle-list-create', None, {}, False),
+    'list-filtered': ('get', 'cattle:cattle-list-create', None, {'breed': 'ZEBU', 'price__lte': '10000'}, False),
+    'list-region-ordered': ('get', 'cattle:cattle-list-create', None, {'region': 'NORTHERN', 'ordering': '-price'}, False),
+    'list-search': ('get', 'cattle:cattle-list-create', None, {'search': 'healthy bull'}, False),
+    'list-cursor': ('get', 'cattle:cattle-list-create', None, {'cursor': '', 'ordering': 'price'}, False),
+    'detail': ('get', 'cattle:cattle-detail', 'listing', {}, False),
+    'my-listings': ('get', 'cattle:my-cattle', None, {}, True),
+    'user-cattle': ('get', 'users:user-cattle', 'seller', {}, False),
+    'login': ('post', 'users:login', None, {}, False),
+    'token-refresh': ('post', 'users:token_refresh', None, {}, False),
+}
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted values"""
+    return values[max(0, math.ceil(len(values) * fraction) - 1)]
+
+
+def unused_phone_number():
+    """A random phone number no account uses, so runs never collide with seeded or concurrent users"""
+    while True:
+        phone_number = f'+2339{secrets.randbelow(10 ** 8):08d}'
+        if not User.objects.filter(phone_number=phone_number).exists():
+            return phone_number
+
+
+def server_timing_queries(response):
+    """Read the query count from the Server-Timing header (see config.instrumentation)"""
+    header = response.get('Server-Timing', '')
+    for part in header.split(','):
+        if part.strip().startswith('db;'):
+            return int(part.split('desc="')[1].split(' ')[0])
+    return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the main API endpoints against the current (seeded) database: '
+        'latency percentiles, queries per request and throughput, optionally '
+        'compared against a stored baseline. The run is not read-only: it creates '
+        'a temporary seller with a random password and phone number (deleted afterwards), '
+        'reads \'my-listings\' as the seeded seller with the most listings, bumps the '
+        'listing generation before every timed request, so cached list responses '
+        'and counts are invalidated, and records detail views on the listings it reads.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='Timed requests per scenario')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per scenario')
+        parser.add_argument(
+            '--scenario', action='append', choices=sorted(SCENARIOS), help='Run only these scenarios (repeatable)'
+        )
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Baseline JSON file')
+        parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline')
+        parser.add_argument('--compare', action='store_true', help='Fail if results regress against the baseline')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Allowed latency increase over the baseline as a fraction (default 0.25)'
+        )
+        parser.add_argument(
+            '--slack-ms', type=float, default=2.0,
+            help='Latency increase always allowed, to absorb noise on fast endpoints'
+        )
+
+    def handle(self, *args, **options):
+        listings = list(
+            Cattle.objects.filter(is_active=True, is_sold=False).order_by('-pk').values_list('pk', 'seller_id')[:50]
+        )
+        if not listings:
+            raise CommandError('No active listings; seed the database first (manage.py seed_marketplace)')
+
+        user, password = self.benchmark_user()
+        try:
+            client = Client(SERVER_NAME=settings.ALLOWED_HOSTS[0])
+            credentials = {'email': user.email, 'password': password}
+            tokens = self.login(client, credentials)
+            context = {
+                'client': client,
+                'listings': listings,
+                'credentials': credentials,
+                'access': tokens['access'],
+                'refresh': tokens['refresh'],
+                'seller_access': self.seller_access(),
+            }
+
+            results = {}
+            names = options['scenario'] or list(SCENARIOS)
+            self.stdout.write(f'{Cattle.objects.count():,} listings on {connection.vendor}')
+            with override_settings(REQUEST_METRICS_HEADER=True, QUERY_BUDGET_STRICT=False):
+                for name in names:
+                    results[name] = self.run_scenario(name, context, options)
+                    self.write_result(name, results[name])
+        finally:
+            user.delete()
+
+        report = {
+            'database': connection.vendor,
+            'listings': Cattle.objects.count(),
+            'iterations': options['iterations'],
+            'scenarios': results,
+        }
+        baseline_path = Path(options['baseline'])
+        if options['compare']:
+            self.compare(report, baseline_path, options)
+        if options['save_baseline']:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(report, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Baseline written to {baseline_path}'))
+
+    def benchmark_user(self):
+        """Create a throwaway seller with a random password; returns (user, password)"""
+        password = secrets.token_urlsafe(24)
+        user = User.objects.create_user(
+            email=f'run-{secrets.token_hex(8)}@{BENCHMARK_EMAIL_DOMAIN}',
+            password=password,
+            first_name='Benchmark',
+            last_name='Seller',
+            phone_number=unused_phone_number(),
+            user_type='SELLER',
+        )
+        return user, password
+
+    def seller_access(self):
+        """An access token for the seeded seller with the most active listings, for 'my-listings'"""
+        seller = (
+            User.objects.annotate(active=Count('cattle_listings', filter=Q(cattle_listings__is_active=True)))
+            .filter(active__gt=0)
+            .order_by('-active', 'pk')
+            .first()
+        )
+        return str(RefreshToken.for_user(seller).access_token)
+
+    def login(self, client, credentials):
+        response = client.post(reverse('users:login'), credentials, content_type='application/json')
+        if response.status_code != 200:
+            raise CommandError(f'Benchmark login failed with {response.status_code}: {response.content[:200]!r}')
+        return response.json()
+
+    def build_request(self, name, context, iteration):
+        """Return (method, path, data, headers) for one request of a scenario"""
+        method, url_name, target, params, authenticated = SCENARIOS[name]
+        listing_id, seller_id = context['listings'][iteration % len(context['listings'])]
+        args = {'listing': [listing_id], 'seller': [seller_id]}.get(target)
+        path = reverse(url_name, args=args)
+        headers = {}
+        if authenticated:
+            # Only 'my-listings' is authenticated; it reads a seeded seller's listings, not the empty benchmark account
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {context["seller_access"]}'
+
+        if name == 'login':
+            return method, path, context['credentials'], headers
+        if name == 'token-refresh':
+            return method, path, {'refresh': context['refresh']}, headers
+        return method, path, params, headers
+
+    def send(self, client, method, path, data, headers):
+        if method == 'post':
+            return client.post(path, data, content_type='application/json', **headers)
+        return client.get(path, data, **headers)
+
+    def rotate_refresh(self, name, context, response):
+        # Used refresh tokens are revoked (users.token_revocation); continue with the rotated one
+        if name == 'token-refresh' and response.status_code == 200:
+            context['refresh'] = response.json()['refresh']
+
+    def run_scenario(self, name, context, options):
+        client = context['client']
+        for iteration in range(options['warmup']):
+            response = self.send(client, *self.build_request(name, context, iteration))
+            self.rotate_refresh(name, context, response)
+
+        timings, queries = [], []
+        started = time.perf_counter()
+        for iteration in range(options['iterations']):
+            request = self.build_request(name, context, iteration)
+            # Measure the database path, not cached responses and counts
+            bump_generation()
+            start = time.perf_counter()
+            response = self.send(client, *request)
+            timings.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                raise CommandError(f'{name}: {request[1]} returned {response.status_code}')
+            self.rotate_refresh(name, context, response)
+            queries.append(server_timing_queries(response))
+        elapsed = time.perf_counter() - started
+
+        timings.sort()
+        counted = [count for count in queries if count is not None]
+        return {
+            'p50_ms': round(percentile(timings, 0.50), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'p99_ms': round(percentile(timings, 0.99), 2),
+            'queries': max(counted) if counted else None,
+            'requests_per_second': round(len(timings) / elapsed, 1),
+        }
+
+    def write_result(self, name, result):
+        self.stdout.write(
+            f'{name:>20}: p50 {result["p50_ms"]:8.2f} ms, p95 {result["p95_ms"]:8.2f} ms, '
+            f'p99 {result["p99_ms"]:8.2f} ms, {result["queries"]} queries, '
+            f'{result["requests_per_second"]:8.1f} req/s'
+        )
+
+    def compare(self, report, baseline_path, options):
+        """Raise CommandError listing every regression against the baseline"""
+        if not baseline_path.exists():
+            raise CommandError(f'No baseline at {baseline_path}; run with --save-baseline first')
+        baseline = json.loads(baseline_path.read_text())
+        compare_latency = baseline.get('database') == report['database']
+        if not compare_latency:
+            self.stdout.write(self.style.WARNING(
+                f'Baseline was recorded on {baseline.get("database")}; only comparing query counts'
+            ))
+
+        regressions = []
+        for name, result in report['scenarios'].items():
+            expected = baseline['scenarios'].get(name)
+            if expected is None:
+                continue
+            if (result['queries'] or 0) > (expected['queries'] or 0):
+                regressions.append(f'{name}: {result["queries"]} queries, baseline {expected["queries"]}')
+            if compare_latency:
+                for metric in ('p50_ms', 'p95_ms'):
+                    allowed = expected[metric] * (1 + options['tolerance']) + options['slack_ms']
+                    if result[metric] > allowed:
+                        regressions.append(
+                            f'{name}: {metric} {result[metric]:.2f}, baseline {expected[metric]:.2f} '
+                            f'(allowed {allowed:.2f})'
+                        )
+
+        if regressions:
+            raise CommandError('Performance regressions:\n  ' + '\n  '.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
@@ -0,0 +1,80 @@
+import csv
+import random
+import tempfile
+import time
+from types import SimpleNamespace
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from users.models import User
+from cattle.bulk_import import import_listings
+from cattle.models import Cattle
+from cattle.serializers import CattleCreateUpdateSerializer
+
+FIELDS = ['title', 'description', 'breed', 'gender', 'age_months', 'weight_kg', 'price', 'region', 'city']
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare listing import throughput with one serializer save per row '
+        'and the streaming bulk import. Changes are rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help='Rows to import per mode')
+        parser.add_argument('--batch-size', type=int, help='Rows per bulk insert')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for generated rows')
+
+    def handle(self, *args, **options):
+        seller = User.objects.filter(user_type__in=['SELLER', 'BOTH']).first()
+        if seller is None:
+            raise CommandError('No seller found to import listings for')
+        total = options['rows']
+
+        with tempfile.NamedTemporaryFile('w+', suffix='.csv', newline='') as source:
+            self.write_rows(source, total, random.Random(options['seed']))
+            source.flush()
+
+            results = {}
+            with transaction.atomic():
+                with open(source.name, 'rb') as stream:
+                    results['per-row save'] = self.run_per_row(stream, seller)
+                with open(source.name, 'rb') as stream:
+                    start = time.perf_counter()
+                    report = import_listings(stream, 'csv', seller, batch_size=options['batch_size'])
+                    results['bulk import'] = time.perf_counter() - start
+                if report.created != total:
+                    raise CommandError(f'Bulk import created {report.created} of {total} rows')
+                transaction.set_rollback(True)
+
+        for mode, elapsed in results.items():
+            self.stdout.write(f'{mode:>13}: {total} rows in {elapsed:.3f}s ({total / elapsed:,.0f} rows/s)')
+        speedup = results['per-row save'] / results['bulk import']
+        self.stdout.write(self.style.SUCCESS(f'Bulk import is {speedup:.2f}x faster'))
+
+    def write_rows(self, source, total, rng):
+        breeds = [value for value, _ in Cattle.BREED_CHOICES]
+        regions = [value for value, _ in Cattle._meta.get_field('region').choices]
+        writer = csv.writer(source)
+        writer.writerow(FIELDS)
+        for index in range(total):
+            writer.writerow([
+                f'Imported cattle {index}',
+                'Healthy animal from a cooperative herd',
+                rng.choice(breeds),
+                rng.choice(['MALE', 'FEMALE']),
+                rng.randint(6, 120),
+                f'{rng.uniform(150, 650):.2f}',
+                f'{rng.uniform(2000, 20000):.2f}',
+                rng.choice(regions),
+                'Tamale',
+            ])
+
+    def run_per_row(self, stream, seller):
+        """Create each row the way the single-listing endpoint does"""
+        context = {'request': SimpleNamespace(user=seller)}
+        start = time.perf_counter()
+        for row in csv.DictReader(line.decode() for line in stream):
+            serializer = CattleCreateUpdateSerializer(data=row, context=context)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        return time.perf_counter() - start
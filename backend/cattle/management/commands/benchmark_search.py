@@ -0,0 +1,119 @@
+import random
+import secrets
+import statistics
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory
+from users.models import User
+from cattle.models import Cattle
+from cattle.response_cache import bump_generation
+from cattle.views import CattleListCreateView
+from .benchmark_api import BENCHMARK_EMAIL_DOMAIN, unused_phone_number
+
+DEFAULT_TERMS = ['zebu bull', 'tamale', 'vaccinated heifer', 'healthy sanga cow']
+
+WORDS = [
+    'healthy', 'strong', 'young', 'mature', 'bull', 'cow', 'heifer', 'steer',
+    'vaccinated', 'grass', 'fed', 'dairy', 'beef', 'breeding', 'calm', 'zebu',
+    'sanga', 'shorthorn', 'crossbreed', 'quality', 'farm', 'raised', 'docile',
+]
+CITIES = ['Tamale', 'Kumasi', 'Accra', 'Bolgatanga', 'Wa', 'Techiman', 'Ho', 'Sunyani']
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare search latency on /api/cattle/ between the basic icontains '
+        'search and PostgreSQL full-text search. Listings added with --seed '
+        'exist only for the run: they are inserted in a transaction that is '
+        'rolled back afterwards, so derived data (market stats, similarity '
+        'index, cached responses) is never affected.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed', type=int, default=0, help='Temporarily top up to this many listings (rolled back afterwards)'
+        )
+        parser.add_argument('--repeat', type=int, default=20, help='Requests per search term and backend')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert when seeding')
+        parser.add_argument('terms', nargs='*', help='Search terms (default: a built-in set)')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if options['seed']:
+                    self.seed(options['seed'], options['batch_size'])
+                self.run(options)
+                transaction.set_rollback(True)
+        finally:
+            # Counts cached while the seeded rows existed must not outlive them
+            bump_generation()
+
+    def run(self, options):
+        backends = ['basic']
+        if connection.vendor == 'postgresql':
+            backends.append('postgres')
+        else:
+            self.stdout.write(self.style.WARNING('Full-text search needs PostgreSQL, only timing basic search'))
+
+        self.stdout.write(f'Listings: {Cattle.objects.count():,}')
+        for term in options['terms'] or DEFAULT_TERMS:
+            for backend in backends:
+                with override_settings(CATTLE_SEARCH_BACKEND=backend):
+                    timings, count = self.time_search(term, options['repeat'])
+                self.stdout.write(
+                    f'{term!r:>22} {backend:>8}: {count:>8,} matches, '
+                    f'median {statistics.median(timings):8.2f} ms, max {max(timings):8.2f} ms'
+                )
+
+    def time_search(self, term, repeat):
+        factory = APIRequestFactory(SERVER_NAME=settings.ALLOWED_HOSTS[0])
+        view = CattleListCreateView.as_view()
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = view(factory.get('/api/cattle/', {'search': term}))
+            response.render()
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings, response.data['count']
+
+    def seed(self, total, batch_size):
+        missing = total - Cattle.objects.count()
+        if missing <= 0:
+            return
+
+        seller = User.objects.create_user(
+            email=f'search-{secrets.token_hex(8)}@{BENCHMARK_EMAIL_DOMAIN}',
+            password=None,
+            first_name='Benchmark',
+            last_name='Seller',
+            phone_number=unused_phone_number(),
+            user_type='SELLER',
+        )
+        rng = random.Random(42)
+        breeds = [choice for choice, _ in Cattle.BREED_CHOICES]
+        regions = [choice for choice, _ in Cattle._meta.get_field('region').choices]
+
+        self.stdout.write(f'Seeding {missing:,} listings...')
+        while missing > 0:
+            size = min(batch_size, missing)
+            Cattle.objects.bulk_create([
+                Cattle(
+                    seller=seller,
+                    title=' '.join(rng.sample(WORDS, 3)).capitalize(),
+                    description=' '.join(rng.choices(WORDS, k=25)),
+                    breed=rng.choice(breeds),
+                    gender=rng.choice(['MALE', 'FEMALE']),
+                    age_months=rng.randint(6, 120),
+                    weight_kg=rng.randint(150, 600),
+                    price=rng.randint(1500, 20000),
+                    region=rng.choice(regions),
+                    city=rng.choice(CITIES),
+                )
+                for _ in range(size)
+            ], batch_size=size)
+            missing -= size
+        # The inserts bypass signals; do not serve counts cached before them
+        bump_generation()
@@ -0,0 +1,76 @@
+import statistics
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from cattle.similarity import (
+    CATEGORIES,
+    CONTINUOUS_FEATURES,
+    FEATURE_WEIGHTS,
+    HEALTH_SCORES,
+    SimilarityIndex,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Time similarity index builds and top-k queries on synthetic listings '
+        '(and optionally on the listings in the database)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[100_000, 1_000_000], help='Synthetic index sizes'
+        )
+        parser.add_argument('--queries', type=int, default=200, help='Queries per index size')
+        parser.add_argument('--k', type=int, default=8, help='Listings returned per query')
+        parser.add_argument('--database', action='store_true', help='Also build the index from the database')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed')
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        for size in options['sizes']:
+            index = SimilarityIndex(max_age=float('inf'))
+            start = time.perf_counter()
+            index.load(np.arange(1, size + 1, dtype=np.int64), *self.synthetic_features(size, rng))
+            build_ms = (time.perf_counter() - start) * 1000
+            self.report(f'{size:,} synthetic', index, build_ms, options, rng)
+
+        if options['database']:
+            index = SimilarityIndex(max_age=float('inf'))
+            start = time.perf_counter()
+            index.build()
+            build_ms = (time.perf_counter() - start) * 1000
+            self.report(f'{index.size:,} from database', index, build_ms, options, rng)
+
+    def report(self, label, index, build_ms, options, rng):
+        if not index.size:
+            self.stdout.write(self.style.WARNING(f'{label}: nothing to query'))
+            return
+        timings = []
+        for position in rng.integers(0, index.size, options['queries']):
+            vector, codes = index.matrix[position].copy(), index.codes[:, position].copy()
+            start = time.perf_counter()
+            index.nearest(vector, codes, k=options['k'], exclude=int(index.ids[position]))
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        self.stdout.write(
+            f'{label:>22}: build {build_ms:9.1f} ms, '
+            f'{(index.matrix.nbytes + index.codes.nbytes) / 2 ** 20:7.1f} MiB, '
+            f'query p50 {statistics.median(timings):7.2f} ms, '
+            f'p95 {timings[int(len(timings) * 0.95) - 1]:7.2f} ms, '
+            f'max {timings[-1]:7.2f} ms'
+        )
+
+    def synthetic_features(self, size, rng):
+        """Unscaled features and category codes shaped like raw_features() output"""
+        continuous = np.zeros((size, len(CONTINUOUS_FEATURES)), dtype=np.float32)
+        continuous[:, 0] = rng.integers(3, 180, size)
+        continuous[:, 1] = np.log1p(rng.uniform(120, 700, size))
+        continuous[:, 2] = np.log1p(rng.uniform(1500, 30000, size))
+        health = np.array(list(HEALTH_SCORES.values()), dtype=np.float32)
+        continuous[:, 3] = rng.choice(health, size) * FEATURE_WEIGHTS['health']
+
+        codes = np.stack([
+            rng.integers(0, len(values), size).astype(np.int8) for values in CATEGORIES.values()
+        ])
+        return continuous, codes
@@ -0,0 +1,61 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory
+from cattle.models import Cattle
+from cattle.view_counter import view_count_buffer
+from cattle.views import CattleDetailView
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare cattle detail view throughput with write-through and buffered '
+        'view counting. The response cache is off during the run, so every '
+        'request loads the listing. Changes are rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000, help='Requests per mode')
+        parser.add_argument('--cattle-id', type=int, help='Listing to request (default: newest)')
+
+    def handle(self, *args, **options):
+        cattle = self.get_cattle(options['cattle_id'])
+        total = options['requests']
+
+        results = {}
+        # Cached anonymous responses would skip the detail query and the view counter path
+        with transaction.atomic(), override_settings(CATTLE_RESPONSE_CACHE_TIMEOUT=0):
+            with override_settings(VIEW_COUNT_FLUSH_INTERVAL=0):
+                results['write-through'] = self.run(cattle.pk, total)
+            with override_settings(VIEW_COUNT_FLUSH_INTERVAL=3600, VIEW_COUNT_MAX_PENDING=total + 1):
+                results['buffered'] = self.run(cattle.pk, total, flush=True)
+            transaction.set_rollback(True)
+
+        for mode, elapsed in results.items():
+            self.stdout.write(
+                f'{mode:>14}: {total} requests in {elapsed:.3f}s '
+                f'({total / elapsed:,.0f} req/s, {elapsed / total * 1000:.2f} ms/request)'
+            )
+        speedup = results['write-through'] / results['buffered']
+        self.stdout.write(self.style.SUCCESS(f'Buffered counting is {speedup:.2f}x faster'))
+
+    def get_cattle(self, cattle_id):
+        queryset = Cattle.objects.order_by('-created_at')
+        cattle = queryset.filter(pk=cattle_id).first() if cattle_id else queryset.first()
+        if cattle is None:
+            raise CommandError('No cattle listing found to benchmark')
+        return cattle
+
+    def run(self, cattle_id, total, flush=False):
+        factory = APIRequestFactory(SERVER_NAME=settings.ALLOWED_HOSTS[0])
+        view = CattleDetailView.as_view()
+
+        start = time.perf_counter()
+        for _ in range(total):
+            response = view(factory.get(f'/api/cattle/{cattle_id}/'), pk=cattle_id)
+            response.render()
+        if flush:
+            view_count_buffer.flush()
+        return time.perf_counter() - start
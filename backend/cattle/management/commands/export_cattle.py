@@ -0,0 +1,49 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+from cattle.export import EXPORT_FORMATS, export_stream
+from cattle.filters import CattleFilter
+from cattle.models import Cattle
+
+
+class Command(BaseCommand):
+    help = 'Stream cattle listings to a CSV or NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', help='Output file (default: stdout)')
+        parser.add_argument('--format', dest='file_format', choices=list(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--gzip', action='store_true', help='Gzip-compress the output')
+        parser.add_argument(
+            '--filter',
+            action='append',
+            default=[],
+            metavar='NAME=VALUE',
+            help='Browse filter, e.g. --filter breed=ZEBU --filter price__lte=5000'
+        )
+        parser.add_argument('--all', action='store_true', help='Include inactive and sold listings')
+
+    def handle(self, *args, **options):
+        queryset = Cattle.objects.with_document_flags().order_by('id')
+        if not options['all']:
+            queryset = queryset.filter(is_active=True, is_sold=False)
+
+        params = QueryDict(mutable=True)
+        for item in options['filter']:
+            name, separator, value = item.partition('=')
+            if not separator:
+                raise CommandError(f'Invalid filter {item!r}, expected NAME=VALUE')
+            params.appendlist(name, value)
+        filterset = CattleFilter(params, queryset=queryset)
+        if not filterset.is_valid():
+            raise CommandError(f'Invalid filters: {dict(filterset.errors)}')
+
+        chunks = export_stream(filterset.qs, options['file_format'], compress=options['gzip'])
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+            self.stderr.write(self.style.SUCCESS(f"Exported listings to {options['output']}"))
+        else:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from users.models import User
+from cattle.models import CattleImage
+from cattle.renditions import ensure_renditions
+
+
+class Command(BaseCommand):
+    help = 'Generate resized renditions for cattle images and profile pictures that lack them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate existing renditions')
+
+    def handle(self, *args, **options):
+        force = options['force']
+        sources = [
+            (CattleImage.objects.exclude(image=''), 'image', 'renditions'),
+            (
+                User.objects.exclude(profile_picture='').exclude(profile_picture__isnull=True),
+                'profile_picture',
+                'profile_picture_renditions',
+            ),
+        ]
+        for queryset, field_name, renditions_field in sources:
+            processed = 0
+            for instance in queryset.only('pk', field_name, renditions_field).iterator(chunk_size=500):
+                before = getattr(instance, renditions_field)
+                if ensure_renditions(instance, field_name, renditions_field, force=force) is not before:
+                    processed += 1
+            self.stdout.write(f'{queryset.model._meta.verbose_name_plural}: {processed} updated')
+        self.stdout.write(self.style.SUCCESS('Renditions are up to date'))
@@ -0,0 +1,49 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from users.models import User
+from cattle.bulk_import import ImportFormatError, detect_format, import_listings
+
+
+class Command(BaseCommand):
+    help = 'Import cattle listings for a seller from a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSON Lines file')
+        parser.add_argument('--seller', required=True, help='Email of the selling user')
+        parser.add_argument('--format', dest='file_format', choices=['csv', 'jsonl'],
+                            help='File format (default: from the file extension)')
+        parser.add_argument('--batch-size', type=int, help='Rows per bulk insert')
+        parser.add_argument('--dry-run', action='store_true', help='Validate without inserting')
+
+    def handle(self, *args, **options):
+        seller = User.objects.filter(email=options['seller']).first()
+        if seller is None:
+            raise CommandError(f"No user with email {options['seller']}")
+        if not seller.can_sell():
+            raise CommandError(f'{seller.email} is not a seller')
+
+        try:
+            file_format = detect_format(options['path'], options['file_format'])
+            start = time.perf_counter()
+            with open(options['path'], 'rb') as stream:
+                report = import_listings(
+                    stream,
+                    file_format,
+                    seller,
+                    batch_size=options['batch_size'],
+                    dry_run=options['dry_run']
+                )
+            elapsed = time.perf_counter() - start
+        except (ImportFormatError, OSError) as exc:
+            raise CommandError(str(exc))
+
+        for error in report.errors:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        if report.failed > len(report.errors):
+            self.stderr.write(f'... {report.failed - len(report.errors)} more rows failed')
+
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {report.created} of {report.rows} rows in {elapsed:.2f}s '
+            f'({report.rows / elapsed if elapsed else 0:,.0f} rows/s), {report.failed} failed'
+        ))
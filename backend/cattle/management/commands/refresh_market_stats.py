@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from cattle.market import rebuild_market_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the market price index from all cattle listings'
+
+    def handle(self, *args, **options):
+        buckets = rebuild_market_stats()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {buckets} market price buckets'))
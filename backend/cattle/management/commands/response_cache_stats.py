@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from cattle.response_cache import cache_is_shared, response_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Report hits and misses of the anonymous listing response cache across all workers'
+
+    def handle(self, *args, **options):
+        if not settings.CATTLE_RESPONSE_CACHE_TIMEOUT or not cache_is_shared():
+            self.stdout.write(self.style.WARNING(
+                'Response caching is off: CATTLE_RESPONSE_CACHE_TIMEOUT is 0 or the cache is not shared'
+            ))
+        stats = response_cache_stats()
+        total = stats['hits'] + stats['misses']
+        hit_rate = stats['hits'] / total if total else 0
+        self.stdout.write(f'{stats["hits"]:,} hits, {stats["misses"]:,} misses ({hit_rate:.1%} hit rate)')
@@ -0,0 +1,391 @@
+import io
+import json
+import math
+import random
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, time as day_time, timedelta
+from decimal import Decimal
+from itertools import accumulate
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+from django.utils import timezone
+from PIL import Image
+from users.models import User
+from cattle.geo import REGION_CENTROIDS, encode_geohash
+from cattle.market import rebuild_market_stats
+from cattle.models import Cattle, CattleImage, HealthDocument
+from cattle.renditions import generate_renditions
+from cattle.response_cache import bump_generation
+from cattle.similarity import similarity_index
+
+SEED_PASSWORD = 'Seed-Pass-123'
+
+PLACEHOLDER_IMAGE = 'seed/placeholder.jpg'
+PLACEHOLDER_DOCUMENT = 'seed/placeholder.pdf'
+PLACEHOLDER_PDF = (
+    b'%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n'
+    b'2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n'
+    b'3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 72 72]>>endobj\n'
+    b'trailer<</Root 1 0 R>>\n%%EOF\n'
+)
+
+# Share of listings per breed and region (most cattle are in the north)
+BREED_WEIGHTS = {
+    'ZEBU': 35,
+    'WEST_AFRICAN_SHORTHORN': 25,
+    'SANGA': 20,
+    'CROSSBREED': 15,
+    'OTHER': 5,
+}
+REGION_WEIGHTS = {
+    'NORTHERN': 20, 'UPPER_EAST': 12, 'UPPER_WEST': 10, 'SAVANNAH': 10, 'NORTH_EAST': 6,
+    'ASHANTI': 8, 'BONO_EAST': 6, 'GREATER_ACCRA': 6, 'BRONG_AHAFO': 5, 'OTI': 4,
+    'VOLTA': 4, 'EASTERN': 3, 'AHAFO': 2, 'CENTRAL': 2, 'WESTERN': 1, 'WESTERN_NORTH': 1,
+}
+REGION_TOWNS = {
+    'NORTHERN': 'Tamale', 'UPPER_EAST': 'Bolgatanga', 'UPPER_WEST': 'Wa', 'SAVANNAH': 'Damongo',
+    'NORTH_EAST': 'Nalerigu', 'ASHANTI': 'Kumasi', 'BONO_EAST': 'Techiman', 'GREATER_ACCRA': 'Accra',
+    'BRONG_AHAFO': 'Sunyani', 'OTI': 'Dambai', 'VOLTA': 'Ho', 'EASTERN': 'Koforidua',
+    'AHAFO': 'Goaso', 'CENTRAL': 'Cape Coast', 'WESTERN': 'Takoradi', 'WESTERN_NORTH': 'Sefwi Wiawso',
+}
+HEALTH_WEIGHTS = {'EXCELLENT': 25, 'GOOD': 50, 'FAIR': 20, 'POOR': 5}
+
+# Typical asking price per kg of live weight (GHS)
+PRICE_PER_KG = {
+    'ZEBU': 16.0,
+    'WEST_AFRICAN_SHORTHORN': 14.0,
+    'SANGA': 15.0,
+    'CROSSBREED': 18.0,
+    'OTHER': 13.0,
+}
+HEALTH_PRICE_FACTOR = {'EXCELLENT': 1.15, 'GOOD': 1.0, 'FAIR': 0.85, 'POOR': 0.65}
+
+BREED_LABELS = dict(Cattle.BREED_CHOICES)
+DOCUMENT_LABELS = dict(HealthDocument.DOCUMENT_TYPE_CHOICES)
+
+FIRST_NAMES = ['Kofi', 'Ama', 'Kwame', 'Akosua', 'Yaw', 'Abena', 'Kwabena', 'Adwoa', 'Issah', 'Fati', 'Mohammed', 'Zenabu']
+LAST_NAMES = ['Mensah', 'Owusu', 'Boateng', 'Asante', 'Abdulai', 'Iddrisu', 'Osei', 'Alhassan', 'Yakubu', 'Appiah']
+DESCRIPTIONS = [
+    'Grass fed on open range and calm around people.',
+    'Raised on the family farm, dewormed every quarter.',
+    'Strong frame, good for breeding or fattening.',
+    'Well handled, used to being moved to market.',
+    'Kept with the herd near the river, steady weight gain.',
+]
+
+
+def weighted(weights):
+    """Return (values, cumulative weights) for rng.choices"""
+    return list(weights), list(accumulate(weights.values()))
+
+
+BREEDS, BREED_CUMULATIVE = weighted(BREED_WEIGHTS)
+REGIONS, REGION_CUMULATIVE = weighted(REGION_WEIGHTS)
+HEALTHS, HEALTH_CUMULATIVE = weighted(HEALTH_WEIGHTS)
+
+
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def copy_value(field, value):
+    """Convert a Python value to PostgreSQL COPY text format"""
+    if value is None:
+        return '\\N'
+    if isinstance(field, models.JSONField):
+        value = json.dumps(value)
+    elif isinstance(value, bool):
+        value = 't' if value else 'f'
+    elif isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    return str(value).translate(COPY_ESCAPES)
+
+
+@contextmanager
+def explicit_timestamps(*model_classes):
+    """Let bulk_create keep the given created/updated timestamps instead of now()"""
+    changed = []
+    for model in model_classes:
+        for field in model._meta.concrete_fields:
+            for flag in ('auto_now', 'auto_now_add'):
+                if getattr(field, flag, False):
+                    setattr(field, flag, False)
+                    changed.append((field, flag))
+    try:
+        yield
+    finally:
+        for field, flag in changed:
+            setattr(field, flag, True)
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a synthetic marketplace (users, listings with images, health documents, '
+        'sold and inactive history) for profiling. Output is deterministic for a given '
+        '--seed and --until date. Uses COPY on PostgreSQL and bulk_create elsewhere.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sellers', type=int, default=200, help='Seller accounts to create')
+        parser.add_argument('--buyers', type=int, default=1000, help='Buyer accounts to create')
+        parser.add_argument('--listings', type=int, default=10000, help='Listings to create')
+        parser.add_argument('--images', type=float, default=2.0, help='Average images per listing')
+        parser.add_argument('--documents', type=float, default=0.5, help='Average health documents per listing')
+        parser.add_argument('--sold', type=float, default=0.25, help='Share of listings that are sold')
+        parser.add_argument('--inactive', type=float, default=0.05, help='Share of unsold listings that are inactive')
+        parser.add_argument('--months', type=int, default=24, help='Months of history to spread listings over')
+        parser.add_argument('--until', type=date.fromisoformat, help='Last day of history (default: today)')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Rows per insert batch')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed (0-9 give distinct accounts)')
+        parser.add_argument('--no-copy', action='store_true', help='Use bulk_create even on PostgreSQL')
+        parser.add_argument(
+            '--skip-market-stats', action='store_true', help='Do not rebuild the market price index afterwards'
+        )
+
+    def handle(self, *args, **options):
+        if options['sellers'] < 1 and options['listings']:
+            raise CommandError('At least one seller is needed to create listings')
+        self.rng = random.Random(options['seed'])
+        self.seed = options['seed']
+        self.batch_size = options['batch_size']
+        self.use_copy = connection.vendor == 'postgresql' and not options['no_copy']
+        until = options['until'] or timezone.localdate()
+        self.until = timezone.make_aware(datetime.combine(until, day_time(18, 0)))
+        self.history = timedelta(days=30 * options['months'])
+
+        if User.objects.filter(email__startswith=f'seed{self.seed}-').exists():
+            raise CommandError(f'Accounts for --seed {self.seed} already exist; use another seed')
+
+        started = time.perf_counter()
+        self.stdout.write(f'Inserting with {"COPY" if self.use_copy else "bulk_create"}')
+        self.write_placeholders()
+        sellers = self.create_users('seller', options['sellers'], offset=0)
+        self.create_users('buyer', options['buyers'], offset=options['sellers'])
+        counts = self.create_listings(sellers, options)
+
+        if counts['listings']:
+            if not options['skip_market_stats']:
+                self.stdout.write('Rebuilding market price index...')
+                rebuild_market_stats()
+            similarity_index.mark_stale()
+            bump_generation()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(sellers) + options["buyers"]:,} users, {counts["listings"]:,} listings, '
+            f'{counts["images"]:,} images and {counts["documents"]:,} documents in {elapsed:.1f}s '
+            f'(password for all seeded accounts: {SEED_PASSWORD})'
+        ))
+
+    def write_placeholders(self):
+        """Store the tiny files every seeded image and document points to"""
+        if not default_storage.exists(PLACEHOLDER_IMAGE):
+            buffer = io.BytesIO()
+            Image.new('RGB', (8, 6), color=(120, 80, 40)).save(buffer, 'JPEG')
+            default_storage.save(PLACEHOLDER_IMAGE, ContentFile(buffer.getvalue()))
+        # Shared by every seeded image, so reads do not backfill renditions row by row
+        self.placeholder_renditions = generate_renditions(default_storage, PLACEHOLDER_IMAGE)
+        if not default_storage.exists(PLACEHOLDER_DOCUMENT):
+            default_storage.save(PLACEHOLDER_DOCUMENT, ContentFile(PLACEHOLDER_PDF))
+
+    def random_time(self, earliest=None):
+        """A timestamp within the history window, after `earliest` if given"""
+        start = earliest or self.until - self.history
+        span = max((self.until - start).total_seconds(), 1)
+        return start + timedelta(seconds=self.rng.random() * span)
+
+    # Inserting
+
+    def insert(self, model, rows):
+        """Insert rows (dicts of attname values) and return their primary keys in order"""
+        if not rows:
+            return []
+        if self.use_copy:
+            return self.copy_rows(model, rows)
+        with explicit_timestamps(model):
+            objects = model.objects.bulk_create([model(**row) for row in rows], batch_size=self.batch_size)
+        return [obj.pk for obj in objects]
+
+    def copy_rows(self, model, rows):
+        """Reserve ids from the table's sequence and load rows with COPY ... FROM STDIN"""
+        meta = model._meta
+        fields = meta.concrete_fields
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)',
+                [meta.db_table, meta.pk.column, len(rows)]
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+
+            buffer = io.StringIO()
+            for pk, row in zip(ids, rows):
+                row[meta.pk.attname] = pk
+                buffer.write('\t'.join(
+                    copy_value(field, row[field.attname] if field.attname in row else field.get_default())
+                    for field in fields
+                ))
+                buffer.write('\n')
+            buffer.seek(0)
+
+            sql = f'COPY {quote(meta.db_table)} ({", ".join(quote(field.column) for field in fields)}) FROM STDIN'
+
+            raw_cursor = cursor.cursor
+            if hasattr(raw_cursor, 'copy_expert'):
+                raw_cursor.copy_expert(sql, buffer)
+            else:
+                # psycopg 3
+                with raw_cursor.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+        return ids
+
+    # Generating
+
+    def create_users(self, kind, total, offset):
+        password = make_password(SEED_PASSWORD)
+        user_ids = []
+        for start in range(0, total, self.batch_size):
+            rows = []
+            for index in range(start, min(start + self.batch_size, total)):
+                joined = self.random_time()
+                region = self.rng.choices(REGIONS, cum_weights=REGION_CUMULATIVE)[0]
+                first_name, last_name = self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+                rows.append({
+                    'email': f'seed{self.seed}-{kind}-{index}@beefline.local',
+                    'phone_number': f'+2335{self.seed % 10}{offset + index:07d}',
+                    'password': password,
+                    'first_name': first_name,
+                    'last_name': last_name,
+                    'user_type': 'SELLER' if kind == 'seller' else 'BUYER',
+                    'region': region,
+                    'city': REGION_TOWNS[region],
+                    'business_name': f'{last_name} Livestock' if kind == 'seller' else '',
+                    'is_verified': True,
+                    'is_verified_seller': kind == 'seller' and self.rng.random() < 0.3,
+                    'date_joined': joined,
+                    'last_password_change': joined,
+                    'updated_at': joined,
+                })
+            with transaction.atomic():
+                user_ids.extend(self.insert(User, rows))
+        self.stdout.write(f'  {total:,} {kind}s')
+        return user_ids
+
+    def create_listings(self, sellers, options):
+        counts = {'listings': 0, 'images': 0, 'documents': 0}
+        total = options['listings']
+        if not total:
+            return counts
+
+        # A few sellers own most listings (Zipf-like)
+        seller_weights = list(accumulate(1 / (rank + 1) ** 0.8 for rank in range(len(sellers))))
+        started = time.perf_counter()
+        for start in range(0, total, self.batch_size):
+            size = min(self.batch_size, total - start)
+            listings = [self.listing_row(sellers, seller_weights, options) for _ in range(size)]
+            with transaction.atomic():
+                cattle_ids = self.insert(Cattle, listings)
+                images, documents = [], []
+                for cattle_id, listing in zip(cattle_ids, listings):
+                    images.extend(self.image_rows(cattle_id, listing, options['images']))
+                    documents.extend(self.document_rows(cattle_id, listing, options['documents']))
+                self.insert(CattleImage, images)
+                self.insert(HealthDocument, documents)
+
+            counts['listings'] += size
+            counts['images'] += len(images)
+            counts['documents'] += len(documents)
+            rate = counts['listings'] / (time.perf_counter() - started)
+            self.stdout.write(f'  {counts["listings"]:,}/{total:,} listings ({rate:,.0f}/s)')
+        return counts
+
+    def listing_row(self, sellers, seller_weights, options):
+        rng = self.rng
+        breed = rng.choices(BREEDS, cum_weights=BREED_CUMULATIVE)[0]
+        region = rng.choices(REGIONS, cum_weights=REGION_CUMULATIVE)[0]
+        health = rng.choices(HEALTHS, cum_weights=HEALTH_CUMULATIVE)[0]
+        gender = rng.choice(['MALE', 'FEMALE'])
+
+        age = rng.randint(6, 120)
+        mature_weight = 420 if gender == 'MALE' else 340
+        weight = mature_weight * (1 - math.exp(-age / 24)) + 40
+        weight *= rng.uniform(0.85, 1.15)
+        price = weight * PRICE_PER_KG[breed] * HEALTH_PRICE_FACTOR[health] * rng.lognormvariate(0, 0.15)
+        price = max(round(price / 50) * 50, 500)
+
+        latitude, longitude = REGION_CENTROIDS[region]
+        latitude += rng.uniform(-0.3, 0.3)
+        longitude += rng.uniform(-0.3, 0.3)
+
+        created_at = self.random_time()
+        is_sold = rng.random() < options['sold']
+        sold_date = None
+        if is_sold:
+            sold_date = min(created_at + timedelta(days=rng.lognormvariate(3, 0.7)), self.until)
+        vaccinated = rng.random() < 0.6
+        animal = {'MALE': ['bull', 'steer'], 'FEMALE': ['cow', 'heifer']}[gender][age < 30]
+
+        return {
+            'seller_id': rng.choices(sellers, cum_weights=seller_weights)[0],
+            'title': f'{BREED_LABELS[breed]} {animal}, {age} months',
+            'description': rng.choice(DESCRIPTIONS),
+            'breed': breed,
+            'gender': gender,
+            'age_months': age,
+            'weight_kg': Decimal(f'{weight:.2f}'),
+            'price': Decimal(price),
+            'is_negotiable': rng.random() < 0.7,
+            'health_status': health,
+            'vaccination_status': vaccinated,
+            'last_vaccination_date': (created_at - timedelta(days=rng.randint(10, 300))).date() if vaccinated else None,
+            'region': region,
+            'city': REGION_TOWNS[region],
+            'latitude': Decimal(f'{latitude:.6f}'),
+            'longitude': Decimal(f'{longitude:.6f}'),
+            'location_is_approximate': False,
+            'geohash': encode_geohash(latitude, longitude),
+            'is_active': not is_sold and rng.random() >= options['inactive'],
+            'is_sold': is_sold,
+            'sold_date': sold_date,
+            'view_count': int(rng.expovariate(1 / (60 if is_sold else 25))),
+            'created_at': created_at,
+            'updated_at': sold_date or created_at,
+        }
+
+    def spread(self, average):
+        """A random count with the given average"""
+        return round(self.rng.uniform(0, 2 * average))
+
+    def image_rows(self, cattle_id, listing, average):
+        count = self.spread(average)
+        return [
+            {
+                'cattle_id': cattle_id,
+                'image': PLACEHOLDER_IMAGE,
+                'renditions': self.placeholder_renditions,
+                'is_primary': index == 0,
+                'uploaded_at': listing['created_at'] + timedelta(minutes=index),
+            }
+            for index in range(count)
+        ]
+
+    def document_rows(self, cattle_id, listing, average):
+        rows = []
+        for _ in range(self.spread(average)):
+            document_type = 'VACCINATION_RECORD' if listing['vaccination_status'] and not rows else self.rng.choice(
+                ['HEALTH_CERTIFICATE', 'VET_REPORT']
+            )
+            issued = (listing['created_at'] - timedelta(days=self.rng.randint(1, 180))).date()
+            rows.append({
+                'cattle_id': cattle_id,
+                'document_type': document_type,
+                'document': PLACEHOLDER_DOCUMENT,
+                'document_name': DOCUMENT_LABELS[document_type],
+                'issue_date': issued,
+                'expiry_date': issued + timedelta(days=365),
+                'uploaded_at': listing['created_at'],
+            })
+        return rows
@@ -0,0 +1,183 @@
+"""
+Market price index: monthly price statistics per breed, region and gender.
+
+Each MarketPriceStat row summarises one bucket, keyed by kind, breed,
+region, gender and month:
+
+- LISTED buckets cover asking prices of listings created in the month
+- SOLD buckets cover listings sold in the month (by `sold_date`)
+
+Buckets are refreshed incrementally: saving a listing (including
+`Cattle.mark_as_sold`) or deleting it recomputes only the buckets it
+belongs to, from the listings in that bucket, plus the buckets it belonged
+to when it was loaded (Cattle.from_db keeps a snapshot of the market
+fields), so edits that move a listing to another breed, region, gender or
+month also refresh the bucket it left. Saves that change none of those
+fields, nor the price or weight (e.g. a title edit), refresh nothing. Bulk
+imports refresh the buckets they touched once at the end.
+
+Statistics are aggregated in the database. PostgreSQL computes the
+percentiles with percentile_cont in the same query; other databases read
+the two rows around each percentile.
+"""
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from django.db import connections, transaction
+from django.db.models import Aggregate, Avg, Count, DecimalField, ExpressionWrapper, F, FloatField, Max, Min
+from django.utils import timezone
+from .models import MARKET_FIELDS, Cattle, MarketPriceStat
+
+# Fields whose change affects a listing's statistics
+LISTED_FIELDS = {'breed', 'region', 'gender', 'price', 'weight_kg'}
+STAT_FIELDS = LISTED_FIELDS | {'is_sold', 'sold_date'}
+
+CENTS = Decimal('0.01')
+
+PERCENTILES = {'p25': Decimal('0.25'), 'median': Decimal('0.5'), 'p75': Decimal('0.75')}
+
+PRICE_PER_KG = ExpressionWrapper(
+    F('price') / F('weight_kg'), output_field=DecimalField(max_digits=16, decimal_places=6)
+)
+
+
+class PercentileCont(Aggregate):
+    """PostgreSQL's percentile_cont(fraction) WITHIN GROUP (ORDER BY expression)"""
+    function = 'PERCENTILE_CONT'
+    template = '%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+    output_field = FloatField()
+
+    def __init__(self, expression, fraction, **extra):
+        super().__init__(expression, fraction=Decimal(fraction), **extra)
+
+
+def month_start(value):
+    """Return the first day of the month of a datetime, in the current time zone"""
+    return timezone.localtime(value).date().replace(day=1)
+
+
+def month_bounds(month):
+    """Return aware datetimes for the start of a month and of the next one"""
+    if month.month == 12:
+        next_month = month.replace(year=month.year + 1, month=1)
+    else:
+        next_month = month.replace(month=month.month + 1)
+    return (
+        timezone.make_aware(datetime(month.year, month.month, 1)),
+        timezone.make_aware(datetime(next_month.year, next_month.month, 1)),
+    )
+
+
+def percentile(queryset, field, count, fraction):
+    """Linear-interpolated percentile of a field (like percentile_cont), from the two rows around it"""
+    position = (count - 1) * fraction
+    lower = int(position)
+    values = list(queryset.order_by(field).values_list(field, flat=True)[lower:lower + 2])
+    return values[0] + (values[-1] - values[0]) * (position - lower)
+
+
+def summarize(queryset, field, with_range=False):
+    """Return count, mean, p25, median and p75 (and min and max) of a field, or None without rows"""
+    aggregates = {'count': Count('pk'), 'mean': Avg(field)}
+    if with_range:
+        aggregates.update(min=Min(field), max=Max(field))
+    use_percentile_cont = connections[queryset.db].vendor == 'postgresql'
+    if use_percentile_cont:
+        aggregates.update({name: PercentileCont(field, fraction) for name, fraction in PERCENTILES.items()})
+    summary = queryset.aggregate(**aggregates)
+    if not summary['count']:
+        return None
+    if not use_percentile_cont:
+        summary.update({
+            name: percentile(queryset, field, summary['count'], fraction) for name, fraction in PERCENTILES.items()
+        })
+    return summary
+
+
+def to_cents(value):
+    if value is None:
+        return None
+    return (value if isinstance(value, Decimal) else Decimal(str(value))).quantize(CENTS)
+
+
+def listing_buckets(cattle, kinds=('LISTED', 'SOLD')):
+    """Return the (kind, breed, region, gender, month) buckets a listing belongs to"""
+    buckets = set()
+    key = (cattle.breed, cattle.region, cattle.gender)
+    if 'LISTED' in kinds and cattle.created_at:
+        buckets.add(('LISTED', *key, month_start(cattle.created_at)))
+    if 'SOLD' in kinds and cattle.is_sold and cattle.sold_date:
+        buckets.add(('SOLD', *key, month_start(cattle.sold_date)))
+    return buckets
+
+
+def affected_buckets(cattle, kinds=('LISTED', 'SOLD')):
+    """Return the buckets a listing belongs to now and belonged to when it was loaded"""
+    buckets = listing_buckets(cattle, kinds)
+    snapshot = getattr(cattle, '_market_snapshot', None)
+    if snapshot is not None:
+        buckets |= listing_buckets(SimpleNamespace(**snapshot), kinds)
+    return buckets
+
+
+def refresh_bucket(kind, breed, region, gender, month):
+    """Recompute a single bucket from its listings"""
+    start, end = month_bounds(month)
+    listings = Cattle.objects.filter(breed=breed, region=region, gender=gender)
+    if kind == 'SOLD':
+        listings = listings.filter(is_sold=True, sold_date__gte=start, sold_date__lt=end)
+    else:
+        listings = listings.filter(created_at__gte=start, created_at__lt=end)
+
+    bucket = {'kind': kind, 'breed': breed, 'region': region, 'gender': gender, 'month': month}
+    prices = summarize(listings, 'price', with_range=True)
+    if prices is None:
+        MarketPriceStat.objects.filter(**bucket).delete()
+        return None
+
+    defaults = {'listing_count': prices.pop('count')}
+    for name, value in prices.items():
+        defaults[f'price_{name}'] = to_cents(value)
+
+    per_kg = summarize(listings.filter(weight_kg__gt=0).annotate(per_kg=PRICE_PER_KG), 'per_kg') or {}
+    for name in ('mean', 'p25', 'median', 'p75'):
+        defaults[f'price_per_kg_{name}'] = to_cents(per_kg.get(name))
+
+    stat, _ = MarketPriceStat.objects.update_or_create(defaults=defaults, **bucket)
+    return stat
+
+
+def refresh_buckets(buckets):
+    for bucket in buckets:
+        refresh_bucket(*bucket)
+
+
+def refresh_for_listing(cattle, update_fields=None):
+    """Refresh the buckets affected by saving a listing"""
+    if update_fields is not None and not STAT_FIELDS.intersection(update_fields):
+        return
+    snapshot = getattr(cattle, '_market_snapshot', None)
+    if snapshot is not None and all(getattr(cattle, field) == snapshot[field] for field in MARKET_FIELDS):
+        return
+    kinds = ('LISTED', 'SOLD')
+    if update_fields is not None and not LISTED_FIELDS.intersection(update_fields):
+        # e.g. mark_as_sold: asking-price buckets are unchanged
+        kinds = ('SOLD',)
+    refresh_buckets(affected_buckets(cattle, kinds))
+    # Later saves of this instance move it from the buckets it is in now
+    cattle._market_snapshot = {field: getattr(cattle, field) for field in MARKET_FIELDS}
+
+
+def rebuild_market_stats():
+    """Recompute every bucket from scratch; returns the number of buckets"""
+    buckets = set()
+    listings = Cattle.objects.values_list('breed', 'region', 'gender', 'created_at', 'is_sold', 'sold_date')
+    for breed, region, gender, created_at, is_sold, sold_date in listings.iterator(chunk_size=2000):
+        buckets.add(('LISTED', breed, region, gender, month_start(created_at)))
+        if is_sold and sold_date:
+            buckets.add(('SOLD', breed, region, gender, month_start(sold_date)))
+
+    with transaction.atomic():
+        MarketPriceStat.objects.all().delete()
+        refresh_buckets(sorted(buckets))
+    return len(buckets)
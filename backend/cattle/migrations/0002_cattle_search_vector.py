@@ -0,0 +1,44 @@
+from django.db import migrations
+
+# PostgreSQL only: a stored, weighted full-text search vector with a GIN index.
+# The column is maintained by the database and is not a model field, so other
+# databases (e.g. SQLite in tests) skip this migration.
+CREATE_SEARCH_VECTOR = [
+    """
+    ALTER TABLE cattle_cattle ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english'::regconfig, coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english'::regconfig, coalesce(city, '')), 'B') ||
+        setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    'CREATE INDEX cattle_search_vector_gin ON cattle_cattle USING gin (search_vector)',
+]
+
+DROP_SEARCH_VECTOR = [
+    'DROP INDEX IF EXISTS cattle_search_vector_gin',
+    'ALTER TABLE cattle_cattle DROP COLUMN IF EXISTS search_vector',
+]
+
+
+def run_on_postgresql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cattle', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_postgresql(CREATE_SEARCH_VECTOR),
+            run_on_postgresql(DROP_SEARCH_VECTOR),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cattle', '0002_cattle_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cattle',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_sold', False)), fields=['created_at', 'id'], name='cattle_browse_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cattle',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_sold', False)), fields=['price', 'id'], name='cattle_browse_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cattle',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_sold', False)), fields=['age_months', 'id'], name='cattle_browse_age_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cattle',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_sold', False)), fields=['weight_kg', 'id'], name='cattle_browse_weight_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cattle',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_sold', False)), fields=['view_count', 'id'], name='cattle_browse_views_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cattle',
+            index=models.Index(fields=['seller', 'created_at', 'id'], name='cattle_seller_created_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cattle', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='healthdocument',
+            index=models.Index(fields=['cattle', 'document_type'], name='cattle_heal_cattle__e0b557_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cattle', '0004_healthdocument_type_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cattleimage',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Generated resized WebP/JPEG variants'),
+        ),
+    ]
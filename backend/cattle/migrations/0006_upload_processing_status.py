@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cattle', '0005_cattleimage_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cattleimage',
+            name='checksum',
+            field=models.CharField(blank=True, help_text='SHA-256 of the processed file', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='cattleimage',
+            name='processing_error',
+            field=models.CharField(blank=True, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='cattleimage',
+            name='processing_status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('READY', 'Ready'), ('FAILED', 'Failed')], default='READY', help_text='Upload processing status', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='healthdocument',
+            name='checksum',
+            field=models.CharField(blank=True, help_text='SHA-256 of the processed file', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='healthdocument',
+            name='processing_error',
+            field=models.CharField(blank=True, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='healthdocument',
+            name='processing_status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('READY', 'Ready'), ('FAILED', 'Failed')], default='READY', help_text='Upload processing status', max_length=10),
+        ),
+    ]
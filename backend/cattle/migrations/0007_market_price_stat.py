@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cattle', '0006_upload_processing_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketPriceStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('LISTED', 'Asking prices of listings created in the month'), ('SOLD', 'Prices of listings sold in the month')], max_length=10)),
+                ('breed', models.CharField(choices=[('WEST_AFRICAN_SHORTHORN', 'West African Shorthorn'), ('ZEBU', 'Zebu'), ('SANGA', 'Sanga'), ('CROSSBREED', 'Crossbreed'), ('OTHER', 'Other')], max_length=50)),
+                ('region', models.CharField(max_length=50)),
+                ('gender', models.CharField(choices=[('MALE', 'Male'), ('FEMALE', 'Female')], max_length=10)),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('listing_count', models.PositiveIntegerField(default=0)),
+                ('price_mean', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('price_min', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('price_p25', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('price_median', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('price_p75', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('price_max', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('price_per_kg_mean', models.DecimalField(decimal_places=2, max_digits=12, null=True)),
+                ('price_per_kg_p25', models.DecimalField(decimal_places=2, max_digits=12, null=True)),
+                ('price_per_kg_median', models.DecimalField(decimal_places=2, max_digits=12, null=True)),
+                ('price_per_kg_p75', models.DecimalField(decimal_places=2, max_digits=12, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Market Price Statistic',
+                'verbose_name_plural': 'Market Price Statistics',
+                'ordering': ['-month', 'breed', 'region', 'gender'],
+                'indexes': [models.Index(fields=['kind', 'month'], name='cattle_mark_kind_4812e3_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'breed', 'region', 'gender', 'month'), name='market_price_stat_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:44
+
+import django.core.validators
+from django.db import migrations, models
+from cattle.geo import encode_geohash, location_centroid
+
+
+def fill_coordinates(apps, schema_editor):
+    """Give existing listings their city or region centroid"""
+    Cattle = apps.get_model('cattle', 'Cattle')
+    for cattle in Cattle.objects.filter(latitude__isnull=True).only('pk', 'city', 'region').iterator(chunk_size=2000):
+        centroid = location_centroid(cattle.city, cattle.region)
+        if centroid is None:
+            continue
+        latitude, longitude = centroid
+        Cattle.objects.filter(pk=cattle.pk).update(
+            latitude=latitude,
+            longitude=longitude,
+            geohash=encode_geohash(float(latitude), float(longitude))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cattle', '0007_market_price_stat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cattle',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Geohash of the coordinates, for distance search', max_length=12),
+        ),
+        migrations.AddField(
+            model_name='cattle',
+            name='latitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)]),
+        ),
+        migrations.AddField(
+            model_name='cattle',
+            name='location_is_approximate',
+            field=models.BooleanField(default=True, help_text='Coordinates are the city or region centroid'),
+        ),
+        migrations.AddField(
+            model_name='cattle',
+            name='longitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)]),
+        ),
+        migrations.RunPython(fill_coordinates, migrations.RunPython.noop),
+    ]
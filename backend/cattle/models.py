@@ -2,6 +2,48 @@ from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
+from .geo import encode_geohash, location_centroid
+
+# Fields that determine a listing's coordinates (see Cattle.set_coordinates)
+LOCATION_FIELDS = {'city', 'region', 'latitude', 'longitude', 'location_is_approximate', 'geohash'}
+
+# Fields that decide which market price buckets a listing belongs to and what it adds to them (see cattle.market)
+MARKET_FIELDS = ('breed', 'region', 'gender', 'created_at', 'is_sold', 'sold_date', 'price', 'weight_kg')
+
+
+class CattleQuerySet(models.QuerySet):
+    """Custom queryset for cattle listings"""
+    
+    def with_primary_image(self):
+        """Prefetch only the primary (or first) processed image of each listing"""
+        return self.prefetch_related(
+            models.Prefetch(
+                'images',
+                queryset=CattleImage.objects.filter(processing_status='READY').order_by(
+                    '-is_primary', 'uploaded_at', 'id'
+                )[:1],
+                to_attr='prefetched_primary_images'
+            )
+        )
+    
+    def with_document_flags(self):
+        """Annotate whether each listing has a health certificate and vaccination record (processed uploads only)"""
+        return self.annotate(
+            health_certificate_exists=models.Exists(
+                HealthDocument.objects.filter(
+                    cattle=models.OuterRef('pk'),
+                    document_type='HEALTH_CERTIFICATE',
+                    processing_status='READY'
+                )
+            ),
+            vaccination_record_exists=models.Exists(
+                HealthDocument.objects.filter(
+                    cattle=models.OuterRef('pk'),
+                    document_type='VACCINATION_RECORD',
+                    processing_status='READY'
+                )
+            ),
+        )
 
 
 class Cattle(models.Model):
@@ -116,6 +158,31 @@ class Cattle(models.Model):
         blank=True,
         help_text='Specific location or directions'
     )
+    latitude = models.DecimalField(
+        max_digits=9,
+        decimal_places=6,
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)]
+    )
+    longitude = models.DecimalField(
+        max_digits=9,
+        decimal_places=6,
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)]
+    )
+    location_is_approximate = models.BooleanField(
+        default=True,
+        help_text='Coordinates are the city or region centroid'
+    )
+    geohash = models.CharField(
+        max_length=12,
+        blank=True,
+        db_index=True,
+        editable=False,
+        help_text='Geohash of the coordinates, for distance search'
+    )
     
     # Seller Information
     seller = models.ForeignKey(
@@ -158,6 +225,8 @@ class Cattle(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = CattleQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'Cattle'
         verbose_name_plural = 'Cattle'
@@ -167,22 +236,82 @@ class Cattle(models.Model):
             models.Index(fields=['price', '-created_at']),
             models.Index(fields=['seller', 'is_active']),
             models.Index(fields=['is_active', 'is_sold']),
+            # Keyset pagination: one index per browse ordering, id as tie-breaker
+            models.Index(
+                fields=['created_at', 'id'],
+                condition=models.Q(is_active=True, is_sold=False),
+                name='cattle_browse_created_idx'
+            ),
+            models.Index(
+                fields=['price', 'id'],
+                condition=models.Q(is_active=True, is_sold=False),
+                name='cattle_browse_price_idx'
+            ),
+            models.Index(
+                fields=['age_months', 'id'],
+                condition=models.Q(is_active=True, is_sold=False),
+                name='cattle_browse_age_idx'
+            ),
+            models.Index(
+                fields=['weight_kg', 'id'],
+                condition=models.Q(is_active=True, is_sold=False),
+                name='cattle_browse_weight_idx'
+            ),
+            models.Index(
+                fields=['view_count', 'id'],
+                condition=models.Q(is_active=True, is_sold=False),
+                name='cattle_browse_views_idx'
+            ),
+            # Seller listings (my-listings and user cattle) by newest first
+            models.Index(fields=['seller', 'created_at', 'id'], name='cattle_seller_created_idx'),
         ]
     
     def __str__(self):
         return f"{self.get_breed_display()} - {self.title} (GHS {self.price})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember whether the stored listing was browsable, to detect reactivation
+        loaded = instance.__dict__
+        if 'is_active' in loaded and 'is_sold' in loaded:
+            instance._was_listed = loaded['is_active'] and not loaded['is_sold']
+        # Remember the stored market fields, so edits can skip or refresh the buckets the listing leaves
+        if all(field in loaded for field in MARKET_FIELDS):
+            instance._market_snapshot = {field: loaded[field] for field in MARKET_FIELDS}
+        return instance
+    
+    def save(self, *args, **kwargs):
+        """Keep coordinates and geohash in sync with the location"""
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self.set_coordinates()
+        elif LOCATION_FIELDS.intersection(update_fields):
+            self.set_coordinates()
+            kwargs['update_fields'] = set(update_fields) | LOCATION_FIELDS
+        super().save(*args, **kwargs)
+    
+    def set_coordinates(self):
+        """Use the city or region centroid unless exact coordinates were given"""
+        if self.location_is_approximate or self.latitude is None or self.longitude is None:
+            self.latitude, self.longitude = location_centroid(self.city, self.region) or (None, None)
+            self.location_is_approximate = True
+        if self.latitude is None or self.longitude is None:
+            self.geohash = ''
+        else:
+            self.geohash = encode_geohash(float(self.latitude), float(self.longitude))
+    
     def mark_as_sold(self):
         """Mark cattle as sold"""
         self.is_sold = True
         self.is_active = False
         self.sold_date = timezone.now()
-        self.save(update_fields=['is_sold', 'is_active', 'sold_date'])
+        self.save(update_fields=['is_sold', 'is_active', 'sold_date', 'updated_at'])
     
     def increment_view_count(self):
         """Increment view count"""
+        Cattle.objects.filter(pk=self.pk).update(view_count=models.F('view_count') + 1)
         self.view_count += 1
-        self.save(update_fields=['view_count'])
     
     def get_age_display(self):
         """Return age in years and months"""
@@ -192,18 +321,48 @@ class Cattle(models.Model):
             return f"{years} year(s) {months} month(s)"
         return f"{months} month(s)"
     
+    def has_document_type(self, document_type):
+        """Check for a health document type, using prefetched documents if available"""
+        if 'health_documents' in getattr(self, '_prefetched_objects_cache', {}):
+            return any(
+                document.document_type == document_type and document.processing_status == 'READY'
+                for document in self.health_documents.all()
+            )
+        return self.health_documents.filter(document_type=document_type, processing_status='READY').exists()
+    
     def has_health_certificate(self):
         """Check if cattle has health certificates"""
-        return self.health_documents.filter(document_type='HEALTH_CERTIFICATE').exists()
+        # Use the annotation from CattleQuerySet.with_document_flags() if available
+        if hasattr(self, 'health_certificate_exists'):
+            return self.health_certificate_exists
+        return self.has_document_type('HEALTH_CERTIFICATE')
     
     def has_vaccination_record(self):
         """Check if cattle has vaccination records"""
-        return self.health_documents.filter(document_type='VACCINATION_RECORD').exists()
+        if hasattr(self, 'vaccination_record_exists'):
+            return self.vaccination_record_exists
+        return self.has_document_type('VACCINATION_RECORD')
     
     @property
     def primary_image(self):
         """Get the primary image for this cattle"""
-        return self.images.filter(is_primary=True).first() or self.images.first()
+        # Use the image picked by CattleQuerySet.with_primary_image() if available
+        if hasattr(self, 'prefetched_primary_images'):
+            return self.prefetched_primary_images[0] if self.prefetched_primary_images else None
+        # Reuse a full images prefetch instead of querying again
+        if 'images' in getattr(self, '_prefetched_objects_cache', {}):
+            images = [image for image in self.images.all() if image.processing_status == 'READY']
+            return next((image for image in images if image.is_primary), None) or (images[0] if images else None)
+        images = self.images.filter(processing_status='READY')
+        return images.filter(is_primary=True).first() or images.first()
+
+
+# Processing status for uploaded images and documents (see cattle.processing)
+PROCESSING_STATUS_CHOICES = [
+    ('PENDING', 'Pending'),
+    ('READY', 'Ready'),
+    ('FAILED', 'Failed'),
+]
 
 
 class CattleImage(models.Model):
@@ -227,6 +386,24 @@ class CattleImage(models.Model):
         default=False,
         help_text='Is this the primary/featured image?'
     )
+    renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text='Generated resized WebP/JPEG variants'
+    )
+    processing_status = models.CharField(
+        max_length=10,
+        choices=PROCESSING_STATUS_CHOICES,
+        default='READY',
+        help_text='Upload processing status'
+    )
+    processing_error = models.CharField(max_length=500, blank=True)
+    checksum = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text='SHA-256 of the processed file'
+    )
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -289,18 +466,165 @@ class HealthDocument(models.Model):
         blank=True,
         help_text='Additional notes about this document'
     )
+    processing_status = models.CharField(
+        max_length=10,
+        choices=PROCESSING_STATUS_CHOICES,
+        default='READY',
+        help_text='Upload processing status'
+    )
+    processing_error = models.CharField(max_length=500, blank=True)
+    checksum = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text='SHA-256 of the processed file'
+    )
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         verbose_name = 'Health Document'
         verbose_name_plural = 'Health Documents'
         ordering = ['-uploaded_at']
+        indexes = [
+            models.Index(fields=['cattle', 'document_type']),
+        ]
     
     def __str__(self):
         return f"{self.get_document_type_display()} - {self.document_name}"
     
-    def is_expired(self):
+    def is_expired(self, today=None):
         """Check if document has expired"""
         if self.expiry_date:
-            return timezone.now().date() > self.expiry_date
+            return (today or timezone.now().date()) > self.expiry_date
         return False
+
+
+class MarketPriceStat(models.Model):
+    """Monthly price statistics per breed, region and gender (see cattle.market)"""
+    
+    KIND_CHOICES = [
+        ('LISTED', 'Asking prices of listings created in the month'),
+        ('SOLD', 'Prices of listings sold in the month'),
+    ]
+    
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    breed = models.CharField(max_length=50, choices=Cattle.BREED_CHOICES)
+    region = models.CharField(max_length=50)
+    gender = models.CharField(max_length=10, choices=Cattle.GENDER_CHOICES)
+    month = models.DateField(help_text='First day of the month')
+    
+    listing_count = models.PositiveIntegerField(default=0)
+    price_mean = models.DecimalField(max_digits=12, decimal_places=2)
+    price_min = models.DecimalField(max_digits=12, decimal_places=2)
+    price_p25 = models.DecimalField(max_digits=12, decimal_places=2)
+    price_median = models.DecimalField(max_digits=12, decimal_places=2)
+    price_p75 = models.DecimalField(max_digits=12, decimal_places=2)
+    price_max = models.DecimalField(max_digits=12, decimal_places=2)
+    
+    # Price per kg, over listings with a positive weight
+    price_per_kg_mean = models.DecimalField(max_digits=12, decimal_places=2, null=True)
+    price_per_kg_p25 = models.DecimalField(max_digits=12, decimal_places=2, null=True)
+    price_per_kg_median = models.DecimalField(max_digits=12, decimal_places=2, null=True)
+    price_per_kg_p75 = models.DecimalField(max_digits=12, decimal_places=2, null=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Market Price Statistic'
+        verbose_name_plural = 'Market Price Statistics'
+        ordering = ['-month', 'breed', 'region', 'gender']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kind', 'breed', 'region', 'gender', 'month'],
+                name='market_price_stat_bucket'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'month']),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} {self.breed}/{self.region}/{self.gender} {self.month:%Y-%m}"
+
+
+class SavedSearch(models.Model):
+    """Browse filters a buyer wants to be notified about (see cattle.saved_searches)"""
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='saved_searches'
+    )
+    name = models.CharField(max_length=100)
+    params = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text='Browse filter parameters, e.g. {"breed": "ZEBU", "price__lte": "6000"}'
+    )
+    is_active = models.BooleanField(default=True, help_text='Collect new matches for this search')
+    
+    # Match index: blank means any value; price bands cover the price range
+    breed = models.CharField(max_length=50, blank=True, editable=False)
+    region = models.CharField(max_length=50, blank=True, editable=False)
+    price_band_low = models.PositiveSmallIntegerField(default=0, editable=False)
+    price_band_high = models.PositiveSmallIntegerField(default=0, editable=False)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Saved Search'
+        verbose_name_plural = 'Saved Searches'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['breed', 'region', 'price_band_low', 'price_band_high'],
+                condition=models.Q(is_active=True),
+                name='saved_search_match_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.user})"
+    
+    def save(self, *args, **kwargs):
+        """Keep the match index columns in sync with the parameters"""
+        from .saved_searches import index_columns
+        for field, value in index_columns(self.params).items():
+            setattr(self, field, value)
+        super().save(*args, **kwargs)
+
+
+class SavedSearchMatch(models.Model):
+    """A listing that matched a saved search, shown in the user's inbox"""
+    
+    saved_search = models.ForeignKey(
+        SavedSearch,
+        on_delete=models.CASCADE,
+        related_name='matches'
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='saved_search_matches'
+    )
+    cattle = models.ForeignKey(
+        Cattle,
+        on_delete=models.CASCADE,
+        related_name='saved_search_matches'
+    )
+    is_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Saved Search Match'
+        verbose_name_plural = 'Saved Search Matches'
+        ordering = ['-id']
+        constraints = [
+            models.UniqueConstraint(fields=['saved_search', 'cattle'], name='saved_search_match_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.cattle} for {self.saved_search}"
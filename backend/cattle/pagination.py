@@ -0,0 +1,129 @@
+"""
+Pagination for cattle listings.
+
+Listing endpoints keep the default page-number contract
+({count, next, previous, results}). Clients can opt in to keyset pagination
+by sending a `cursor` query parameter (empty for the first page). Keyset
+pages skip the COUNT(*) and OFFSET of page-number pagination and return
+{next, results}, where `next` carries an opaque cursor for the following page.
+
+Views that set `use_count_strategy = True` take page-number counts from
+cattle.counts (cached or estimated) and report `count_is_exact`.
+"""
+import base64
+import binascii
+import json
+from functools import partial
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from .counts import get_result_count
+
+
+class CountedPaginator(Paginator):
+    """Paginator that uses a precomputed count instead of COUNT(*)"""
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.count = count
+
+
+class CattleKeysetPagination(PageNumberPagination):
+    """Page-number pagination with opt-in keyset (cursor) pagination"""
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    # Orderings that can be paginated by keyset, with `id` as the tie-breaker
+    keyset_fields = ['price', 'age_months', 'weight_kg', 'created_at', 'view_count']
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset_ordering = None
+        if self.cursor_query_param in request.query_params:
+            self.keyset_ordering = self.get_keyset_ordering(queryset)
+
+        if self.keyset_ordering is None:
+            # Unsupported ordering (e.g. search relevance) keeps page numbers
+            self.count_is_exact = True
+            if getattr(view, 'use_count_strategy', False):
+                count, self.count_is_exact = get_result_count(queryset, request)
+                self.django_paginator_class = partial(CountedPaginator, count=count)
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        field_name = self.keyset_ordering.lstrip('-')
+        descending = self.keyset_ordering.startswith('-')
+        field = queryset.model._meta.get_field(field_name)
+
+        queryset = queryset.order_by(self.keyset_ordering, '-pk' if descending else 'pk')
+
+        encoded = request.query_params[self.cursor_query_param]
+        if encoded:
+            value, pk = self.decode_cursor(encoded, field)
+            lookup = 'lt' if descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{field_name}__{lookup}': value}) |
+                Q(**{field_name: value, f'pk__{lookup}': pk})
+            )
+
+        page_size = self.get_page_size(request)
+        results = list(queryset[:page_size + 1])
+        self.has_next = len(results) > page_size
+        self.page = results[:page_size]
+
+        self.next_cursor = None
+        if self.has_next:
+            last = self.page[-1]
+            self.next_cursor = self.encode_cursor(field.value_to_string(last), last.pk)
+        return self.page
+
+    def get_paginated_response(self, data):
+        if self.keyset_ordering is None:
+            return Response({
+                'count': self.page.paginator.count,
+                'count_is_exact': self.count_is_exact,
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link(),
+                'results': data,
+            })
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if self.keyset_ordering is None:
+            return super().get_next_link()
+        if self.next_cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_keyset_ordering(self, queryset):
+        """Return the single supported ordering of the queryset, or None"""
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        if len(ordering) != 1 or not isinstance(ordering[0], str):
+            return None
+        if ordering[0].lstrip('-') not in self.keyset_fields:
+            return None
+        return ordering[0]
+
+    def encode_cursor(self, value, pk):
+        """Encode the position after a row as an opaque cursor"""
+        payload = json.dumps([self.keyset_ordering, value, pk], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, encoded, field):
+        """Decode a cursor into (value, pk) for the current ordering"""
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            ordering, value, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if ordering != self.keyset_ordering:
+                raise ValueError('Cursor was created for a different ordering')
+            return field.to_python(value), int(pk)
+        except (TypeError, ValueError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
@@ -0,0 +1,221 @@
+"""
+Post-upload processing for cattle images and health documents.
+
+Uploaded files are verified with Pillow (or checked for a PDF header),
+re-encoded without EXIF metadata, downscaled to UPLOAD_MAX_IMAGE_EDGE and
+fingerprinted with SHA-256; cattle images also get their renditions.
+
+With UPLOAD_PROCESSING_MODE = 'sync' this runs inside the upload request.
+With 'async' the upload is stored as PENDING, the endpoint answers 202 and
+the work runs in a local process pool of UPLOAD_PROCESSING_WORKERS
+processes (0 runs it inline after commit, for development and tests).
+Results are written back from the parent process, so workers never touch
+the database.
+
+The same pool generates missing renditions of images found while serving
+reads (schedule_renditions); with 0 workers those are left to
+`manage.py generate_renditions`.
+"""
+import hashlib
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+from .renditions import generate_renditions, renditions_are_current
+
+logger = logging.getLogger(__name__)
+
+IMAGE_FORMATS = {'JPEG', 'PNG', 'WEBP', 'GIF', 'BMP'}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+RENDITIONS_QUEUED_KEY = 'cattle:renditions-queued:{model}:{pk}'
+
+
+class UploadProcessingError(Exception):
+    """Raised when an uploaded file fails verification"""
+
+
+def processing_is_async():
+    return getattr(settings, 'UPLOAD_PROCESSING_MODE', 'sync') == 'async'
+
+
+def sanitize_image(content, max_edge=None):
+    """Verify image bytes and re-encode them without metadata"""
+    try:
+        Image.open(BytesIO(content)).verify()
+        image = Image.open(BytesIO(content))
+        image_format = image.format
+        image = ImageOps.exif_transpose(image)
+    except (OSError, ValueError, SyntaxError, Image.DecompressionBombError) as exc:
+        raise UploadProcessingError(f'Invalid image file: {exc}')
+
+    if image_format not in IMAGE_FORMATS:
+        raise UploadProcessingError(f'Unsupported image format: {image_format}')
+    if max_edge and max(image.size) > max_edge:
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    buffer = BytesIO()
+    options = {'quality': 90, 'optimize': True} if image_format in ('JPEG', 'WEBP') else {}
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def process_upload(kind, name, max_edge):
+    """
+    Verify, sanitize and fingerprint a stored upload.
+
+    Only uses storage, never the database, so it can run in a worker process.
+    Returns the fields to update on the model.
+    """
+    with default_storage.open(name, 'rb') as source:
+        content = source.read()
+
+    result = {}
+    is_pdf = content.startswith(b'%PDF-')
+    if kind == 'document' and is_pdf:
+        sanitized = content
+    else:
+        sanitized = sanitize_image(content, max_edge if kind == 'image' else None)
+        if sanitized != content:
+            default_storage.delete(name)
+            result['name'] = default_storage.save(name, ContentFile(sanitized))
+
+    if kind == 'image':
+        result['renditions'] = generate_renditions(default_storage, result.get('name', name))
+    result['checksum'] = hashlib.sha256(sanitized).hexdigest()
+    return result
+
+
+def init_worker():
+    import django
+    django.setup()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.UPLOAD_PROCESSING_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_worker
+            )
+        return _executor
+
+
+def upload_fields(model):
+    """Return (kind, file field name) for an upload model"""
+    from .models import CattleImage
+    return ('image', 'image') if model is CattleImage else ('document', 'document')
+
+
+def apply_result(model, pk, result=None, error=None):
+    """Store a processing result on an image or document"""
+    from .models import Cattle
+    from .response_cache import bump_generation
+
+    if error is not None:
+        updates = {'processing_status': 'FAILED', 'processing_error': str(error)[:500]}
+    else:
+        updates = {'processing_status': 'READY', 'processing_error': '', 'checksum': result['checksum']}
+        if 'name' in result:
+            updates[upload_fields(model)[1]] = result['name']
+        if 'renditions' in result:
+            updates['renditions'] = result['renditions']
+
+    model.objects.filter(pk=pk).update(**updates)
+    cattle_id = model.objects.filter(pk=pk).values_list('cattle_id', flat=True).first()
+    if cattle_id is not None:
+        Cattle.objects.filter(pk=cattle_id).update(updated_at=timezone.now())
+    bump_generation()
+
+
+def run_processing(instance):
+    """Process an upload inside the current request"""
+    kind, field_name = upload_fields(type(instance))
+    name = getattr(instance, field_name).name
+    try:
+        result = process_upload(kind, name, settings.UPLOAD_MAX_IMAGE_EDGE)
+    except (UploadProcessingError, OSError) as exc:
+        apply_result(type(instance), instance.pk, error=exc)
+    else:
+        apply_result(type(instance), instance.pk, result=result)
+    instance.refresh_from_db()
+
+
+def schedule_processing(instance):
+    """Queue an upload for processing once the current transaction commits"""
+    model, pk = type(instance), instance.pk
+    kind, field_name = upload_fields(model)
+    name = getattr(instance, field_name).name
+
+    def on_done(future):
+        try:
+            apply_result(model, pk, result=future.result())
+        except Exception as exc:
+            logger.warning('Processing %s %s failed: %s', kind, pk, exc)
+            apply_result(model, pk, error=exc)
+        finally:
+            connection.close()
+
+    def submit():
+        if settings.UPLOAD_PROCESSING_WORKERS <= 0:
+            run_processing(model.objects.get(pk=pk))
+            return
+        future = get_executor().submit(process_upload, kind, name, settings.UPLOAD_MAX_IMAGE_EDGE)
+        future.add_done_callback(on_done)
+
+    transaction.on_commit(submit)
+
+
+def render_stored_image(name):
+    """Generate renditions for a stored image in a worker process; None if the file is missing"""
+    if not default_storage.exists(name):
+        return None
+    return generate_renditions(default_storage, name)
+
+
+def schedule_renditions(instance, field_name, renditions_field):
+    """
+    Queue generation of an image's missing or stale renditions and return at once.
+
+    Used while serving reads, which show the original image until the
+    renditions are stored. Each image is queued at most once an hour.
+    """
+    field_file = getattr(instance, field_name)
+    if not field_file or renditions_are_current(field_file, getattr(instance, renditions_field)):
+        return
+    if settings.UPLOAD_PROCESSING_WORKERS <= 0:
+        return
+    model, pk, name = type(instance), instance.pk, field_file.name
+    if not cache.add(RENDITIONS_QUEUED_KEY.format(model=model._meta.label_lower, pk=pk), True, 3600):
+        return
+
+    def on_done(future):
+        from .response_cache import bump_generation
+
+        try:
+            renditions = future.result()
+            # Skip images whose file was replaced while rendering
+            if renditions is not None and model._default_manager.filter(
+                pk=pk, **{field_name: name}
+            ).update(**{renditions_field: renditions}):
+                bump_generation()
+        except Exception as exc:
+            logger.warning('Generating renditions for %s failed: %s', name, exc)
+        finally:
+            connection.close()
+
+    get_executor().submit(render_stored_image, name).add_done_callback(on_done)
@@ -0,0 +1,127 @@
+"""
+Resized WebP/JPEG renditions of uploaded photos.
+
+Each source image gets fixed-size variants (see RENDITION_SIZES) stored
+next to the original under `renditions/`. The generated paths are recorded
+in a JSON field on the owning model:
+
+    {'source': 'cattle_images/2025/01/01/cow.jpg',
+     'sizes': {'thumb': {'width': 160, 'height': 120,
+                         'webp': '.../renditions/cow_thumb.webp',
+                         'jpeg': '.../renditions/cow_thumb.jpg'}, ...}}
+
+Renditions are generated on upload. Images uploaded before the pipeline
+existed are served as originals and queued for the background workers when
+first read (cattle.processing.schedule_renditions), or can be filled in
+with `manage.py generate_renditions`.
+"""
+import logging
+import posixpath
+from io import BytesIO
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels for each rendition
+RENDITION_SIZES = {
+    'thumb': 160,
+    'card': 480,
+    'full': 1280,
+}
+
+RENDITION_FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def renditions_are_current(field_file, renditions):
+    """Check whether stored renditions belong to the current source file"""
+    return bool(field_file) and (renditions or {}).get('source') == field_file.name
+
+
+def rendition_path(source_name, size, extension):
+    directory, filename = posixpath.split(source_name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, 'renditions', f'{stem}_{size}.{extension}')
+
+
+def generate_renditions(storage, name):
+    """
+    Generate all renditions for an image in storage.
+
+    Returns the renditions dict. Sources that cannot be read as images get an
+    empty `sizes` dict so they are not retried on every request.
+    """
+    try:
+        with storage.open(name, 'rb') as source:
+            image = Image.open(source)
+            image = ImageOps.exif_transpose(image)
+            image.load()
+    except (OSError, ValueError, Image.DecompressionBombError) as exc:
+        logger.warning('Cannot generate renditions for %s: %s', name, exc)
+        return {'source': name, 'sizes': {}}
+
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    sizes = {}
+    for size, max_edge in RENDITION_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        variant = {'width': resized.width, 'height': resized.height}
+        for key, (pil_format, extension, options) in RENDITION_FORMATS.items():
+            buffer = BytesIO()
+            resized.save(buffer, pil_format, **options)
+            path = rendition_path(name, size, extension)
+            if storage.exists(path):
+                storage.delete(path)
+            variant[key] = storage.save(path, ContentFile(buffer.getvalue()))
+        sizes[size] = variant
+
+    return {'source': name, 'sizes': sizes}
+
+
+def ensure_renditions(instance, field_name, renditions_field, force=False):
+    """
+    Generate missing or stale renditions for a model instance and store them.
+
+    Images whose source file is missing from storage are skipped.
+    """
+    field_file = getattr(instance, field_name)
+    renditions = getattr(instance, renditions_field)
+    if not field_file or (renditions_are_current(field_file, renditions) and not force):
+        return renditions
+    if not field_file.storage.exists(field_file.name):
+        return renditions
+
+    renditions = generate_renditions(field_file.storage, field_file.name)
+    type(instance)._default_manager.filter(pk=instance.pk).update(**{renditions_field: renditions})
+    setattr(instance, renditions_field, renditions)
+    return renditions
+
+
+def rendition_urls(field_file, renditions, request=None):
+    """
+    Return ({size: {format: url, 'width': w, 'height': h}}, {format: srcset})
+    for serializers. Both are empty when no renditions exist.
+    """
+    if not renditions_are_current(field_file, renditions) or not renditions['sizes']:
+        return {}, {}
+
+    storage = field_file.storage
+
+    def absolute(path):
+        url = storage.url(path)
+        return request.build_absolute_uri(url) if request is not None else url
+
+    urls = {}
+    srcset = {key: [] for key in RENDITION_FORMATS}
+    for size, variant in renditions['sizes'].items():
+        urls[size] = {'width': variant['width'], 'height': variant['height']}
+        for key in RENDITION_FORMATS:
+            url = absolute(variant[key])
+            urls[size][key] = url
+            srcset[key].append(f"{url} {variant['width']}w")
+    return urls, {key: ', '.join(entries) for key, entries in srcset.items()}
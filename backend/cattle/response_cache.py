@@ -0,0 +1,124 @@
+"""
+Response cache for anonymous cattle browse and detail requests.
+
+Cached responses are keyed on the view, the request path, the normalized
+query string and a generation number. Any write to a listing, image or
+health document bumps the generation (see cattle.signals), so earlier
+entries are never served again and simply expire. Writes that bypass model
+signals (queryset.update, bulk_create) must call bump_generation().
+
+The generation has to be shared by every worker, so responses are only
+cached (and list ETags only issued) when the cache alias is shared between
+processes, or when CATTLE_RESPONSE_CACHE_ALLOW_LOCAL allows a per-process
+cache for single-process runs such as runserver and tests. Hit and miss
+counters are kept in the same cache, so response_cache_stats() (and
+`manage.py response_cache_stats`) report every worker.
+"""
+import hashlib
+import json
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework.response import Response
+
+GENERATION_KEY = 'cattle:generation'
+
+STATS_KEY = 'cattle:response-stats:{outcome}'
+
+
+def get_cache():
+    return caches[getattr(settings, 'CATTLE_RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def cache_is_shared():
+    """Whether the generation is visible to every worker"""
+    if getattr(settings, 'CATTLE_RESPONSE_CACHE_ALLOW_LOCAL', False):
+        return True
+    return not isinstance(get_cache(), (LocMemCache, DummyCache))
+
+
+def get_generation():
+    """Return the current listing generation"""
+    cache = get_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Start from the clock so a lost key never revives old entries
+        cache.add(GENERATION_KEY, time.time_ns() // 1000, timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_generation():
+    """Invalidate all cached listing responses and counts"""
+    cache = get_cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        get_generation()
+
+
+def normalized_query(request, ignore=()):
+    """Return the query parameters of a request as a sorted list"""
+    params = []
+    for key in sorted(request.query_params):
+        if key in ignore:
+            continue
+        values = sorted(
+            value.strip() for value in request.query_params.getlist(key) if value.strip()
+        )
+        if values:
+            params.append([key, values])
+    return params
+
+
+def response_cache_key(request, view_name):
+    payload = json.dumps([request.path, normalized_query(request)], separators=(',', ':'))
+    digest = hashlib.sha1(payload.encode()).hexdigest()
+    return f'cattle:response:{get_generation()}:{view_name}:{digest}'
+
+
+def record(outcome):
+    cache = get_cache()
+    key = STATS_KEY.format(outcome=outcome)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, 1, timeout=None)
+
+
+def response_cache_stats():
+    """Return hit/miss counters of all workers sharing the cache"""
+    keys = {outcome: STATS_KEY.format(outcome=outcome) for outcome in ('hits', 'misses')}
+    values = get_cache().get_many(keys.values())
+    return {outcome: values.get(key, 0) for outcome, key in keys.items()}
+
+
+def cached_anonymous_response(request, view_name, get_response, on_hit=None):
+    """
+    Return a cached response for anonymous GET requests, or build and cache one.
+
+    `on_hit` runs for cache hits, for side effects such as view counting.
+    """
+    timeout = getattr(settings, 'CATTLE_RESPONSE_CACHE_TIMEOUT', 300)
+    if not timeout or not cache_is_shared() or request.method != 'GET' or request.user.is_authenticated:
+        return get_response()
+
+    cache = get_cache()
+    key = response_cache_key(request, view_name)
+    data = cache.get(key)
+    if data is not None:
+        record('hits')
+        if on_hit is not None:
+            on_hit()
+        return Response(data, headers={'X-Cache': 'HIT'})
+
+    record('misses')
+    response = get_response()
+    if response.status_code == 200:
+        cache.set(key, response.data, timeout)
+    response['X-Cache'] = 'MISS'
+    return response
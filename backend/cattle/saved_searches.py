@@ -0,0 +1,162 @@
+"""
+Saved searches and incremental matching of new listings.
+
+A saved search stores browse filter parameters (the CattleFilter fields
+that can be checked against a listing row: breed, gender, region, price,
+age, weight, health and vaccination status). Its breed, region and price
+range are copied into indexed columns, with prices grouped into
+logarithmic bands (PRICE_BAND_RATIO apart).
+
+When a listing is created or reactivated, only saved searches whose breed
+and region are the listing's (or blank) and whose band range contains the
+listing's price band are loaded; their remaining parameters are checked
+in Python and matches are written to SavedSearchMatch, the user's inbox.
+
+Each user's inbox has a version number in the cache, bumped whenever
+matches are added, read or removed, so polling clients get an ETag and a
+304 without touching the database.
+"""
+import math
+import time
+from collections import defaultdict
+from django.core.exceptions import ValidationError
+from .filters import CattleFilter
+from .models import Cattle, SavedSearch, SavedSearchMatch
+from .response_cache import get_cache
+
+# Filters of CattleFilter.Meta.fields; declared filters (document flags,
+# distance) depend on related rows or request input and are not supported
+MATCHABLE_FILTERS = [name for name in CattleFilter.base_filters if name not in CattleFilter.declared_filters]
+
+PRICE_BAND_RATIO = 1.25
+MAX_PRICE_BAND = 1000
+
+INBOX_VERSION_KEY = 'cattle:inbox:{user_id}'
+
+
+def price_band(price):
+    """Return the logarithmic band number of a price"""
+    return min(int(math.log(max(float(price), 1.0)) / math.log(PRICE_BAND_RATIO)), MAX_PRICE_BAND)
+
+
+def clean_params(params):
+    """
+    Validate saved search parameters with CattleFilter.
+
+    Returns (cleaned params, errors); cleaned values are converted to the
+    listing field's type (so 12.5 is rejected for age_months) and stored
+    as strings.
+    """
+    if not isinstance(params, dict):
+        return None, {'params': ['Expected an object of filter parameters.']}
+    unknown = sorted(set(params) - set(MATCHABLE_FILTERS))
+    if unknown:
+        return None, {name: [f'Choose from: {", ".join(MATCHABLE_FILTERS)}'] for name in unknown}
+
+    filterset = CattleFilter(data={name: str(value) for name, value in params.items()}, queryset=Cattle.objects.none())
+    if not filterset.is_valid():
+        return None, filterset.errors
+    cleaned, errors = {}, {}
+    for name, value in filterset.form.cleaned_data.items():
+        if name not in params or value in (None, ''):
+            continue
+        field = Cattle._meta.get_field(name.partition('__')[0])
+        try:
+            cleaned[name] = str(field.to_python(str(value)))
+        except ValidationError as exc:
+            errors[name] = exc.messages
+    if errors:
+        return None, errors
+    return cleaned, None
+
+
+def index_columns(params):
+    """Return the match index column values for saved search parameters"""
+    low = params.get('price__gte')
+    high = params.get('price__lte')
+    return {
+        'breed': params.get('breed', ''),
+        'region': params.get('region', ''),
+        'price_band_low': price_band(low) if low else 0,
+        'price_band_high': price_band(high) if high else MAX_PRICE_BAND,
+    }
+
+
+def params_match(params, cattle):
+    """Check a listing against saved search parameters"""
+    for name, value in params.items():
+        field_name, _, lookup = name.partition('__')
+        field = Cattle._meta.get_field(field_name)
+        actual = getattr(cattle, field_name)
+        if actual is None:
+            return False
+        # Unsaved-state attributes may still be strings (e.g. objects.create(price='5000'))
+        try:
+            actual, expected = field.to_python(actual), field.to_python(value)
+        except ValidationError:
+            # A stored search that no longer fits the field must never fail a listing write
+            return False
+        if lookup == 'gte' and not actual >= expected:
+            return False
+        if lookup == 'lte' and not actual <= expected:
+            return False
+        if lookup in ('', 'exact') and actual != expected:
+            return False
+    return True
+
+
+def candidate_searches(breed, region, low_band, high_band):
+    """Active saved searches that could match listings in a breed, region and band range"""
+    return SavedSearch.objects.filter(
+        is_active=True,
+        breed__in=[breed, ''],
+        region__in=[region, ''],
+        price_band_low__lte=high_band,
+        price_band_high__gte=low_band,
+    ).only('pk', 'user_id', 'params')
+
+
+def match_listings(listings):
+    """
+    Record inbox matches for newly listed (created or reactivated) listings.
+
+    Runs one candidate query per breed and region in the batch. Sellers are
+    not notified about their own listings. Returns the number of new matches.
+    """
+    groups = defaultdict(list)
+    for cattle in listings:
+        if cattle.is_active and not cattle.is_sold:
+            groups[(cattle.breed, cattle.region)].append(cattle)
+
+    matches = []
+    for (breed, region), group in groups.items():
+        bands = [price_band(cattle.price) for cattle in group]
+        for search in candidate_searches(breed, region, min(bands), max(bands)):
+            for cattle in group:
+                if cattle.seller_id != search.user_id and params_match(search.params, cattle):
+                    matches.append(SavedSearchMatch(saved_search=search, user_id=search.user_id, cattle=cattle))
+
+    if matches:
+        SavedSearchMatch.objects.bulk_create(matches, ignore_conflicts=True)
+        for user_id in {match.user_id for match in matches}:
+            bump_inbox_version(user_id)
+    return len(matches)
+
+
+def get_inbox_version(user_id):
+    cache = get_cache()
+    key = INBOX_VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock so a lost key never repeats an old ETag
+        cache.add(key, time.time_ns() // 1000, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_inbox_version(user_id):
+    cache = get_cache()
+    try:
+        cache.incr(INBOX_VERSION_KEY.format(user_id=user_id))
+    except ValueError:
+        get_inbox_version(user_id)
@@ -0,0 +1,72 @@
+"""
+Search backends for cattle listings.
+
+With CATTLE_SEARCH_BACKEND = 'postgres' on a PostgreSQL database, searches run
+against the weighted `search_vector` column added by migration 0002 (title >
+city > description, GIN indexed) and results are ranked by relevance.
+Otherwise the default DRF `icontains` search over `search_fields` is used.
+"""
+from django.conf import settings
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+from .geo import DISTANCE_ANNOTATION
+
+SEARCH_CONFIG = 'english'
+SEARCH_RANK_ANNOTATION = 'search_rank'
+
+
+def full_text_search_enabled():
+    """Return True if listings should be searched with PostgreSQL full-text search"""
+    backend = getattr(settings, 'CATTLE_SEARCH_BACKEND', 'basic')
+    return backend == 'postgres' and connection.vendor == 'postgresql'
+
+
+class CattleSearchFilter(filters.SearchFilter):
+    """
+    Search filter that uses the full-text search vector when enabled and
+    falls back to the standard DRF search otherwise.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if not full_text_search_enabled():
+            return super().filter_queryset(request, queryset, view)
+
+        terms = ' '.join(self.get_search_terms(request))
+        if not terms:
+            return queryset
+
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+
+        query = SearchQuery(terms, config=SEARCH_CONFIG, search_type='websearch')
+        search_vector = RawSQL(
+            f'{queryset.model._meta.db_table}.search_vector',
+            (),
+            output_field=SearchVectorField()
+        )
+        return queryset.alias(search_vector=search_vector).filter(
+            search_vector=query
+        ).annotate(**{
+            SEARCH_RANK_ANNOTATION: SearchRank(search_vector, query)
+        }).order_by(f'-{SEARCH_RANK_ANNOTATION}', '-created_at')
+
+
+class CattleOrderingFilter(filters.OrderingFilter):
+    """Ordering filter that keeps relevance ordering for ranked searches"""
+
+    def filter_queryset(self, request, queryset, view):
+        ranked = SEARCH_RANK_ANNOTATION in queryset.query.annotations
+        if ranked and not request.query_params.get(self.ordering_param):
+            return queryset
+        # Distance searches default to nearest first
+        near = DISTANCE_ANNOTATION in queryset.query.annotations
+        if near and not request.query_params.get(self.ordering_param):
+            return queryset.order_by(DISTANCE_ANNOTATION, 'id')
+        return super().filter_queryset(request, queryset, view)
+    
+    def remove_invalid_fields(self, queryset, fields, view, request):
+        valid_fields = super().remove_invalid_fields(queryset, fields, view, request)
+        # `distance_km` only exists for `near` searches
+        if DISTANCE_ANNOTATION not in queryset.query.annotations:
+            valid_fields = [field for field in valid_fields if field.lstrip('-') != DISTANCE_ANNOTATION]
+        return valid_fields
@@ -0,0 +1,67 @@
+"""
+Dashboard statistics for a seller's listings.
+
+All figures come from one aggregate query over the seller's listings and
+are cached per seller for SELLER_STATS_CACHE_TIMEOUT seconds. Saving or
+deleting one of the seller's listings drops the entry (see cattle.signals);
+writes that bypass model signals call invalidate_seller_stats() directly.
+View counts are flushed in the background (cattle.view_counter), so they
+may lag by up to the cache timeout.
+"""
+from decimal import Decimal
+from django.conf import settings
+from django.db.models import Avg, Count, F, Q, Sum
+from .models import Cattle
+from .response_cache import get_cache
+
+SELLER_STATS_KEY = 'cattle:seller-stats:{seller_id}'
+
+LIVE = Q(is_active=True, is_sold=False)
+SOLD = Q(is_sold=True)
+INACTIVE = Q(is_active=False, is_sold=False)
+
+CENTS = Decimal('0.01')
+
+
+def compute_seller_stats(seller_id):
+    """Aggregate a seller's listings in a single query"""
+    totals = Cattle.objects.filter(seller_id=seller_id).aggregate(
+        total_listings=Count('pk'),
+        active_listings=Count('pk', filter=LIVE),
+        sold_listings=Count('pk', filter=SOLD),
+        inactive_listings=Count('pk', filter=INACTIVE),
+        total_views=Sum('view_count'),
+        average_views=Avg('view_count'),
+        active_value=Sum('price', filter=LIVE),
+        sold_value=Sum('price', filter=SOLD),
+        average_price=Avg('price'),
+        average_time_to_sale=Avg(F('sold_date') - F('created_at'), filter=SOLD & Q(sold_date__isnull=False)),
+    )
+
+    time_to_sale = totals.pop('average_time_to_sale')
+    average_views = totals.pop('average_views')
+    stats = {
+        **totals,
+        'total_views': totals['total_views'] or 0,
+        'average_views_per_listing': round(average_views, 1) if average_views is not None else 0,
+        'average_days_to_sale': round(time_to_sale.total_seconds() / 86400, 1) if time_to_sale else None,
+    }
+    for name in ('active_value', 'sold_value', 'average_price'):
+        value = stats[name]
+        stats[name] = str(Decimal(value).quantize(CENTS)) if value is not None else '0.00'
+    return stats
+
+
+def get_seller_stats(seller_id):
+    """Return cached dashboard statistics for a seller"""
+    cache = get_cache()
+    key = SELLER_STATS_KEY.format(seller_id=seller_id)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_seller_stats(seller_id)
+        cache.set(key, stats, getattr(settings, 'SELLER_STATS_CACHE_TIMEOUT', 300))
+    return stats
+
+
+def invalidate_seller_stats(*seller_ids):
+    get_cache().delete_many([SELLER_STATS_KEY.format(seller_id=seller_id) for seller_id in seller_ids])
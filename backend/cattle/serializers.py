@@ -1,5 +1,12 @@
+from django.core.validators import validate_image_file_extension
+from django.utils import timezone
+from django.utils.functional import cached_property
 from rest_framework import serializers
-from .models import Cattle, CattleImage, HealthDocument
+from .geo import DISTANCE_ANNOTATION
+from .models import Cattle, CattleImage, HealthDocument, MarketPriceStat, SavedSearch, SavedSearchMatch
+from .processing import schedule_renditions
+from .renditions import rendition_urls
+from .saved_searches import clean_params
 from users.serializers import UserListSerializer
 
 
@@ -13,14 +20,27 @@ class CattleImageSerializer(serializers.ModelSerializer):
             'image',
             'caption',
             'is_primary',
+            'processing_status',
             'uploaded_at',
         ]
-        read_only_fields = ['id', 'uploaded_at']
+        read_only_fields = ['id', 'processing_status', 'uploaded_at']
+    
+    def to_representation(self, instance):
+        """Add resized renditions and srcset strings for the image (empty until they exist)"""
+        data = super().to_representation(instance)
+        if instance.processing_status == 'READY':
+            schedule_renditions(instance, 'image', 'renditions')
+        data['renditions'], data['srcset'] = rendition_urls(
+            instance.image,
+            instance.renditions,
+            self.context.get('request')
+        )
+        return data
 
 
 class HealthDocumentSerializer(serializers.ModelSerializer):
     """Serializer for health documents"""
-    is_expired = serializers.BooleanField(source='is_expired', read_only=True)
+    is_expired = serializers.SerializerMethodField()
     
     class Meta:
         model = HealthDocument
@@ -33,9 +53,18 @@ class HealthDocumentSerializer(serializers.ModelSerializer):
             'expiry_date',
             'is_expired',
             'notes',
+            'processing_status',
             'uploaded_at',
         ]
-        read_only_fields = ['id', 'uploaded_at']
+        read_only_fields = ['id', 'processing_status', 'uploaded_at']
+    
+    @cached_property
+    def today(self):
+        """Current date, computed once per response"""
+        return timezone.now().date()
+    
+    def get_is_expired(self, obj):
+        return obj.is_expired(today=self.today)
 
 
 class CattleListSerializer(serializers.ModelSerializer):
@@ -43,6 +72,9 @@ class CattleListSerializer(serializers.ModelSerializer):
     seller = UserListSerializer(read_only=True)
     primary_image = CattleImageSerializer(read_only=True)
     age_display = serializers.CharField(source='get_age_display', read_only=True)
+    has_health_certificate = serializers.BooleanField(read_only=True)
+    has_vaccination_record = serializers.BooleanField(read_only=True)
+    distance_km = serializers.SerializerMethodField()
     
     class Meta:
         model = Cattle
@@ -58,8 +90,14 @@ class CattleListSerializer(serializers.ModelSerializer):
             'is_negotiable',
             'health_status',
             'vaccination_status',
+            'has_health_certificate',
+            'has_vaccination_record',
             'region',
             'city',
+            'latitude',
+            'longitude',
+            'location_is_approximate',
+            'distance_km',
             'seller',
             'primary_image',
             'is_active',
@@ -73,6 +111,11 @@ class CattleListSerializer(serializers.ModelSerializer):
             'view_count',
             'created_at',
         ]
+    
+    def get_distance_km(self, obj):
+        """Distance from the `near` point, when searching by distance"""
+        distance = getattr(obj, DISTANCE_ANNOTATION, None)
+        return round(distance, 2) if distance is not None else None
 
 
 class CattleDetailSerializer(serializers.ModelSerializer):
@@ -105,6 +148,9 @@ class CattleDetailSerializer(serializers.ModelSerializer):
             'region',
             'city',
             'location_details',
+            'latitude',
+            'longitude',
+            'location_is_approximate',
             'seller',
             'images',
             'health_documents',
@@ -147,6 +193,8 @@ class CattleCreateUpdateSerializer(serializers.ModelSerializer):
             'region',
             'city',
             'location_details',
+            'latitude',
+            'longitude',
             'is_active',
         ]
     
@@ -158,6 +206,15 @@ class CattleCreateUpdateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 "Only sellers can create cattle listings."
             )
+        
+        # Coordinates come in pairs; clearing them falls back to the city/region centroid
+        if 'latitude' in attrs or 'longitude' in attrs:
+            latitude, longitude = attrs.get('latitude'), attrs.get('longitude')
+            if (latitude is None) != (longitude is None):
+                raise serializers.ValidationError(
+                    "Provide both latitude and longitude, or neither."
+                )
+            attrs['location_is_approximate'] = latitude is None
         return attrs
     
     def create(self, validated_data):
@@ -179,6 +236,11 @@ class CattleImageUploadSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class CattleImageDeferredUploadSerializer(CattleImageUploadSerializer):
+    """Image upload that defers decoding and verification to cattle.processing"""
+    image = serializers.FileField(validators=[validate_image_file_extension])
+
+
 class HealthDocumentUploadSerializer(serializers.ModelSerializer):
     """Serializer for uploading health documents"""
     
@@ -197,3 +259,79 @@ class HealthDocumentUploadSerializer(serializers.ModelSerializer):
         """Create document with cattle from context"""
         validated_data['cattle'] = self.context['cattle']
         return super().create(validated_data)
+
+
+class MarketPriceStatSerializer(serializers.ModelSerializer):
+    """Serializer for market price index buckets"""
+    breed_display = serializers.CharField(source='get_breed_display', read_only=True)
+    
+    class Meta:
+        model = MarketPriceStat
+        fields = [
+            'kind',
+            'breed',
+            'breed_display',
+            'region',
+            'gender',
+            'month',
+            'listing_count',
+            'price_mean',
+            'price_min',
+            'price_p25',
+            'price_median',
+            'price_p75',
+            'price_max',
+            'price_per_kg_mean',
+            'price_per_kg_p25',
+            'price_per_kg_median',
+            'price_per_kg_p75',
+            'updated_at',
+        ]
+
+
+class SavedSearchSerializer(serializers.ModelSerializer):
+    """Serializer for a user's saved searches"""
+    
+    class Meta:
+        model = SavedSearch
+        fields = [
+            'id',
+            'name',
+            'params',
+            'is_active',
+            'created_at',
+            'updated_at',
+        ]
+        read_only_fields = [
+            'id',
+            'created_at',
+            'updated_at',
+        ]
+    
+    def validate_params(self, value):
+        """Accept only browse filters that can be matched against new listings"""
+        params, errors = clean_params(value)
+        if errors:
+            raise serializers.ValidationError(errors)
+        return params
+    
+    def create(self, validated_data):
+        validated_data['user'] = self.context['request'].user
+        return super().create(validated_data)
+
+
+class SavedSearchMatchSerializer(serializers.ModelSerializer):
+    """Serializer for saved search inbox entries"""
+    saved_search_name = serializers.CharField(source='saved_search.name', read_only=True)
+    cattle = CattleListSerializer(read_only=True)
+    
+    class Meta:
+        model = SavedSearchMatch
+        fields = [
+            'id',
+            'saved_search',
+            'saved_search_name',
+            'cattle',
+            'is_read',
+            'created_at',
+        ]
@@ -0,0 +1,100 @@
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Cattle, CattleImage, HealthDocument, SavedSearchMatch
+from .market import affected_buckets, refresh_buckets, refresh_for_listing
+from .renditions import ensure_renditions
+from .saved_searches import bump_inbox_version, match_listings
+from .seller_stats import invalidate_seller_stats
+from .similarity import similarity_index
+from .response_cache import bump_generation
+
+# User fields serialized with listings (users.serializers.UserListSerializer)
+LISTED_SELLER_FIELDS = frozenset({
+    'first_name', 'last_name', 'email', 'phone_number', 'region', 'city', 'business_name',
+    'is_verified_seller', 'profile_picture', 'profile_picture_renditions',
+})
+
+
+@receiver(post_save, sender=CattleImage)
+def create_image_renditions(sender, instance, **kwargs):
+    """Generate resized renditions for new or replaced images"""
+    # Uploads through the API get renditions from cattle.processing
+    if instance.processing_status == 'READY':
+        ensure_renditions(instance, 'image', 'renditions')
+
+
+@receiver(post_save, sender=Cattle)
+@receiver(post_delete, sender=Cattle)
+@receiver(post_save, sender=CattleImage)
+@receiver(post_delete, sender=CattleImage)
+@receiver(post_save, sender=HealthDocument)
+@receiver(post_delete, sender=HealthDocument)
+def invalidate_listing_cache(sender, **kwargs):
+    """Invalidate cached listing responses when listing data changes"""
+    bump_generation()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_seller_listing_cache(sender, instance, created, update_fields=None, **kwargs):
+    """Invalidate cached listing responses when seller details shown on listings change"""
+    # New accounts have no listings, and buyers never appear on them
+    if created or instance.user_type != 'SELLER':
+        return
+    # e.g. last_login, lockouts and password changes
+    if update_fields is not None and not LISTED_SELLER_FIELDS.intersection(update_fields):
+        return
+    bump_generation()
+
+
+@receiver(post_save, sender=CattleImage)
+@receiver(post_delete, sender=CattleImage)
+@receiver(post_save, sender=HealthDocument)
+@receiver(post_delete, sender=HealthDocument)
+def touch_listing(sender, instance, **kwargs):
+    """Bump the listing's updated_at so detail ETags change with its images and documents"""
+    Cattle.objects.filter(pk=instance.cattle_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Cattle)
+def refresh_market_stats(sender, instance, update_fields=None, **kwargs):
+    """Refresh the market price buckets of a created, edited or sold listing"""
+    refresh_for_listing(instance, update_fields)
+
+
+@receiver(post_delete, sender=Cattle)
+def remove_from_market_stats(sender, instance, **kwargs):
+    refresh_buckets(affected_buckets(instance))
+
+
+@receiver(post_save, sender=Cattle)
+@receiver(post_delete, sender=Cattle)
+def invalidate_dashboard_stats(sender, instance, **kwargs):
+    """Drop the seller's cached dashboard statistics"""
+    invalidate_seller_stats(instance.seller_id)
+
+
+@receiver(post_save, sender=Cattle)
+def update_similarity_index(sender, instance, **kwargs):
+    similarity_index.update(instance)
+
+
+@receiver(post_delete, sender=Cattle)
+def remove_from_similarity_index(sender, instance, **kwargs):
+    similarity_index.remove(instance.pk)
+
+
+@receiver(post_save, sender=Cattle)
+def match_saved_searches(sender, instance, created, **kwargs):
+    """Notify saved searches about new and reactivated listings"""
+    listed = instance.is_active and not instance.is_sold
+    # _was_listed is set by Cattle.from_db; listings loaded without the flags are skipped
+    if listed and (created or getattr(instance, '_was_listed', True) is False):
+        match_listings([instance])
+    instance._was_listed = listed
+
+
+@receiver(post_delete, sender=SavedSearchMatch)
+def invalidate_inbox(sender, instance, **kwargs):
+    bump_inbox_version(instance.user_id)
@@ -0,0 +1,287 @@
+"""
+In-memory similarity index for "similar listings".
+
+Every active, unsold listing is a feature vector of
+
+- age_months, log(weight_kg) and log(price), standardized with the mean and
+  standard deviation of the indexed listings
+- health_status as an ordinal between 0 (poor) and 1 (excellent)
+- one-hot breed, gender and region
+
+and similarity is the weighted Euclidean distance between vectors (see
+FEATURE_WEIGHTS). The continuous features live in a float32 NumPy matrix
+with their squared norms cached, so that part of the distance is one
+matrix-vector product (|x - v|^2 = |x|^2 - 2 x.v + |v|^2). One-hot columns
+are stored as int8 category codes instead: two one-hot vectors with weight
+w differ by exactly 0 or 2 * w^2, so comparing codes gives the same
+distance while reading a fraction of the memory. Top-k is np.argpartition.
+
+Each process keeps its own index. It is built on first use, kept current
+by the Cattle signals for writes made in this process (rows are updated in
+place, appended or masked out) and rebuilt from the database once it is
+older than SIMILARITY_INDEX_MAX_AGE seconds, which picks up writes made by
+other processes. Only one build runs at a time: the first build (and one
+after mark_stale()) happens in the request that needs it while concurrent
+requests wait for it, and an expired index keeps serving while a
+background thread rebuilds it. Writes made during a rebuild are replayed
+onto the new index.
+"""
+import logging
+import math
+import threading
+import time
+import numpy as np
+from django.conf import settings
+from django.db import connections
+from .models import Cattle
+
+logger = logging.getLogger(__name__)
+
+# Continuous columns, in matrix order; the first STANDARDIZED are standardized
+CONTINUOUS_FEATURES = ['age_months', 'weight_kg', 'price', 'health_status']
+STANDARDIZED = 3
+
+# Categorical features stored as codes
+CATEGORIES = {
+    'breed': {value: code for code, (value, _) in enumerate(Cattle.BREED_CHOICES)},
+    'gender': {value: code for code, (value, _) in enumerate(Cattle.GENDER_CHOICES)},
+    'region': {value: code for code, (value, _) in enumerate(Cattle._meta.get_field('region').choices)},
+}
+
+HEALTH_SCORES = {'POOR': 0.0, 'FAIR': 1 / 3, 'GOOD': 2 / 3, 'EXCELLENT': 1.0}
+
+FEATURE_WEIGHTS = {
+    'numeric': 1.0,
+    'health': 0.5,
+    'breed': 1.5,
+    'gender': 1.0,
+    'region': 0.75,
+}
+
+# Squared distance added when a one-hot feature differs
+MISMATCH_PENALTIES = {name: 2 * FEATURE_WEIGHTS[name] ** 2 for name in CATEGORIES}
+
+INDEX_FIELDS = ['id', 'age_months', 'weight_kg', 'price', 'health_status', 'breed', 'gender', 'region']
+
+
+def raw_features(rows):
+    """
+    Convert (age_months, weight_kg, price, health_status, breed, gender, region)
+    rows into unscaled continuous features and category codes.
+    """
+    continuous = np.zeros((len(rows), len(CONTINUOUS_FEATURES)), dtype=np.float32)
+    codes = np.full((len(CATEGORIES), len(rows)), -1, dtype=np.int8)
+    for row_number, (age, weight, price, health, *categories) in enumerate(rows):
+        continuous[row_number] = (
+            age,
+            math.log1p(float(weight)),
+            math.log1p(float(price)),
+            HEALTH_SCORES.get(health, 2 / 3) * FEATURE_WEIGHTS['health'],
+        )
+        for position, (name, value) in enumerate(zip(CATEGORIES, categories)):
+            codes[position, row_number] = CATEGORIES[name].get(value, -1)
+    return continuous, codes
+
+
+def listing_row(cattle):
+    return tuple(getattr(cattle, field) for field in INDEX_FIELDS[1:])
+
+
+def is_indexed(cattle):
+    """Return True if a listing belongs in the index"""
+    return cattle.is_active and not cattle.is_sold
+
+
+class SimilarityIndex:
+    """Top-k nearest listings over NumPy feature arrays"""
+
+    def __init__(self, max_age=None):
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.build_lock = threading.Lock()
+        self.pending = None
+        self.clear()
+
+    def clear(self):
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.matrix = np.zeros((0, len(CONTINUOUS_FEATURES)), dtype=np.float32)
+        self.norms = np.zeros(0, dtype=np.float32)
+        self.codes = np.zeros((len(CATEGORIES), 0), dtype=np.int8)
+        self.active = np.zeros(0, dtype=bool)
+        self.size = 0
+        self.positions = {}
+        self.mean = np.zeros(STANDARDIZED, dtype=np.float32)
+        self.scale = np.ones(STANDARDIZED, dtype=np.float32)
+        self.built_at = None
+
+    def get_max_age(self):
+        if self.max_age is not None:
+            return self.max_age
+        return getattr(settings, 'SIMILARITY_INDEX_MAX_AGE', 300)
+
+    @property
+    def is_built(self):
+        return self.built_at is not None
+
+    def is_stale(self):
+        return not self.is_built or time.monotonic() - self.built_at > self.get_max_age()
+
+    def ensure_current(self):
+        if not self.is_built:
+            with self.build_lock:
+                # Another request may have built it while this one waited
+                if not self.is_built:
+                    self.rebuild()
+        elif self.is_stale() and self.build_lock.acquire(blocking=False):
+            threading.Thread(target=self.rebuild_in_background, name='similarity-index', daemon=True).start()
+
+    def rebuild(self):
+        """Build the index, replaying writes made meanwhile; the caller holds build_lock"""
+        with self.lock:
+            self.pending = []
+        try:
+            self.build()
+        finally:
+            with self.lock:
+                pending, self.pending = self.pending, None
+        for write in pending:
+            # Listings for saves, ids for deletes
+            if isinstance(write, Cattle):
+                self.update(write)
+            else:
+                self.remove(write)
+
+    def rebuild_in_background(self):
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception('Rebuilding the similarity index failed')
+        finally:
+            self.build_lock.release()
+            connections.close_all()
+
+    def mark_stale(self):
+        """Rebuild on next use (e.g. after bulk_create, which skips signals)"""
+        self.built_at = None
+
+    def scaled(self, continuous):
+        """Standardize the numeric columns of raw continuous features in place"""
+        continuous[:, :STANDARDIZED] -= self.mean
+        continuous[:, :STANDARDIZED] /= self.scale
+        return continuous
+
+    def build(self):
+        """Rebuild the index from all active, unsold listings"""
+        rows = Cattle.objects.filter(is_active=True, is_sold=False).values_list(*INDEX_FIELDS)
+        ids, features = [], []
+        for row in rows.iterator(chunk_size=5000):
+            ids.append(row[0])
+            features.append(row[1:])
+        self.load(np.array(ids, dtype=np.int64), *raw_features(features))
+
+    def load(self, ids, continuous, codes):
+        """Replace the index contents with unscaled features and category codes"""
+        if len(ids):
+            mean = continuous[:, :STANDARDIZED].mean(axis=0)
+            scale = continuous[:, :STANDARDIZED].std(axis=0)
+        else:
+            mean, scale = np.zeros(STANDARDIZED), np.ones(STANDARDIZED)
+        scale = np.where(scale > 0, scale, 1.0) / FEATURE_WEIGHTS['numeric']
+
+        with self.lock:
+            self.mean = mean.astype(np.float32)
+            self.scale = scale.astype(np.float32)
+            self.ids = ids
+            self.matrix = self.scaled(continuous)
+            self.norms = np.einsum('ij,ij->i', self.matrix, self.matrix)
+            self.codes = codes
+            self.active = np.ones(len(ids), dtype=bool)
+            self.size = len(ids)
+            self.positions = {int(cattle_id): position for position, cattle_id in enumerate(ids)}
+            self.built_at = time.monotonic()
+
+    def features(self, cattle):
+        """Return the (continuous vector, category codes) of a listing"""
+        continuous, codes = raw_features([listing_row(cattle)])
+        return self.scaled(continuous)[0], codes[:, 0]
+
+    def update(self, cattle):
+        """Add, replace or remove one listing after a save"""
+        if not is_indexed(cattle):
+            self.remove(cattle.pk)
+            return
+        with self.lock:
+            if self.pending is not None:
+                self.pending.append(cattle)
+        if not self.is_built:
+            return
+
+        vector, codes = self.features(cattle)
+        with self.lock:
+            position = self.positions.get(cattle.pk)
+            if position is None:
+                if self.size == len(self.ids):
+                    self.grow()
+                position = self.size
+                self.size += 1
+                self.ids[position] = cattle.pk
+                self.positions[cattle.pk] = position
+            self.matrix[position] = vector
+            self.norms[position] = vector @ vector
+            self.codes[:, position] = codes
+            self.active[position] = True
+
+    def grow(self):
+        capacity = max(16, len(self.ids) * 2)
+        self.ids = np.resize(self.ids, capacity)
+        self.norms = np.resize(self.norms, capacity)
+        self.active = np.resize(self.active, capacity)
+        self.active[self.size:] = False
+        matrix = np.zeros((capacity, len(CONTINUOUS_FEATURES)), dtype=np.float32)
+        matrix[:self.size] = self.matrix[:self.size]
+        self.matrix = matrix
+        codes = np.full((len(CATEGORIES), capacity), -1, dtype=np.int8)
+        codes[:, :self.size] = self.codes[:, :self.size]
+        self.codes = codes
+
+    def remove(self, cattle_id):
+        with self.lock:
+            if self.pending is not None:
+                self.pending.append(cattle_id)
+            position = self.positions.pop(cattle_id, None)
+            if position is not None:
+                self.active[position] = False
+
+    def nearest(self, vector, codes, k=8, exclude=None):
+        """Return up to k (cattle_id, distance) pairs closest to a listing's features"""
+        with self.lock:
+            size = self.size
+            distances = self.matrix[:size] @ vector
+            distances *= -2
+            distances += self.norms[:size]
+            distances += vector @ vector
+            for position, name in enumerate(CATEGORIES):
+                mismatched = self.codes[position, :size] != codes[position]
+                distances += mismatched * np.float32(MISMATCH_PENALTIES[name])
+            distances[~self.active[:size]] = np.inf
+            excluded = self.positions.get(exclude) if exclude is not None else None
+            if excluded is not None:
+                distances[excluded] = np.inf
+
+            candidates = min(k, size)
+            if candidates == 0:
+                return []
+            top = np.argpartition(distances, candidates - 1)[:candidates]
+            top = top[np.argsort(distances[top], kind='stable')]
+            return [
+                (int(self.ids[position]), float(np.sqrt(max(distances[position], 0.0))))
+                for position in top if np.isfinite(distances[position])
+            ]
+
+    def similar_to(self, cattle, k=8):
+        """Return up to k listings most similar to a listing, nearest first"""
+        self.ensure_current()
+        return self.nearest(*self.features(cattle), k=k, exclude=cattle.pk)
+
+
+similarity_index = SimilarityIndex()
@@ -1,3 +1,1620 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import math
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
+import numpy as np
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from config.instrumentation import QueryBudgetExceeded
+from users.models import User
+from . import processing
+from .geo import covering_geohashes, encode_geohash
+from .management.commands import benchmark_api
+from .bulk_import import import_listings
+from .models import Cattle, CattleImage, HealthDocument, MarketPriceStat, SavedSearch, SavedSearchMatch
+from .response_cache import response_cache_stats
+from .saved_searches import price_band
+from .similarity import raw_features, similarity_index
+from .view_counter import view_count_buffer
+from .views import CattleDetailView, CattleListCreateView
 
-# Create your tests here.
+
+def create_seller(email='seller@example.com', phone_number='+233201234567'):
+    """Create a seller account for tests"""
+    return User.objects.create_user(
+        email=email,
+        password='StrongPass123!',
+        first_name='Kofi',
+        last_name='Mensah',
+        phone_number=phone_number,
+        user_type='SELLER',
+    )
+
+
+def create_cattle(seller, images=2, **kwargs):
+    """Create a cattle listing with a few images"""
+    fields = {
+        'title': 'Healthy Zebu bull',
+        'description': 'Well fed and vaccinated',
+        'breed': 'ZEBU',
+        'gender': 'MALE',
+        'age_months': 24,
+        'weight_kg': '350.00',
+        'price': '5000.00',
+        'region': 'NORTHERN',
+        'city': 'Tamale',
+    }
+    fields.update(kwargs)
+    cattle = Cattle.objects.create(seller=seller, **fields)
+    for index in range(images):
+        CattleImage.objects.create(
+            cattle=cattle,
+            image=f'cattle_images/test_{cattle.pk}_{index}.jpg',
+            is_primary=(index == images - 1),
+        )
+    return cattle
+
+
+def make_image_file(name='photo.jpg', size=(2000, 1500)):
+    """Create an in-memory JPEG upload"""
+    buffer = BytesIO()
+    Image.new('RGB', size, color=(120, 80, 40)).save(buffer, 'JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class PrimaryImagePrefetchTests(APITestCase):
+    """Primary image resolution on list endpoints"""
+
+    def setUp(self):
+        self.seller = create_seller()
+
+    def count_list_queries(self, url):
+        # Measure the uncached path
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_primary_image_uses_prefetch(self):
+        cattle = create_cattle(self.seller, images=3)
+        primary = cattle.images.get(is_primary=True)
+
+        listing = Cattle.objects.with_primary_image().get(pk=cattle.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(listing.primary_image, primary)
+
+    def test_primary_image_falls_back_to_first_image(self):
+        cattle = create_cattle(self.seller, images=0)
+        first = CattleImage.objects.create(cattle=cattle, image='cattle_images/first.jpg')
+        CattleImage.objects.create(cattle=cattle, image='cattle_images/second.jpg')
+
+        listing = Cattle.objects.with_primary_image().get(pk=cattle.pk)
+        self.assertEqual(listing.primary_image, first)
+
+    def test_primary_image_is_none_without_images(self):
+        cattle = create_cattle(self.seller, images=0)
+
+        listing = Cattle.objects.with_primary_image().get(pk=cattle.pk)
+        self.assertIsNone(listing.primary_image)
+
+    def test_list_queries_do_not_grow_with_page_size(self):
+        url = reverse('cattle:cattle-list-create')
+        create_cattle(self.seller)
+        small_page = self.count_list_queries(url)
+
+        for _ in range(11):
+            create_cattle(self.seller)
+        full_page = self.count_list_queries(url)
+
+        self.assertEqual(small_page, full_page)
+
+    def test_my_listings_queries_do_not_grow_with_page_size(self):
+        url = reverse('cattle:my-cattle')
+        self.client.force_authenticate(self.seller)
+        create_cattle(self.seller)
+        small_page = self.count_list_queries(url)
+
+        for _ in range(11):
+            create_cattle(self.seller)
+        full_page = self.count_list_queries(url)
+
+        self.assertEqual(small_page, full_page)
+
+    def test_user_cattle_queries_do_not_grow_with_page_size(self):
+        url = reverse('users:user-cattle', args=[self.seller.pk])
+        create_cattle(self.seller)
+        small_page = self.count_list_queries(url)
+
+        for _ in range(11):
+            create_cattle(self.seller)
+        full_page = self.count_list_queries(url)
+
+        self.assertEqual(small_page, full_page)
+
+
+@override_settings(VIEW_COUNT_FLUSH_INTERVAL=3600, CATTLE_RESPONSE_CACHE_TIMEOUT=0)
+class ViewCounterTests(APITestCase):
+    """Buffered view counting on the detail endpoint"""
+
+    def setUp(self):
+        self.seller = create_seller()
+        self.cattle = create_cattle(self.seller)
+        self.url = reverse('cattle:cattle-detail', args=[self.cattle.pk])
+        view_count_buffer.flush()
+
+    def tearDown(self):
+        view_count_buffer.flush()
+
+    def test_views_are_buffered_until_flush(self):
+        first = self.client.get(self.url)
+        second = self.client.get(self.url)
+
+        self.assertEqual(first.data['view_count'], 1)
+        self.assertEqual(second.data['view_count'], 2)
+        self.cattle.refresh_from_db()
+        self.assertEqual(self.cattle.view_count, 0)
+
+        self.assertEqual(view_count_buffer.flush(), 2)
+        self.cattle.refresh_from_db()
+        self.assertEqual(self.cattle.view_count, 2)
+
+    def test_flush_batches_listings_by_increment(self):
+        other = create_cattle(self.seller)
+        view_count_buffer.add(self.cattle.pk)
+        view_count_buffer.add(other.pk)
+
+        with CaptureQueriesContext(connection) as context:
+            view_count_buffer.flush()
+        updates = [query for query in context.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            list(Cattle.objects.order_by('pk').values_list('view_count', flat=True)),
+            [1, 1]
+        )
+
+    @override_settings(VIEW_COUNT_FLUSH_INTERVAL=0)
+    def test_zero_interval_writes_through(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.data['view_count'], 1)
+        self.cattle.refresh_from_db()
+        self.assertEqual(self.cattle.view_count, 1)
+
+
+class CattleSearchTests(APITestCase):
+    """Search on the browse endpoint"""
+
+    def setUp(self):
+        cache.clear()
+        seller = create_seller()
+        self.bull = create_cattle(seller, title='Zebu bull', city='Tamale')
+        self.heifer = create_cattle(seller, title='Sanga heifer', city='Kumasi', description='Calm heifer')
+        self.url = reverse('cattle:cattle-list-create')
+
+    def search(self, term):
+        response = self.client.get(self.url, {'search': term})
+        return [item['id'] for item in response.data['results']]
+
+    def test_basic_search_matches_title_and_city(self):
+        self.assertEqual(self.search('bull'), [self.bull.pk])
+        self.assertEqual(self.search('kumasi'), [self.heifer.pk])
+
+    @override_settings(CATTLE_SEARCH_BACKEND='postgres')
+    def test_full_text_backend_falls_back_without_postgresql(self):
+        if connection.vendor == 'postgresql':
+            self.skipTest('Fallback only applies to other databases')
+        self.assertEqual(self.search('heifer'), [self.heifer.pk])
+
+
+class KeysetPaginationTests(APITestCase):
+    """Opt-in keyset pagination on the browse endpoint"""
+
+    def setUp(self):
+        cache.clear()
+        seller = create_seller()
+        # Repeated prices exercise the id tie-breaker
+        self.listings = [
+            create_cattle(seller, images=0, price=f'{1000 + (index % 5) * 100}.00')
+            for index in range(30)
+        ]
+        self.url = reverse('cattle:cattle-list-create')
+
+    def walk(self, params):
+        ids = []
+        response = self.client.get(self.url, {**params, 'cursor': ''})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            ids.extend(item['id'] for item in response.data['results'])
+            if not response.data['next']:
+                return ids
+            response = self.client.get(response.data['next'])
+
+    def test_page_number_contract_is_unchanged(self):
+        response = self.client.get(self.url, {'page': 2})
+
+        self.assertEqual(response.data['count'], 30)
+        self.assertEqual(len(response.data['results']), 12)
+
+    def test_cursor_walks_every_listing_once_in_order(self):
+        for ordering in ['price', '-price', '-created_at', 'view_count']:
+            field = ordering.lstrip('-')
+            expected = sorted(
+                self.listings,
+                key=lambda cattle: (getattr(cattle, field), cattle.pk),
+                reverse=ordering.startswith('-')
+            )
+            self.assertEqual(
+                self.walk({'ordering': ordering}),
+                [cattle.pk for cattle in expected]
+            )
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_from_another_ordering_is_rejected(self):
+        response = self.client.get(self.url, {'cursor': '', 'ordering': 'price'})
+        response = self.client.get(self.url, {
+            'cursor': response.data['next'].split('cursor=')[1],
+            'ordering': '-price',
+        })
+
+        self.assertEqual(response.status_code, 404)
+
+
+class ResultCountTests(APITestCase):
+    """Cached result counts on the browse endpoint"""
+
+    def setUp(self):
+        cache.clear()
+        seller = create_seller()
+        create_cattle(seller, images=0, breed='ZEBU')
+        create_cattle(seller, images=0, breed='SANGA')
+        self.url = reverse('cattle:cattle-list-create')
+
+    def count_queries(self, params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, params)
+        counts = [query for query in context.captured_queries if 'COUNT(' in query['sql']]
+        return response, len(counts)
+
+    def test_exact_count_is_cached_per_filter_signature(self):
+        response, first = self.count_queries({'breed': 'ZEBU', 'search': 'Zebu  BULL'})
+        self.assertEqual(response.data['count'], 1)
+        self.assertTrue(response.data['count_is_exact'])
+        self.assertEqual(first, 1)
+
+        # Same filters, different order, spacing and case: served from cache
+        response, repeat = self.count_queries({'search': 'zebu bull', 'breed': 'ZEBU', 'page': 1})
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(repeat, 0)
+
+        response, other = self.count_queries({'breed': 'SANGA'})
+        self.assertEqual(other, 1)
+
+
+@override_settings(VIEW_COUNT_FLUSH_INTERVAL=3600)
+class ResponseCacheTests(APITestCase):
+    """Versioned response cache for anonymous requests"""
+
+    def setUp(self):
+        cache.clear()
+        view_count_buffer.flush()
+        self.seller = create_seller()
+        self.cattle = create_cattle(self.seller)
+        self.list_url = reverse('cattle:cattle-list-create')
+        self.detail_url = reverse('cattle:cattle-detail', args=[self.cattle.pk])
+
+    def tearDown(self):
+        view_count_buffer.flush()
+
+    def test_anonymous_list_is_served_from_cache(self):
+        hits = response_cache_stats()['hits']
+        self.assertEqual(self.client.get(self.list_url)['X-Cache'], 'MISS')
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.list_url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response_cache_stats()['hits'], hits + 1)
+
+    def test_listing_changes_invalidate_cached_pages(self):
+        self.client.get(self.list_url)
+        self.client.get(self.detail_url)
+
+        self.cattle.title = 'Updated title'
+        self.cattle.save()
+        create_cattle(self.seller)
+
+        response = self.client.get(self.list_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 2)
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['title'], 'Updated title')
+
+    def test_authenticated_requests_bypass_cache(self):
+        self.client.force_authenticate(self.seller)
+        self.client.get(self.list_url)
+
+        response = self.client.get(self.list_url)
+        self.assertFalse(response.has_header('X-Cache'))
+
+    def test_cached_detail_still_counts_views(self):
+        self.client.get(self.detail_url)
+        response = self.client.get(self.detail_url)
+
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(view_count_buffer.pending(self.cattle.pk), 2)
+
+    @override_settings(CATTLE_RESPONSE_CACHE_ALLOW_LOCAL=False)
+    def test_local_memory_cache_is_not_used(self):
+        # Another worker's writes would not bump this process's generation
+        self.client.get(self.list_url)
+        response = self.client.get(self.list_url)
+
+        self.assertFalse(response.has_header('X-Cache'))
+        self.assertFalse(response.has_header('ETag'))
+        self.assertEqual(response_cache_stats(), {'hits': 0, 'misses': 0})
+
+    def test_only_listed_seller_changes_invalidate(self):
+        buyer = User.objects.create_user(
+            email='buyer@example.com',
+            password='StrongPass123!',
+            first_name='Ama',
+            last_name='Owusu',
+            phone_number='+233207654321',
+            user_type='BUYER',
+        )
+        self.client.get(self.list_url)
+        buyer.city = 'Accra'
+        buyer.save()
+        self.seller.last_login = timezone.now()
+        self.seller.save(update_fields=['last_login'])
+        self.assertEqual(self.client.get(self.list_url)['X-Cache'], 'HIT')
+
+        self.seller.business_name = 'Mensah Ranch'
+        self.seller.save(update_fields=['business_name'])
+        response = self.client.get(self.list_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['seller']['business_name'], 'Mensah Ranch')
+
+    def test_stats_command(self):
+        self.client.get(self.list_url)
+        self.client.get(self.list_url)
+        output = StringIO()
+        call_command('response_cache_stats', stdout=output)
+
+        self.assertIn('1 hits, 1 misses (50.0% hit rate)', output.getvalue())
+
+
+@override_settings(VIEW_COUNT_FLUSH_INTERVAL=3600)
+class ConditionalRequestTests(APITestCase):
+    """ETag / Last-Modified handling on listing endpoints"""
+
+    def setUp(self):
+        cache.clear()
+        view_count_buffer.flush()
+        self.seller = create_seller()
+        self.cattle = create_cattle(self.seller)
+        self.list_url = reverse('cattle:cattle-list-create')
+        self.detail_url = reverse('cattle:cattle-detail', args=[self.cattle.pk])
+
+    def tearDown(self):
+        view_count_buffer.flush()
+
+    def test_unchanged_detail_returns_304_and_counts_view(self):
+        etag = self.client.get(self.detail_url)['ETag']
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(view_count_buffer.pending(self.cattle.pk), 2)
+
+    def test_detail_etag_changes_with_images(self):
+        etag = self.client.get(self.detail_url)['ETag']
+        CattleImage.objects.create(cattle=self.cattle, image='cattle_images/new.jpg')
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_detail_etag_changes_when_sold(self):
+        etag = self.client.get(self.detail_url)['ETag']
+        self.cattle.mark_as_sold()
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['is_sold'])
+
+    def test_detail_etag_changes_with_admin_deactivation(self):
+        etag = self.client.get(self.detail_url)['ETag']
+        Cattle.objects.filter(pk=self.cattle.pk).update(is_active=False)
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertNotEqual(response.status_code, 304)
+
+    def test_detail_honours_if_modified_since(self):
+        last_modified = self.client.get(self.detail_url)['Last-Modified']
+
+        response = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_returns_304_until_listings_change(self):
+        etag = self.client.get(self.list_url)['ETag']
+
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        create_cattle(self.seller)
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_my_listings_etag_is_per_user(self):
+        other = create_seller(email='other@example.com', phone_number='+233201234568')
+        self.client.force_authenticate(self.seller)
+        etag = self.client.get(reverse('cattle:my-cattle'))['ETag']
+
+        self.client.force_authenticate(other)
+        response = self.client.get(reverse('cattle:my-cattle'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class DocumentFlagTests(APITestCase):
+    """Health certificate flags on list and detail endpoints"""
+
+    def setUp(self):
+        cache.clear()
+        seller = create_seller()
+        self.certified = create_cattle(seller, images=0)
+        self.uncertified = create_cattle(seller, images=0)
+        for document_type in ['HEALTH_CERTIFICATE', 'VACCINATION_RECORD', 'VET_REPORT']:
+            HealthDocument.objects.create(
+                cattle=self.certified,
+                document_type=document_type,
+                document='health_documents/test.pdf',
+                document_name=document_type.title(),
+                expiry_date='2000-01-01',
+            )
+        self.list_url = reverse('cattle:cattle-list-create')
+
+    def test_list_exposes_document_flags(self):
+        response = self.client.get(self.list_url)
+        flags = {
+            item['id']: (item['has_health_certificate'], item['has_vaccination_record'])
+            for item in response.data['results']
+        }
+
+        self.assertEqual(flags, {self.certified.pk: (True, True), self.uncertified.pk: (False, False)})
+
+    def test_detail_flags_come_from_prefetched_documents(self):
+        url = reverse('cattle:cattle-detail', args=[self.certified.pk])
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+
+        self.assertTrue(response.data['has_health_certificate'])
+        self.assertTrue(response.data['has_vaccination_record'])
+        self.assertTrue(all(document['is_expired'] for document in response.data['health_documents']))
+        document_queries = [
+            query for query in context.captured_queries
+            if 'FROM "cattle_healthdocument"' in query['sql']
+        ]
+        self.assertEqual(len(document_queries), 2)  # ETag validator and prefetch
+
+    def test_filter_by_health_certificate(self):
+        response = self.client.get(self.list_url, {'has_health_certificate': 'true'})
+        self.assertEqual([item['id'] for item in response.data['results']], [self.certified.pk])
+
+        response = self.client.get(self.list_url, {'has_health_certificate': 'false'})
+        self.assertEqual([item['id'] for item in response.data['results']], [self.uncertified.pk])
+
+
+class RenditionTests(APITestCase):
+    """Resized renditions for uploaded cattle images"""
+
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.seller = create_seller()
+        self.cattle = create_cattle(self.seller, images=0)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_upload_generates_renditions(self):
+        self.client.force_authenticate(self.seller)
+        response = self.client.post(
+            reverse('cattle:image-upload', args=[self.cattle.pk]),
+            {'image': make_image_file(), 'is_primary': True},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, 201)
+
+        image = self.cattle.images.get()
+        sizes = image.renditions['sizes']
+        self.assertEqual(image.renditions['source'], image.image.name)
+        self.assertEqual((sizes['thumb']['width'], sizes['thumb']['height']), (160, 120))
+        self.assertEqual(sizes['full']['width'], 1280)
+        self.assertTrue(sizes['card']['webp'].endswith('.webp'))
+        self.assertTrue(image.image.storage.exists(sizes['card']['jpeg']))
+
+    def test_list_serves_srcset(self):
+        CattleImage.objects.create(cattle=self.cattle, image=make_image_file(), is_primary=True)
+
+        response = self.client.get(reverse('cattle:cattle-list-create'))
+        primary = response.data['results'][0]['primary_image']
+
+        self.assertEqual(set(primary['renditions']), {'thumb', 'card', 'full'})
+        self.assertIn('160w', primary['srcset']['webp'])
+        self.assertIn('1280w', primary['srcset']['jpeg'])
+
+    @override_settings(UPLOAD_PROCESSING_WORKERS=1)
+    def test_legacy_images_are_served_as_originals_and_queued(self):
+        image = CattleImage.objects.create(cattle=self.cattle, image=make_image_file(), is_primary=True)
+        CattleImage.objects.filter(pk=image.pk).update(renditions={})
+
+        # Authenticated, so both requests are serialized instead of served from the response cache
+        self.client.force_authenticate(self.seller)
+        with mock.patch.object(processing, 'get_executor') as get_executor:
+            for _ in range(2):
+                response = self.client.get(reverse('cattle:cattle-detail', args=[self.cattle.pk]))
+        served = response.data['images'][0]
+
+        self.assertTrue(served['image'].endswith(image.image.name))
+        self.assertEqual((served['renditions'], served['srcset']), ({}, {}))
+        get_executor.return_value.submit.assert_called_once_with(processing.render_stored_image, image.image.name)
+        image.refresh_from_db()
+        self.assertEqual(image.renditions, {})
+
+        renditions = processing.render_stored_image(image.image.name)
+        self.assertEqual(set(renditions['sizes']), {'thumb', 'card', 'full'})
+        call_command('generate_renditions', stdout=StringIO())
+        image.refresh_from_db()
+        self.assertEqual(image.renditions['source'], image.image.name)
+
+
+@override_settings(UPLOAD_PROCESSING_MODE='async', UPLOAD_PROCESSING_WORKERS=0)
+class AsyncUploadProcessingTests(APITestCase):
+    """Deferred processing of image and document uploads"""
+
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.seller = create_seller()
+        self.cattle = create_cattle(self.seller, images=0)
+        self.client.force_authenticate(self.seller)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def upload(self, url_name, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse(url_name, args=[self.cattle.pk]),
+                data,
+                format='multipart'
+            )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['processing_status'], 'PENDING')
+        return self.client.get(response.data['status_url'])
+
+    def test_image_is_processed_after_202(self):
+        status_response = self.upload('cattle:image-upload', {'image': make_image_file(size=(4000, 3000))})
+
+        self.assertEqual(status_response.data['processing_status'], 'READY')
+        self.assertEqual(len(status_response.data['checksum']), 64)
+        self.assertIn('card', status_response.data['renditions'])
+        image = self.cattle.images.get()
+        self.assertEqual(image.image.width, 2560)
+
+    def test_invalid_image_is_marked_failed(self):
+        bogus = SimpleUploadedFile('fake.jpg', b'not an image', content_type='image/jpeg')
+        status_response = self.upload('cattle:image-upload', {'image': bogus})
+
+        self.assertEqual(status_response.data['processing_status'], 'FAILED')
+        self.assertIn('Invalid image', status_response.data['processing_error'])
+        response = self.client.get(reverse('cattle:cattle-list-create'))
+        self.assertIsNone(response.data['results'][0]['primary_image'])
+
+    def test_pdf_document_gets_checksum(self):
+        document = SimpleUploadedFile('cert.pdf', b'%PDF-1.4 test', content_type='application/pdf')
+        status_response = self.upload('cattle:document-upload', {
+            'document': document,
+            'document_type': 'HEALTH_CERTIFICATE',
+            'document_name': 'Certificate',
+        })
+
+        self.assertEqual(status_response.data['processing_status'], 'READY')
+        self.assertEqual(len(status_response.data['checksum']), 64)
+
+    def test_failed_document_does_not_count(self):
+        bogus = SimpleUploadedFile('cert.pdf', b'not a document', content_type='application/pdf')
+        status_response = self.upload('cattle:document-upload', {
+            'document': bogus,
+            'document_type': 'HEALTH_CERTIFICATE',
+            'document_name': 'Certificate',
+        })
+        self.assertEqual(status_response.data['processing_status'], 'FAILED')
+
+        list_url = reverse('cattle:cattle-list-create')
+        self.assertFalse(self.client.get(list_url).data['results'][0]['has_health_certificate'])
+        self.assertEqual(self.client.get(list_url, {'has_health_certificate': 'true'}).data['count'], 0)
+        detail = self.client.get(reverse('cattle:cattle-detail', args=[self.cattle.pk])).data
+        self.assertEqual(detail['health_documents'], [])
+        self.assertFalse(detail['has_health_certificate'])
+        self.assertFalse(Cattle.objects.get(pk=self.cattle.pk).has_health_certificate())
+
+    def test_pending_uploads_are_not_public(self):
+        self.client.post(
+            reverse('cattle:image-upload', args=[self.cattle.pk]), {'image': make_image_file()}, format='multipart'
+        )
+        self.client.post(reverse('cattle:document-upload', args=[self.cattle.pk]), {
+            'document': SimpleUploadedFile('cert.pdf', b'%PDF-1.4 test', content_type='application/pdf'),
+            'document_type': 'HEALTH_CERTIFICATE',
+            'document_name': 'Certificate',
+        }, format='multipart')
+        self.client.force_authenticate(None)
+
+        listing = self.client.get(reverse('cattle:cattle-list-create')).data['results'][0]
+        self.assertIsNone(listing['primary_image'])
+        self.assertFalse(listing['has_health_certificate'])
+        detail = self.client.get(reverse('cattle:cattle-detail', args=[self.cattle.pk])).data
+        self.assertEqual((detail['images'], detail['health_documents']), ([], []))
+        self.assertIsNone(Cattle.objects.get(pk=self.cattle.pk).primary_image)
+
+    @override_settings(UPLOAD_PROCESSING_MODE='sync')
+    def test_sync_failure_removes_the_stored_file(self):
+        response = self.client.post(reverse('cattle:document-upload', args=[self.cattle.pk]), {
+            'document': SimpleUploadedFile('cert.pdf', b'not a document', content_type='application/pdf'),
+            'document_type': 'HEALTH_CERTIFICATE',
+            'document_name': 'Certificate',
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Invalid image', response.data['error'])
+        self.assertFalse(HealthDocument.objects.exists())
+        self.assertEqual([files for _, _, files in os.walk(self.media_root) if files], [])
+
+
+class BulkImageUploadTests(APITestCase):
+    """Uploading several images for a listing in one request"""
+
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.seller = create_seller()
+        self.cattle = create_cattle(self.seller, images=0)
+        self.existing = CattleImage.objects.create(
+            cattle=self.cattle, image=make_image_file(), is_primary=True
+        )
+        self.client.force_authenticate(self.seller)
+        self.url = reverse('cattle:image-bulk-upload', args=[self.cattle.pk])
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_uploads_all_images_and_moves_primary_once(self):
+        files = [make_image_file(name=f'cow{index}.jpg') for index in range(3)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {
+                'images': files,
+                'captions': ['left', 'front', 'right'],
+                'primary_index': 1,
+            }, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 3)
+        self.assertEqual(response.data['failed'], 0)
+        self.assertEqual(self.cattle.images.count(), 4)
+        primary = self.cattle.images.get(is_primary=True)
+        self.assertEqual(primary.caption, 'front')
+        self.assertTrue(all(image.processing_status == 'READY' for image in self.cattle.images.all()))
+        inserts = [query for query in queries.captured_queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+
+    def test_invalid_files_are_reported_per_file(self):
+        bogus = SimpleUploadedFile('fake.jpg', b'not an image', content_type='image/jpeg')
+        response = self.client.post(self.url, {
+            'images': [make_image_file(), bogus],
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['failed'], 1)
+        self.assertFalse(response.data['results'][1]['success'])
+        self.assertEqual(response.data['results'][1]['filename'], 'fake.jpg')
+        self.assertEqual(self.cattle.images.get(is_primary=True), self.existing)
+
+    def test_rejects_too_many_files(self):
+        files = [make_image_file(name=f'cow{index}.jpg') for index in range(11)]
+        response = self.client.post(self.url, {'images': files}, format='multipart')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.cattle.images.count(), 1)
+
+
+class BulkImportTests(APITestCase):
+    """Streaming CSV / JSON Lines listing import"""
+
+    def setUp(self):
+        cache.clear()
+        self.seller = create_seller()
+        self.client.force_authenticate(self.seller)
+        self.url = reverse('cattle:cattle-import')
+
+    def row(self, **overrides):
+        row = {
+            'title': 'Imported bull',
+            'description': 'From the cooperative herd',
+            'breed': 'ZEBU',
+            'gender': 'MALE',
+            'age_months': 24,
+            'weight_kg': '350.00',
+            'price': '5000.00',
+            'region': 'NORTHERN',
+        }
+        row.update(overrides)
+        return row
+
+    def csv_file(self, rows):
+        buffer = StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=list(self.row()) + ['city'])
+        writer.writeheader()
+        writer.writerows(rows)
+        return SimpleUploadedFile('herd.csv', buffer.getvalue().encode(), content_type='text/csv')
+
+    @override_settings(CATTLE_IMPORT_BATCH_SIZE=2)
+    def test_csv_import_reports_row_errors(self):
+        rows = [self.row(title=f'Bull {index}') for index in range(5)]
+        rows[2]['age_months'] = 500
+        rows[3]['breed'] = 'UNKNOWN'
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {'file': self.csv_file(rows)}, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 3)
+        self.assertEqual(response.data['failed'], 2)
+        self.assertEqual([error['row'] for error in response.data['errors']], [4, 5])
+        self.assertIn('age_months', response.data['errors'][0]['errors'])
+        self.assertEqual(Cattle.objects.filter(seller=self.seller).count(), 3)
+        inserts = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('INSERT INTO "cattle_cattle"')
+        ]
+        self.assertEqual(len(inserts), 2)
+        self.assertEqual(MarketPriceStat.objects.get().listing_count, 3)
+
+    def test_jsonl_import(self):
+        lines = [json.dumps(self.row(is_negotiable=False)), '', 'not json', json.dumps(['a list'])]
+        upload = SimpleUploadedFile('herd.jsonl', '\n'.join(lines).encode())
+
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['failed'], 2)
+        self.assertFalse(Cattle.objects.get(seller=self.seller).is_negotiable)
+
+    @override_settings(CATTLE_IMPORT_MAX_ERRORS=1)
+    def test_error_report_is_capped(self):
+        rows = [self.row(gender='OTHER') for _ in range(3)]
+        response = self.client.post(self.url, {'file': self.csv_file(rows)}, format='multipart')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['failed'], 3)
+        self.assertEqual(len(response.data['errors']), 1)
+        self.assertTrue(response.data['errors_truncated'])
+
+    @override_settings(CATTLE_IMPORT_BATCH_SIZE=1)
+    def test_invalid_utf8_is_a_format_error(self):
+        content = self.csv_file([self.row(), self.row(city='\u00c9cole'), self.row()]).read()
+        content = content.replace('\u00c9'.encode(), b'\xff')
+
+        response = self.client.post(
+            self.url, {'file': SimpleUploadedFile('herd.csv', content)}, format='multipart'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('not valid UTF-8', response.data['error'])
+        self.assertIn('1 listings before it were imported', response.data['error'])
+        # The batch committed before the error is still counted in the market index
+        self.assertEqual(MarketPriceStat.objects.get().listing_count, 1)
+
+        with tempfile.NamedTemporaryFile(suffix='.csv') as handle:
+            handle.write(content)
+            handle.flush()
+            with self.assertRaisesMessage(CommandError, 'not valid UTF-8'):
+                call_command('import_cattle', handle.name, seller=self.seller.email, dry_run=True)
+
+    def test_unparseable_csv_record_is_a_row_error(self):
+        rows = [self.row(description='x' * (csv.field_size_limit() + 1)), self.row()]
+        response = self.client.post(self.url, {'file': self.csv_file(rows)}, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['errors'][0]['row'], 2)
+        self.assertIn('Invalid CSV', response.data['errors'][0]['errors']['non_field_errors'][0])
+
+    def test_buyers_cannot_import(self):
+        buyer = User.objects.create_user(
+            email='buyer@example.com',
+            password='StrongPass123!',
+            first_name='Buyer',
+            last_name='Test',
+            phone_number='+233201234568',
+            user_type='BUYER'
+        )
+        self.client.force_authenticate(buyer)
+        response = self.client.post(self.url, {'file': self.csv_file([self.row()])}, format='multipart')
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Cattle.objects.exists())
+
+
+class ExportTests(APITestCase):
+    """Streaming CSV / NDJSON export"""
+
+    def setUp(self):
+        cache.clear()
+        self.seller = create_seller()
+        self.zebu = create_cattle(self.seller, images=0, breed='ZEBU')
+        self.sanga = create_cattle(self.seller, images=0, breed='SANGA')
+        create_cattle(self.seller, images=0, is_sold=True)
+        self.client.force_authenticate(self.seller)
+        self.url = reverse('cattle:cattle-export')
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    @override_settings(CATTLE_EXPORT_CHUNK_SIZE=1)
+    def test_csv_export_uses_browse_filters(self):
+        response, content = self.export(breed='ZEBU')
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(StringIO(content.decode())))
+        self.assertEqual([int(row['id']) for row in rows], [self.zebu.pk])
+        self.assertEqual(rows[0]['has_health_certificate'], 'False')
+
+    def test_gzip_ndjson_export(self):
+        response, content = self.export(export_format='ndjson', compress='gzip', ordering='created_at')
+
+        self.assertIn('cattle-export.ndjson.gz', response['Content-Disposition'])
+        rows = [json.loads(line) for line in gzip.decompress(content).decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.zebu.pk, self.sanga.pk])
+
+    def test_rejects_unknown_format(self):
+        response = self.client.get(self.url, {'export_format': 'xml'})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class MarketPriceIndexTests(APITestCase):
+    """Incrementally maintained market price statistics"""
+
+    def setUp(self):
+        cache.clear()
+        self.seller = create_seller()
+        self.url = reverse('cattle:market-stats')
+
+    def listed(self):
+        return MarketPriceStat.objects.get(kind='LISTED', breed='ZEBU', region='NORTHERN', gender='MALE')
+
+    def test_buckets_follow_creates_and_sales(self):
+        first = create_cattle(self.seller, images=0, price='4000.00', weight_kg='200.00')
+        create_cattle(self.seller, images=0, price='6000.00', weight_kg='300.00')
+        create_cattle(self.seller, images=0, price='9000.00', weight_kg='300.00')
+
+        stat = self.listed()
+        self.assertEqual(stat.listing_count, 3)
+        self.assertEqual(stat.price_median, Decimal('6000.00'))
+        self.assertEqual(stat.price_p25, Decimal('5000.00'))
+        self.assertEqual(stat.price_per_kg_median, Decimal('20.00'))
+        self.assertEqual(stat.month, timezone.localdate().replace(day=1))
+
+        first.mark_as_sold()
+        sold = MarketPriceStat.objects.get(kind='SOLD')
+        self.assertEqual(sold.listing_count, 1)
+        self.assertEqual(sold.price_mean, Decimal('4000.00'))
+        self.assertEqual(self.listed().listing_count, 3)
+
+        first.delete()
+        self.assertEqual(self.listed().listing_count, 2)
+        self.assertFalse(MarketPriceStat.objects.filter(kind='SOLD').exists())
+
+    def test_edits_without_market_changes_skip_the_refresh(self):
+        create_cattle(self.seller, images=0, price='4000.00', weight_kg='200.00')
+        listing = Cattle.objects.get()
+
+        listing.title = 'Renamed bull'
+        with CaptureQueriesContext(connection) as queries:
+            listing.save()
+        self.assertFalse(any('cattle_marketpricestat' in query['sql'] for query in queries.captured_queries))
+
+        listing.price = Decimal('5000.00')
+        listing.save()
+        self.assertEqual(self.listed().price_mean, Decimal('5000.00'))
+        self.assertEqual(self.listed().price_per_kg_mean, Decimal('25.00'))
+
+    def test_edits_move_listings_between_buckets(self):
+        cattle = create_cattle(self.seller, images=0)
+        self.client.force_authenticate(self.seller)
+        response = self.client.patch(
+            reverse('cattle:cattle-detail', args=[cattle.pk]), {'breed': 'SANGA'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(MarketPriceStat.objects.filter(kind='LISTED').values_list('breed', 'listing_count')),
+            [('SANGA', 1)]
+        )
+
+        # Saving the same instance again moves it from the bucket it is in now
+        cattle = Cattle.objects.get(pk=cattle.pk)
+        cattle.region = 'VOLTA'
+        cattle.save()
+        cattle.gender = 'FEMALE'
+        cattle.save()
+        self.assertEqual(
+            list(MarketPriceStat.objects.values_list('breed', 'region', 'gender')),
+            [('SANGA', 'VOLTA', 'FEMALE')]
+        )
+
+    def test_read_api_filters_buckets(self):
+        create_cattle(self.seller, images=0)
+        create_cattle(self.seller, images=0, breed='SANGA', region='VOLTA')
+
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'breed': 'ZEBU', 'kind': 'LISTED'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['region'], 'NORTHERN')
+
+    def test_rebuild_matches_incremental_refresh(self):
+        for price in ('3000.00', '5000.00'):
+            create_cattle(self.seller, images=0, price=price)
+        expected = list(MarketPriceStat.objects.values_list('kind', 'listing_count', 'price_mean'))
+
+        MarketPriceStat.objects.all().delete()
+        call_command('refresh_market_stats', stdout=StringIO())
+
+        actual = list(MarketPriceStat.objects.values_list('kind', 'listing_count', 'price_mean'))
+        self.assertEqual(actual, expected)
+
+
+class FacetTests(APITestCase):
+    """Facet counts on the browse endpoint"""
+
+    def setUp(self):
+        cache.clear()
+        self.seller = create_seller()
+        create_cattle(self.seller, images=0, breed='ZEBU', region='NORTHERN')
+        create_cattle(self.seller, images=0, breed='ZEBU', region='VOLTA')
+        create_cattle(self.seller, images=0, breed='SANGA', region='NORTHERN', gender='FEMALE')
+        create_cattle(self.seller, images=0, breed='SANGA', is_active=False)
+        self.url = reverse('cattle:cattle-list-create')
+
+    def counts(self, facet_values):
+        return {entry['value']: entry['count'] for entry in facet_values}
+
+    def test_facets_exclude_their_own_filter(self):
+        response = self.client.get(self.url, {'facets': 'breed,region', 'breed': 'ZEBU'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(self.counts(response.data['facets']['breed']), {'ZEBU': 2, 'SANGA': 1})
+        self.assertEqual(self.counts(response.data['facets']['region']), {'NORTHERN': 1, 'VOLTA': 1})
+        self.assertEqual(response.data['facets']['region'][0]['label'], 'Northern')
+
+    def test_facets_are_cached_per_filter_set(self):
+        params = {'facets': 'gender', 'region': 'NORTHERN'}
+        self.client.force_authenticate(self.seller)
+        self.client.get(self.url, params)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, dict(params, ordering='price'))
+        grouped = [query for query in queries.captured_queries if 'GROUP BY' in query['sql']]
+        self.assertEqual(grouped, [])
+        self.assertEqual(self.counts(response.data['facets']['gender']), {'MALE': 1, 'FEMALE': 1})
+
+    def test_unknown_facet(self):
+        response = self.client.get(self.url, {'facets': 'price'})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class DistanceSearchTests(APITestCase):
+    """`near` searches over listing coordinates"""
+
+    def setUp(self):
+        cache.clear()
+        self.seller = create_seller()
+        self.tamale = create_cattle(self.seller, images=0, region='NORTHERN', city='Tamale')
+        self.savelugu = create_cattle(self.seller, images=0, region='NORTHERN', city='Savelugu')
+        self.kumasi = create_cattle(self.seller, images=0, region='ASHANTI', city='Kumasi')
+        self.url = reverse('cattle:cattle-list-create')
+
+    def test_listings_default_to_centroids(self):
+        self.assertTrue(self.tamale.location_is_approximate)
+        self.assertEqual(self.tamale.latitude, Decimal('9.400800'))
+        self.assertEqual(self.tamale.geohash, encode_geohash(9.4008, -0.8393))
+
+        self.kumasi.region = 'VOLTA'
+        self.kumasi.city = ''
+        self.kumasi.save(update_fields=['region', 'city'])
+        self.kumasi.refresh_from_db()
+        self.assertEqual(self.kumasi.latitude, Decimal('6.600800'))
+
+    def test_near_search_orders_by_distance(self):
+        response = self.client.get(self.url, {'near': '9.45,-0.85', 'radius_km': 30})
+
+        self.assertEqual(response.status_code, 200)
+        ids = [listing['id'] for listing in response.data['results']]
+        self.assertEqual(ids, [self.tamale.pk, self.savelugu.pk])
+        self.assertAlmostEqual(response.data['results'][0]['distance_km'], 5.6, delta=0.2)
+
+        response = self.client.get(self.url, {'near': '9.45,-0.85', 'radius_km': 400, 'ordering': '-distance_km'})
+        ids = [listing['id'] for listing in response.data['results']]
+        self.assertEqual(ids, [self.kumasi.pk, self.savelugu.pk, self.tamale.pk])
+
+    def test_zero_radius_is_not_the_default(self):
+        self.assertEqual(self.client.get(self.url, {'near': '9.45,-0.85'}).data['count'], 2)
+
+        response = self.client.get(self.url, {'near': '9.45,-0.85', 'radius_km': 0})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 0)
+
+    def test_exact_coordinates_from_seller(self):
+        self.client.force_authenticate(self.seller)
+        response = self.client.patch(
+            reverse('cattle:cattle-detail', args=[self.kumasi.pk]),
+            {'latitude': '9.500000', 'longitude': '-0.900000'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        self.kumasi.refresh_from_db()
+        self.assertFalse(self.kumasi.location_is_approximate)
+        response = self.client.get(self.url, {'near': '9.45,-0.85', 'radius_km': 10})
+        self.assertEqual([listing['id'] for listing in response.data['results']], [self.tamale.pk, self.kumasi.pk])
+
+    def test_geohash_cells_cover_radius(self):
+        cells = covering_geohashes(9.45, -0.85, 30)
+        self.assertIn(encode_geohash(9.4008, -0.8393)[:len(next(iter(cells)))], cells)
+
+    def test_invalid_near(self):
+        response = self.client.get(self.url, {'near': 'tamale'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(self.url, {'ordering': 'distance_km'})
+        self.assertEqual(response.status_code, 200)
+
+
+class SimilarListingsTests(APITestCase):
+    """Similarity index and the similar listings endpoint"""
+
+    def setUp(self):
+        cache.clear()
+        similarity_index.clear()
+        self.seller = create_seller()
+        self.listing = create_cattle(self.seller, images=0, age_months=24, weight_kg='350.00', price='5000.00')
+        self.close = create_cattle(self.seller, images=0, age_months=26, weight_kg='360.00', price='5200.00')
+        self.other_breed = create_cattle(
+            self.seller, images=0, breed='SANGA', age_months=24, weight_kg='350.00', price='5000.00'
+        )
+        self.far = create_cattle(
+            self.seller, images=0, age_months=150, weight_kg='600.00', price='20000.00', region='VOLTA'
+        )
+        self.url = reverse('cattle:cattle-similar', args=[self.listing.pk])
+
+    def tearDown(self):
+        similarity_index.clear()
+
+    def similar_ids(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [listing['id'] for listing in response.data['results']]
+
+    def test_similar_listings_are_ranked(self):
+        self.assertEqual(self.similar_ids(), [self.close.pk, self.other_breed.pk, self.far.pk])
+        self.assertEqual(self.similar_ids(limit=1), [self.close.pk])
+
+    def test_index_follows_writes(self):
+        self.similar_ids()
+        self.assertTrue(similarity_index.is_built)
+
+        self.close.mark_as_sold()
+        twin = create_cattle(self.seller, images=0, age_months=24, weight_kg='350.00', price='5000.00')
+        self.assertEqual(self.similar_ids(), [twin.pk, self.other_breed.pk, self.far.pk])
+
+        self.far.delete()
+        self.assertEqual(self.similar_ids(), [twin.pk, self.other_breed.pk])
+
+    def test_category_codes_match_one_hot_distance(self):
+        similarity_index.build()
+        (_, distance), = similarity_index.nearest(
+            *similarity_index.features(self.listing), k=1, exclude=self.listing.pk
+        )
+        self.assertAlmostEqual(distance, 0.0, delta=0.5)
+        matches = dict(similarity_index.similar_to(self.listing, k=3))
+        self.assertAlmostEqual(matches[self.other_breed.pk], math.sqrt(2 * 1.5 ** 2), places=4)
+
+    def test_unknown_listing(self):
+        response = self.client.get(reverse('cattle:cattle-similar', args=[999999]))
+        self.assertEqual(response.status_code, 404)
+
+    def fake_build(self, calls):
+        def build():
+            calls.append(threading.current_thread().name)
+            time.sleep(0.05)
+            similarity_index.load(np.zeros(0, dtype=np.int64), *raw_features([]))
+        return build
+
+    def test_concurrent_first_use_builds_once(self):
+        calls = []
+        with mock.patch.object(similarity_index, 'build', self.fake_build(calls)):
+            threads = [threading.Thread(target=similarity_index.ensure_current) for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(calls), 1)
+
+    def test_expired_index_keeps_serving_while_rebuilding(self):
+        similarity_index.build()
+        similarity_index.built_at -= 3600
+        calls = []
+        with mock.patch.object(similarity_index, 'build', self.fake_build(calls)):
+            self.assertEqual(self.similar_ids()[0], self.close.pk)
+            self.assertEqual(self.similar_ids()[0], self.close.pk)
+            with similarity_index.build_lock:
+                pass
+        self.assertEqual(calls, ['similarity-index'])
+        self.assertFalse(similarity_index.is_stale())
+
+    def test_writes_during_a_rebuild_are_replayed(self):
+        similarity_index.build()
+        load = similarity_index.load
+        created = []
+
+        def load_after_a_write(*args):
+            created.append(create_cattle(self.seller, images=0, age_months=24, weight_kg='350.00', price='5000.00'))
+            load(*args)
+
+        similarity_index.mark_stale()
+        with mock.patch.object(similarity_index, 'load', load_after_a_write):
+            similarity_index.ensure_current()
+        self.assertEqual(self.similar_ids()[0], created[0].pk)
+
+
+class SavedSearchTests(APITestCase):
+    """Saved searches, incremental matching and the inbox"""
+
+    def setUp(self):
+        cache.clear()
+        self.seller = create_seller()
+        self.buyer = User.objects.create_user(
+            email='buyer@example.com',
+            password='StrongPass123!',
+            first_name='Ama',
+            last_name='Owusu',
+            phone_number='+233207654321',
+            user_type='BUYER',
+        )
+        self.client.force_authenticate(self.buyer)
+        self.search = self.save_search(breed='ZEBU', region='NORTHERN', price__lte='6000')
+        self.inbox_url = reverse('cattle:saved-search-inbox')
+
+    def save_search(self, **params):
+        response = self.client.post(
+            reverse('cattle:saved-search-list-create'),
+            {'name': 'Zebu in the north', 'params': params},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        return SavedSearch.objects.get(pk=response.data['id'])
+
+    def inbox_ids(self, **params):
+        response = self.client.get(self.inbox_url, params)
+        self.assertEqual(response.status_code, 200)
+        return [match['cattle']['id'] for match in response.data['results']]
+
+    def test_params_are_validated_and_indexed(self):
+        self.assertEqual(self.search.params, {'breed': 'ZEBU', 'region': 'NORTHERN', 'price__lte': '6000'})
+        self.assertEqual(self.search.price_band_low, 0)
+        self.assertEqual(self.search.price_band_high, price_band(6000))
+
+        response = self.client.post(
+            reverse('cattle:saved-search-list-create'),
+            {'name': 'Bad', 'params': {'breed': 'UNICORN', 'near': '9.4,-0.8'}},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_params_must_fit_the_listing_field(self):
+        response = self.client.post(
+            reverse('cattle:saved-search-list-create'),
+            {'name': 'Fractional age', 'params': {'age_months__gte': '12.5'}},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('age_months__gte', response.data['params'])
+
+    def test_unfit_stored_params_never_fail_a_listing_write(self):
+        SavedSearch.objects.create(user=self.buyer, name='Legacy', params={'age_months__gte': '12.5'})
+        listing = create_cattle(self.seller, images=0, price='5500.00')
+        self.assertEqual(self.inbox_ids(), [listing.pk])
+
+    def test_new_listings_are_matched(self):
+        match = create_cattle(self.seller, images=0, price='5500.00')
+        create_cattle(self.seller, images=0, price='6500.00')
+        create_cattle(self.seller, images=0, breed='SANGA')
+        create_cattle(self.seller, images=0, region='VOLTA')
+        self.assertEqual(self.inbox_ids(), [match.pk])
+
+    def test_sellers_own_listings_are_skipped(self):
+        self.save_search(breed='ZEBU')
+        create_cattle(self.buyer, images=0)
+        self.assertEqual(SavedSearchMatch.objects.count(), 0)
+
+    def test_reactivated_listings_are_matched_once(self):
+        listing = create_cattle(self.seller, images=0, is_active=False)
+        self.assertEqual(self.inbox_ids(), [])
+
+        listing = Cattle.objects.get(pk=listing.pk)
+        listing.is_active = True
+        listing.save()
+        listing = Cattle.objects.get(pk=listing.pk)
+        listing.price = '5400.00'
+        listing.save()
+        self.assertEqual(self.inbox_ids(), [listing.pk])
+
+    def test_bulk_import_matches_in_batches(self):
+        rows = '\n'.join(json.dumps({
+            'title': f'Imported {index}',
+            'description': 'From the cooperative herd',
+            'breed': 'ZEBU',
+            'gender': 'MALE',
+            'age_months': 24,
+            'weight_kg': '350.00',
+            'price': str(4000 + index * 500),
+            'region': 'NORTHERN',
+        }) for index in range(6))
+        import_listings(BytesIO(rows.encode()), 'jsonl', self.seller, batch_size=2)
+        prices = sorted(match.cattle.price for match in SavedSearchMatch.objects.select_related('cattle'))
+        self.assertEqual(prices, [Decimal('4000.00'), Decimal('4500.00'), Decimal('5000.00'), Decimal('5500.00'), Decimal('6000.00')])
+
+    def test_inbox_etag_and_read_state(self):
+        first = create_cattle(self.seller, images=0)
+        response = self.client.get(self.inbox_url)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(self.inbox_url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        second = create_cattle(self.seller, images=0)
+        self.assertEqual(self.client.get(self.inbox_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        first_match = SavedSearchMatch.objects.get(cattle=first)
+        self.assertEqual(self.inbox_ids(since=first_match.pk), [second.pk])
+
+        response = self.client.post(
+            reverse('cattle:saved-search-inbox-read'),
+            {'up_to': first_match.pk},
+            format='json'
+        )
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(self.inbox_ids(unread='true'), [second.pk])
+
+    def test_inbox_query_count(self):
+        for _ in range(3):
+            create_cattle(self.seller, images=1)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(len(self.inbox_ids()), 3)
+        # count, matches with searches, listings with sellers, primary images
+        self.assertLessEqual(len(queries), 5)
+
+    @override_settings(SAVED_SEARCH_MAX_PER_USER=1)
+    def test_saved_search_limit(self):
+        response = self.client.post(
+            reverse('cattle:saved-search-list-create'),
+            {'name': 'Another', 'params': {'breed': 'SANGA'}},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class SellerStatsTests(APITestCase):
+    """Dashboard statistics for a seller's listings"""
+
+    def setUp(self):
+        cache.clear()
+        self.seller = create_seller()
+        self.other = create_seller(email='other@example.com', phone_number='+233209999999')
+        self.client.force_authenticate(self.seller)
+        self.url = reverse('cattle:my-cattle-stats')
+
+        create_cattle(self.seller, images=1, price='4000.00', view_count=10)
+        create_cattle(self.seller, images=0, price='6000.00', is_active=False, view_count=2)
+        self.sold = create_cattle(self.seller, images=0, price='5000.00', view_count=30)
+        Cattle.objects.filter(pk=self.sold.pk).update(
+            is_sold=True, sold_date=self.sold.created_at + timedelta(days=12)
+        )
+        create_cattle(self.other, images=0, price='9000.00')
+        cache.clear()
+
+    def test_stats_in_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response.data['total_listings'], 3)
+        self.assertEqual(response.data['active_listings'], 1)
+        self.assertEqual(response.data['inactive_listings'], 1)
+        self.assertEqual(response.data['sold_listings'], 1)
+        self.assertEqual(response.data['total_views'], 42)
+        self.assertEqual(response.data['average_views_per_listing'], 14.0)
+        self.assertEqual(response.data['active_value'], '4000.00')
+        self.assertEqual(response.data['sold_value'], '5000.00')
+        self.assertEqual(response.data['average_price'], '5000.00')
+        self.assertEqual(response.data['average_days_to_sale'], 12.0)
+
+    def test_cached_until_the_seller_writes(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        self.assertEqual(len(queries), 0)
+
+        create_cattle(self.other, images=0)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        self.assertEqual(len(queries), 0)
+
+        create_cattle(self.seller, images=0)
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['total_listings'], 4)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+class RequestMetricsTests(APITestCase):
+    """Per-request query and timing instrumentation"""
+
+    def setUp(self):
+        cache.clear()
+        self.seller = create_seller()
+        for _ in range(3):
+            create_cattle(self.seller, images=1)
+        self.url = reverse('cattle:cattle-list-create')
+
+    @override_settings(REQUEST_METRICS_HEADER=True)
+    def test_server_timing_header(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        timing = response['Server-Timing']
+        self.assertIn(f'desc="{len(queries)} queries"', timing)
+        durations = dict(part.split(';')[0:2] for part in timing.split(', '))
+        self.assertEqual(set(durations), {'db', 'serializer', 'render', 'total'})
+        self.assertGreater(float(durations['serializer'].split('=')[1]), 0)
+
+    @override_settings(REQUEST_METRICS_HEADER=False)
+    def test_log_line_without_header(self):
+        with self.assertLogs('config.instrumentation', 'INFO') as logs:
+            response = self.client.get(self.url)
+        self.assertNotIn('Server-Timing', response)
+        record = logs.records[0]
+        self.assertEqual(record.request_metrics['view'], 'cattle:cattle-list-create')
+        self.assertIn('queries=', record.getMessage())
+
+    @override_settings(QUERY_BUDGETS={'cattle:market-stats': 0}, QUERY_BUDGET_STRICT=True)
+    def test_strict_budget_raises(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('cattle:market-stats'))
+
+    @override_settings(QUERY_BUDGETS={'cattle:market-stats': 0}, QUERY_BUDGET_STRICT=False)
+    def test_budget_warning(self):
+        with self.assertLogs('config.instrumentation', 'WARNING') as logs:
+            response = self.client.get(reverse('cattle:market-stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('over its budget of 0', logs.output[-1])
+
+    @override_settings(QUERY_BUDGET_STRICT=True)
+    def test_writes_are_not_budgeted(self):
+        buyer = User.objects.create_user(
+            email='buyer@example.com',
+            password='StrongPass123!',
+            first_name='Ama',
+            last_name='Owusu',
+            phone_number='+233207654321',
+            user_type='BUYER',
+        )
+        SavedSearch.objects.create(user=buyer, name='Sanga', params={'breed': 'SANGA'})
+        token = RefreshToken.for_user(self.seller).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        payload = {
+            'title': 'Sanga heifer',
+            'description': 'Calm and healthy',
+            'breed': 'SANGA',
+            'gender': 'FEMALE',
+            'age_months': 18,
+            'weight_kg': '280.00',
+            'price': '4200.00',
+            'region': 'VOLTA',
+            'city': 'Ho',
+        }
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertGreater(len(queries), CattleListCreateView.query_budget)
+        self.assertEqual(SavedSearchMatch.objects.filter(user=buyer).count(), 1)
+
+
+class BenchmarkApiTests(APITestCase):
+    """The benchmark_api management command"""
+
+    def setUp(self):
+        cache.clear()
+        seller = create_seller()
+        for _ in range(3):
+            create_cattle(seller, images=1)
+        self.directory = tempfile.mkdtemp()
+        self.baseline = f'{self.directory}/baseline.json'
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def benchmark(self, *args):
+        output = StringIO()
+        call_command(
+            'benchmark_api', '--iterations', '3', '--warmup', '1', '--scenario', 'list',
+            '--scenario', 'detail', '--scenario', 'login', '--baseline', self.baseline, *args, stdout=output
+        )
+        return output.getvalue()
+
+    def test_baseline_round_trip(self):
+        self.benchmark('--save-baseline')
+        with open(self.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        self.assertEqual(set(baseline['scenarios']), {'list', 'detail', 'login'})
+        self.assertGreater(baseline['scenarios']['list']['queries'], 0)
+
+        output = self.benchmark('--compare', '--tolerance', '100')
+        self.assertIn('No regressions', output)
+        self.assertFalse(User.objects.filter(email__endswith='@benchmark.beefline.local').exists())
+
+        baseline['scenarios']['detail']['queries'] = 0
+        with open(self.baseline, 'w') as baseline_file:
+            json.dump(baseline, baseline_file)
+        with self.assertRaisesMessage(CommandError, 'detail:'):
+            self.benchmark('--compare', '--tolerance', '100')
+
+    def test_my_listings_reads_a_seeded_seller(self):
+        # Seeded accounts may already use any fixed phone number
+        create_seller(email='benchmark-seller@beefline.local', phone_number='+233000000000')
+        responses = []
+        send = benchmark_api.Command.send
+
+        def record(command, *args):
+            response = send(command, *args)
+            responses.append(response)
+            return response
+
+        with mock.patch.object(benchmark_api.Command, 'send', record):
+            call_command(
+                'benchmark_api', '--iterations', '2', '--warmup', '0', '--scenario', 'my-listings',
+                '--baseline', self.baseline, stdout=StringIO()
+            )
+        self.assertEqual([response.json()['count'] for response in responses], [3, 3])
+
+
+class BenchmarkViewCounterTests(APITestCase):
+    """The benchmark_view_counter management command"""
+
+    def test_every_request_loads_the_listing(self):
+        cache.clear()
+        cattle = create_cattle(create_seller(), images=0)
+        retrieve_listing = CattleDetailView.retrieve_listing
+        calls = []
+
+        def record(view, *args, **kwargs):
+            calls.append(kwargs['pk'])
+            return retrieve_listing(view, *args, **kwargs)
+
+        with mock.patch.object(CattleDetailView, 'retrieve_listing', record):
+            call_command('benchmark_view_counter', '--requests', '3', stdout=StringIO())
+
+        self.assertEqual(len(calls), 6)
+        cattle.refresh_from_db()
+        self.assertEqual(cattle.view_count, 0)
+
+
+class BenchmarkSearchTests(APITestCase):
+    """The benchmark_search management command"""
+
+    def test_seeded_listings_are_rolled_back(self):
+        cache.clear()
+        seller = create_seller(email='benchmark-seller@beefline.local', phone_number='+233000000000')
+        create_cattle(seller, images=0)
+        output = StringIO()
+        call_command('benchmark_search', '--seed', '12', '--repeat', '1', 'zebu', stdout=output)
+
+        self.assertIn('Listings: 12', output.getvalue())
+        self.assertEqual(Cattle.objects.count(), 1)
+        self.assertEqual(User.objects.count(), 1)
+        self.assertEqual(self.client.get(reverse('cattle:cattle-list-create')).data['count'], 1)
+
+
+class SeedMarketplaceTests(APITestCase):
+    """The seed_marketplace management command"""
+
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def seed(self):
+        call_command(
+            'seed_marketplace', '--sellers', '3', '--buyers', '4', '--listings', '40', '--batch-size', '15',
+            '--until', '2025-06-30', '--seed', '7', stdout=StringIO()
+        )
+        return list(Cattle.objects.order_by('pk').values_list(
+            'seller__email', 'breed', 'region', 'price', 'is_sold', 'sold_date', 'created_at', 'geohash'
+        ))
+
+    def test_seeds_a_deterministic_marketplace(self):
+        listings = self.seed()
+        self.assertEqual(len(listings), 40)
+        self.assertEqual(User.objects.filter(user_type='SELLER').count(), 3)
+        self.assertEqual(User.objects.filter(user_type='BUYER').count(), 4)
+        self.assertTrue(CattleImage.objects.exists())
+        self.assertTrue(MarketPriceStat.objects.exists())
+        self.assertTrue(all(created.date().isoformat() <= '2025-06-30' for *_, created, _ in listings))
+        self.assertTrue(all(sold_date >= created for *_, sold, sold_date, created, _ in listings if sold))
+        self.assertFalse(Cattle.objects.filter(is_sold=True, is_active=True).exists())
+
+        # Renditions are seeded, so reads do not backfill them
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('cattle:cattle-list-create'))
+        self.assertFalse([query for query in queries.captured_queries if query['sql'].startswith('UPDATE')])
+
+        with self.assertRaises(CommandError):
+            self.seed()
+
+        User.objects.filter(email__startswith='seed7-').delete()
+        self.assertEqual(self.seed(), listings)
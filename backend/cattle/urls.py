@@ -2,10 +2,22 @@ from django.urls import path
 from .views import (
     CattleListCreateView,
     CattleDetailView,
+    CattleSimilarView,
     MyCattleListView,
+    MyCattleStatsView,
+    CattleImportView,
+    CattleExportView,
+    MarketPriceStatListView,
+    SavedSearchListCreateView,
+    SavedSearchDetailView,
+    SavedSearchInboxView,
+    SavedSearchInboxReadView,
     CattleImageUploadView,
+    CattleImageBulkUploadView,
+    CattleImageStatusView,
     CattleImageDeleteView,
     HealthDocumentUploadView,
+    HealthDocumentStatusView,
     HealthDocumentDeleteView,
     MarkCattleAsSoldView,
 )
@@ -16,15 +28,29 @@ urlpatterns = [
     # Cattle CRUD
     path('', CattleListCreateView.as_view(), name='cattle-list-create'),
     path('<int:pk>/', CattleDetailView.as_view(), name='cattle-detail'),
+    path('<int:pk>/similar/', CattleSimilarView.as_view(), name='cattle-similar'),
     path('my-listings/', MyCattleListView.as_view(), name='my-cattle'),
+    path('my-listings/stats/', MyCattleStatsView.as_view(), name='my-cattle-stats'),
+    path('import/', CattleImportView.as_view(), name='cattle-import'),
+    path('export/', CattleExportView.as_view(), name='cattle-export'),
+    path('market-stats/', MarketPriceStatListView.as_view(), name='market-stats'),
+    
+    # Saved searches
+    path('saved-searches/', SavedSearchListCreateView.as_view(), name='saved-search-list-create'),
+    path('saved-searches/<int:pk>/', SavedSearchDetailView.as_view(), name='saved-search-detail'),
+    path('saved-searches/inbox/', SavedSearchInboxView.as_view(), name='saved-search-inbox'),
+    path('saved-searches/inbox/read/', SavedSearchInboxReadView.as_view(), name='saved-search-inbox-read'),
     
     # Images
     path('<int:cattle_id>/images/', CattleImageUploadView.as_view(), name='image-upload'),
+    path('<int:cattle_id>/images/bulk/', CattleImageBulkUploadView.as_view(), name='image-bulk-upload'),
     path('<int:cattle_id>/images/<int:image_id>/', CattleImageDeleteView.as_view(), name='image-delete'),
+    path('<int:cattle_id>/images/<int:image_id>/status/', CattleImageStatusView.as_view(), name='image-status'),
     
     # Health Documents
     path('<int:cattle_id>/documents/', HealthDocumentUploadView.as_view(), name='document-upload'),
     path('<int:cattle_id>/documents/<int:document_id>/', HealthDocumentDeleteView.as_view(), name='document-delete'),
+    path('<int:cattle_id>/documents/<int:document_id>/status/', HealthDocumentStatusView.as_view(), name='document-status'),
     
     # Actions
     path('<int:cattle_id>/mark-sold/', MarkCattleAsSoldView.as_view(), name='mark-sold'),
@@ -0,0 +1,137 @@
+"""
+Write-behind view counter for cattle listings.
+
+Detail views record views in an in-process buffer instead of updating the
+cattle row on every request. A background thread flushes the buffer every
+VIEW_COUNT_FLUSH_INTERVAL seconds (or once VIEW_COUNT_MAX_PENDING listings are
+waiting), applying the increments in batches with F() updates. Each worker
+process flushes its own buffer, and the increments are additive, so no views
+are lost when several processes run side by side.
+"""
+import atexit
+import logging
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCountBuffer:
+    """Accumulates listing views in memory and flushes them in batches"""
+
+    def __init__(self, flush_interval=None, max_pending=None):
+        self._flush_interval = flush_interval
+        self._max_pending = max_pending
+        self._pending = defaultdict(int)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+
+    @property
+    def flush_interval(self):
+        if self._flush_interval is not None:
+            return self._flush_interval
+        return getattr(settings, 'VIEW_COUNT_FLUSH_INTERVAL', 60)
+
+    @property
+    def max_pending(self):
+        if self._max_pending is not None:
+            return self._max_pending
+        return getattr(settings, 'VIEW_COUNT_MAX_PENDING', 1000)
+
+    def add(self, cattle_id, count=1):
+        """
+        Record views for a listing.
+
+        Returns the number of views for this listing not yet written to the
+        database, including this one.
+        """
+        if self.flush_interval <= 0:
+            # Buffering disabled: write through immediately
+            self.apply({cattle_id: count})
+            return count
+
+        self._ensure_flusher()
+        with self._lock:
+            self._pending[cattle_id] += count
+            pending = self._pending[cattle_id]
+            should_flush = len(self._pending) >= self.max_pending
+
+        if should_flush:
+            self.flush()
+        return pending
+
+    def pending(self, cattle_id):
+        """Return buffered views for a listing"""
+        with self._lock:
+            return self._pending.get(cattle_id, 0)
+
+    def flush(self):
+        """Write all buffered views to the database"""
+        with self._lock:
+            counts, self._pending = self._pending, defaultdict(int)
+
+        if not counts:
+            return 0
+
+        try:
+            self.apply(counts)
+        except Exception:
+            logger.exception('Failed to flush view counts, keeping them buffered')
+            with self._lock:
+                for cattle_id, count in counts.items():
+                    self._pending[cattle_id] += count
+            return 0
+        return sum(counts.values())
+
+    @staticmethod
+    def apply(counts):
+        """Apply {cattle_id: views} with one UPDATE per distinct increment"""
+        from .models import Cattle
+
+        by_increment = defaultdict(list)
+        for cattle_id, count in counts.items():
+            by_increment[count].append(cattle_id)
+
+        with transaction.atomic():
+            for count, cattle_ids in by_increment.items():
+                Cattle.objects.filter(pk__in=cattle_ids).update(
+                    view_count=F('view_count') + count
+                )
+
+    def stop(self):
+        """Stop the background flusher and write out remaining views"""
+        self._stopped.set()
+        self.flush()
+
+    def _ensure_flusher(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run,
+                name='view-count-flusher',
+                daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def _run(self):
+        from django.db import connection
+
+        while not self._stopped.wait(self.flush_interval):
+            self.flush()
+            connection.close()
+
+
+view_count_buffer = ViewCountBuffer()
+
+
+def record_view(cattle_id):
+    """Record a detail view for a listing, returning its unflushed views"""
+    return view_count_buffer.add(cattle_id)
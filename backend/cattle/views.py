@@ -1,18 +1,76 @@
-from rest_framework import generics, permissions, status, filters
+from functools import partial
+from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.urls import reverse
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
-from .models import Cattle, CattleImage, HealthDocument
+from django.db import transaction
+from django.db.models import Prefetch, Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.conf import settings
+from config.instrumentation import SerializerTimingMixin, time_serializer
+from .models import Cattle, CattleImage, HealthDocument, MarketPriceStat, SavedSearch, SavedSearchMatch
+from .bulk_import import ImportFormatError, detect_format, import_listings
+from .export import EXPORT_FORMATS, export_filename, export_stream
+from .conditional import conditional_response, detail_validators, list_etag
+from .facets import FacetError, facet_counts, requested_facets
+from .filters import CattleFilter, MarketPriceStatFilter
+from .pagination import CattleKeysetPagination
+from .processing import processing_is_async, run_processing, schedule_processing, upload_fields
+from .response_cache import bump_generation, cached_anonymous_response
+from .saved_searches import bump_inbox_version, get_inbox_version
+from .search import CattleSearchFilter, CattleOrderingFilter
+from .seller_stats import get_seller_stats
+from .similarity import similarity_index
+from .view_counter import record_view
 from .serializers import (
     CattleListSerializer,
     CattleDetailSerializer,
     CattleCreateUpdateSerializer,
+    CattleImageSerializer,
     CattleImageUploadSerializer,
+    CattleImageDeferredUploadSerializer,
+    HealthDocumentSerializer,
+    MarketPriceStatSerializer,
     HealthDocumentUploadSerializer,
+    SavedSearchSerializer,
+    SavedSearchMatchSerializer,
 )
 
 
+def process_saved_upload(request, instance, serializer_class, status_url_name):
+    """
+    Process a saved upload, or queue it in async mode.
+    
+    Returns (status code, data): 201 with the processed upload, 202 with a
+    status URL to poll, or 400 if the file failed verification.
+    """
+    if processing_is_async():
+        schedule_processing(instance)
+        status_url = reverse(status_url_name, args=[instance.cattle_id, instance.pk])
+        return status.HTTP_202_ACCEPTED, {
+            'id': instance.pk,
+            'processing_status': instance.processing_status,
+            'status_url': request.build_absolute_uri(status_url),
+        }
+    
+    run_processing(instance)
+    if instance.processing_status == 'FAILED':
+        error = instance.processing_error
+        instance.delete()
+        # The rejected file belongs to no listing; remove it from storage too
+        getattr(instance, upload_fields(type(instance))[1]).delete(save=False)
+        return status.HTTP_400_BAD_REQUEST, {'error': error}
+    return status.HTTP_201_CREATED, serializer_class(instance, context={'request': request}).data
+
+
+def upload_response(request, instance, serializer_class, status_url_name):
+    """Process a saved upload and build the endpoint response"""
+    status_code, data = process_saved_upload(request, instance, serializer_class, status_url_name)
+    return Response(data, status=status_code)
+
+
 class IsSellerOrReadOnly(permissions.BasePermission):
     """
     Custom permission to only allow sellers to create/edit cattle.
@@ -34,37 +92,32 @@ class IsSellerOrReadOnly(permissions.BasePermission):
         return obj.seller == request.user
 
 
-class CattleListCreateView(generics.ListCreateAPIView):
+class CattleListCreateView(SerializerTimingMixin, generics.ListCreateAPIView):
     """
     List all active cattle or create a new cattle listing
     """
     permission_classes = [IsSellerOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = CattleKeysetPagination
+    # Queries per read (see config.instrumentation)
+    query_budget = 8
+    use_count_strategy = True
+    filter_backends = [DjangoFilterBackend, CattleSearchFilter, CattleOrderingFilter]
     
     # Filtering
-    filterset_fields = {
-        'breed': ['exact'],
-        'gender': ['exact'],
-        'region': ['exact'],
-        'price': ['gte', 'lte'],
-        'age_months': ['gte', 'lte'],
-        'weight_kg': ['gte', 'lte'],
-        'health_status': ['exact'],
-        'vaccination_status': ['exact'],
-    }
-    
-    # Search
+    filterset_class = CattleFilter
+    
+    # Search (full-text when CATTLE_SEARCH_BACKEND is 'postgres')
     search_fields = ['title', 'description', 'city']
     
     # Ordering
-    ordering_fields = ['price', 'age_months', 'weight_kg', 'created_at', 'view_count']
+    ordering_fields = ['price', 'age_months', 'weight_kg', 'created_at', 'view_count', 'distance_km']
     ordering = ['-created_at']
     
     def get_queryset(self):
         queryset = Cattle.objects.filter(
             is_active=True,
             is_sold=False
-        ).select_related('seller').prefetch_related('images')
+        ).select_related('seller').with_primary_image().with_document_flags()
         return queryset
     
     def get_serializer_class(self):
@@ -72,11 +125,37 @@ class CattleListCreateView(generics.ListCreateAPIView):
             return CattleCreateUpdateSerializer
         return CattleListSerializer
     
+    def list(self, request, *args, **kwargs):
+        get_response = partial(
+            cached_anonymous_response,
+            request,
+            'cattle-list',
+            partial(self.list_with_facets, request, *args, **kwargs)
+        )
+        return conditional_response(
+            request,
+            get_response,
+            etag=list_etag(request, 'cattle-list')
+        )
+    
+    def list_with_facets(self, request, *args, **kwargs):
+        """List listings, adding per-value counts when `?facets=` is given"""
+        try:
+            facets = requested_facets(request)
+        except FacetError as exc:
+            return Response({'facets': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        response = super().list(request, *args, **kwargs)
+        if facets:
+            searched = CattleSearchFilter().filter_queryset(request, self.get_queryset(), self)
+            response.data['facets'] = facet_counts(self, request, searched, facets)
+        return response
+    
     def perform_create(self, serializer):
         serializer.save()
 
 
-class CattleDetailView(generics.RetrieveUpdateDestroyAPIView):
+class CattleDetailView(SerializerTimingMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update or delete a cattle listing
     """
@@ -90,29 +169,301 @@ class CattleDetailView(generics.RetrieveUpdateDestroyAPIView):
     
     def get_queryset(self):
         return Cattle.objects.select_related('seller').prefetch_related(
-            'images',
-            'health_documents'
+            # Uploads still being verified (or failed) are not public; sellers poll their status URLs
+            Prefetch('images', queryset=CattleImage.objects.filter(processing_status='READY')),
+            Prefetch('health_documents', queryset=HealthDocument.objects.filter(processing_status='READY'))
         )
     
     def retrieve(self, request, *args, **kwargs):
+        count_view = partial(record_view, int(kwargs['pk']))
+        etag, last_modified = detail_validators(kwargs['pk'])
+        get_response = partial(
+            cached_anonymous_response,
+            request,
+            'cattle-detail',
+            partial(self.retrieve_listing, request, *args, **kwargs),
+            on_hit=count_view
+        )
+        # Unchanged listings get a 304, but the view is still counted
+        return conditional_response(
+            request,
+            get_response,
+            etag=etag,
+            last_modified=last_modified,
+            on_not_modified=count_view
+        )
+    
+    def retrieve_listing(self, request, *args, **kwargs):
         instance = self.get_object()
-        # Increment view count
-        instance.increment_view_count()
+        # Buffer the view; include views not yet flushed in the response
+        instance.view_count += record_view(instance.pk)
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
 
-class MyCattleListView(generics.ListAPIView):
+class CattleSimilarView(APIView):
+    """
+    Listings most similar to a listing (see cattle.similarity)
+    
+    Returns up to `limit` active listings, most similar first.
+    """
+    permission_classes = [permissions.AllowAny]
+    query_budget = 6
+    default_limit = 8
+    max_limit = 24
+    
+    def get(self, request, pk):
+        cattle = Cattle.objects.filter(pk=pk).first()
+        if cattle is None:
+            return Response({'error': 'Cattle not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = max(1, min(limit, self.max_limit))
+        
+        return cached_anonymous_response(
+            request,
+            'cattle-similar',
+            partial(self.similar_listings, request, cattle, limit)
+        )
+    
+    def similar_listings(self, request, cattle, limit):
+        matches = similarity_index.similar_to(cattle, k=limit)
+        listings = Cattle.objects.filter(
+            is_active=True,
+            is_sold=False
+        ).select_related('seller').with_primary_image().with_document_flags().in_bulk(
+            [cattle_id for cattle_id, _ in matches]
+        )
+        # Keep the index order; skip listings changed by another process since the last rebuild
+        results = [listings[cattle_id] for cattle_id, _ in matches if cattle_id in listings]
+        serializer = time_serializer(CattleListSerializer(results, many=True, context={'request': request}))
+        return Response({'results': serializer.data})
+
+
+class MyCattleListView(SerializerTimingMixin, generics.ListAPIView):
     """
     List all cattle listings for the current user
     """
     serializer_class = CattleListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CattleKeysetPagination
+    query_budget = 6
     
     def get_queryset(self):
         return Cattle.objects.filter(
             seller=self.request.user
-        ).select_related('seller').prefetch_related('images').order_by('-created_at')
+        ).select_related('seller').with_primary_image().with_document_flags().order_by('-created_at')
+    
+    def list(self, request, *args, **kwargs):
+        return conditional_response(
+            request,
+            partial(super().list, request, *args, **kwargs),
+            etag=list_etag(request, 'my-cattle')
+        )
+
+
+class MyCattleStatsView(APIView):
+    """
+    Dashboard statistics for the current user's listings
+    
+    Counts, views, average days to sale and price totals, computed with
+    one aggregate query and cached per seller (see cattle.seller_stats).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 2
+    
+    def get(self, request):
+        return Response(get_seller_stats(request.user.pk))
+
+
+class CattleExportView(generics.GenericAPIView):
+    """
+    Stream all active listings matching the browse filters as CSV or NDJSON
+    
+    Accepts the same filter, search and ordering parameters as the browse
+    endpoint, plus `export_format` (csv or ndjson) and `compress=gzip`.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = CattleListCreateView.filter_backends
+    filterset_class = CattleListCreateView.filterset_class
+    search_fields = CattleListCreateView.search_fields
+    ordering_fields = CattleListCreateView.ordering_fields
+    ordering = CattleListCreateView.ordering
+    
+    def get_queryset(self):
+        return Cattle.objects.filter(is_active=True, is_sold=False).with_document_flags()
+    
+    def get(self, request):
+        file_format = request.query_params.get('export_format', 'csv')
+        if file_format not in EXPORT_FORMATS:
+            return Response(
+                {'export_format': f'Choose one of: {", ".join(EXPORT_FORMATS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        compress = request.query_params.get('compress') == 'gzip'
+        
+        queryset = self.filter_queryset(self.get_queryset())
+        content_type = 'application/gzip' if compress else EXPORT_FORMATS[file_format][0]
+        response = StreamingHttpResponse(
+            export_stream(queryset, file_format, compress=compress),
+            content_type=content_type
+        )
+        filename = export_filename(file_format, compress=compress)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class MarketPriceStatListView(SerializerTimingMixin, generics.ListAPIView):
+    """
+    Market price index: monthly price statistics per breed, region and gender
+    
+    Reads precomputed buckets (see cattle.market); filter with `kind`
+    (LISTED or SOLD), `breed`, `region`, `gender`, `month`, `month_from`
+    and `month_to` (YYYY-MM-DD, months are keyed by their first day).
+    """
+    queryset = MarketPriceStat.objects.all()
+    serializer_class = MarketPriceStatSerializer
+    permission_classes = [permissions.AllowAny]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = MarketPriceStatFilter
+
+
+class SavedSearchListCreateView(SerializerTimingMixin, generics.ListCreateAPIView):
+    """
+    List or create the current user's saved searches
+    
+    New and reactivated listings matching an active saved search are added
+    to the user's inbox (see cattle.saved_searches).
+    """
+    serializer_class = SavedSearchSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+    
+    def get_queryset(self):
+        return SavedSearch.objects.filter(user=self.request.user)
+    
+    def create(self, request, *args, **kwargs):
+        limit = getattr(settings, 'SAVED_SEARCH_MAX_PER_USER', 20)
+        if self.get_queryset().count() >= limit:
+            return Response(
+                {'error': f'You can have at most {limit} saved searches'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return super().create(request, *args, **kwargs)
+
+
+class SavedSearchDetailView(SerializerTimingMixin, generics.RetrieveUpdateDestroyAPIView):
+    """
+    Retrieve, update or delete one of the current user's saved searches
+    """
+    serializer_class = SavedSearchSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        return SavedSearch.objects.filter(user=self.request.user)
+
+
+class SavedSearchInboxView(SerializerTimingMixin, generics.ListAPIView):
+    """
+    Listings that matched the current user's saved searches, newest first
+    
+    Pass `since=<id>` to get only entries newer than the last one seen and
+    `unread=true` for unread entries. Responses carry an ETag that changes
+    only when the inbox or listing data changes, so polling is cheap.
+    """
+    serializer_class = SavedSearchMatchSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 6
+    
+    def get_queryset(self):
+        queryset = SavedSearchMatch.objects.filter(user=self.request.user).select_related(
+            'saved_search'
+        ).prefetch_related(
+            Prefetch(
+                'cattle',
+                queryset=Cattle.objects.select_related('seller').with_primary_image().with_document_flags()
+            )
+        )
+        since = self.request.query_params.get('since')
+        if since and since.isdigit():
+            queryset = queryset.filter(id__gt=int(since))
+        if self.request.query_params.get('unread') in ('true', '1'):
+            queryset = queryset.filter(is_read=False)
+        return queryset
+    
+    def list(self, request, *args, **kwargs):
+        version = get_inbox_version(request.user.pk)
+        return conditional_response(
+            request,
+            partial(super().list, request, *args, **kwargs),
+            etag=list_etag(request, f'saved-search-inbox:{version}')
+        )
+
+
+class SavedSearchInboxReadView(APIView):
+    """
+    Mark inbox entries as read
+    
+    Accepts a list of entry `ids`, or `up_to` to mark every entry up to and
+    including that id.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        matches = SavedSearchMatch.objects.filter(user=request.user, is_read=False)
+        ids = request.data.get('ids')
+        up_to = request.data.get('up_to')
+        try:
+            if ids is not None:
+                matches = matches.filter(id__in=[int(match_id) for match_id in ids])
+            elif up_to is not None:
+                matches = matches.filter(id__lte=int(up_to))
+            else:
+                return Response({'error': 'Provide ids or up_to'}, status=status.HTTP_400_BAD_REQUEST)
+        except (TypeError, ValueError):
+            return Response({'error': 'ids and up_to must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        updated = matches.update(is_read=True)
+        if updated:
+            bump_inbox_version(request.user.pk)
+        return Response({'updated': updated}, status=status.HTTP_200_OK)
+
+
+class CattleImportView(APIView):
+    """
+    Bulk import listings from a CSV or JSON Lines file
+    
+    Upload the file as `file`; the format comes from the file extension or
+    an explicit `file_format` (csv or jsonl). Rows are validated like
+    single-listing creates and reported per row.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        if not request.user.can_sell():
+            return Response(
+                {'error': 'Only sellers can create cattle listings.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response(
+                {'error': 'No file provided'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            file_format = detect_format(upload.name, request.data.get('file_format'))
+            report = import_listings(upload, file_format, request.user)
+        except ImportFormatError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        response_status = status.HTTP_201_CREATED if report.created else status.HTTP_400_BAD_REQUEST
+        return Response(report.as_dict(), status=response_status)
 
 
 class CattleImageUploadView(APIView):
@@ -130,17 +481,165 @@ class CattleImageUploadView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        serializer = CattleImageUploadSerializer(
+        # Async mode skips decoding the image in the request
+        if processing_is_async():
+            serializer_class = CattleImageDeferredUploadSerializer
+        else:
+            serializer_class = CattleImageUploadSerializer
+        serializer = serializer_class(
             data=request.data,
             context={'cattle': cattle}
         )
         
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            image = serializer.save(processing_status='PENDING')
+            return upload_response(request, image, CattleImageSerializer, 'cattle:image-status')
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class CattleImageBulkUploadView(APIView):
+    """
+    Upload several images for a cattle listing in one request
+    
+    Send the files as `images` (repeated), optional `captions` in the same
+    order and an optional `primary_index` naming the new primary image.
+    Valid files are stored even if others fail; results are reported per file.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_files = 10
+    
+    def post(self, request, cattle_id):
+        try:
+            cattle = Cattle.objects.get(id=cattle_id, seller=request.user)
+        except Cattle.DoesNotExist:
+            return Response(
+                {'error': 'Cattle not found or you do not have permission'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        files = request.FILES.getlist('images')
+        if not files:
+            return Response(
+                {'error': 'No images provided'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(files) > self.max_files:
+            return Response(
+                {'error': f'You can upload at most {self.max_files} images at once'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            primary_index = request.data.get('primary_index')
+            primary_index = int(primary_index) if primary_index not in (None, '') else None
+        except ValueError:
+            return Response(
+                {'primary_index': 'A valid integer is required.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        captions = request.data.getlist('captions') if hasattr(request.data, 'getlist') else []
+        
+        # Validate every file before writing anything
+        if processing_is_async():
+            serializer_class = CattleImageDeferredUploadSerializer
+        else:
+            serializer_class = CattleImageUploadSerializer
+        results = {}
+        images = []
+        for index, upload in enumerate(files):
+            serializer = serializer_class(
+                data={'image': upload, 'caption': captions[index] if index < len(captions) else ''},
+                context={'cattle': cattle}
+            )
+            if serializer.is_valid():
+                serializer.validated_data.pop('is_primary', None)
+                images.append(CattleImage(
+                    cattle=cattle,
+                    is_primary=(index == primary_index),
+                    processing_status='PENDING',
+                    **serializer.validated_data
+                ))
+            else:
+                results[index] = {'success': False, 'errors': serializer.errors}
+        
+        if images:
+            with transaction.atomic():
+                # One UPDATE instead of one per image in CattleImage.save()
+                if any(image.is_primary for image in images):
+                    CattleImage.objects.filter(cattle=cattle, is_primary=True).update(is_primary=False)
+                CattleImage.objects.bulk_create(images)
+                Cattle.objects.filter(pk=cattle.pk).update(updated_at=timezone.now())
+            # bulk_create skips model signals
+            bump_generation()
+        
+        created = iter(images)
+        for index in range(len(files)):
+            if index in results:
+                continue
+            status_code, data = process_saved_upload(
+                request, next(created), CattleImageSerializer, 'cattle:image-status'
+            )
+            if status_code == status.HTTP_400_BAD_REQUEST:
+                results[index] = {'success': False, 'errors': data}
+            else:
+                results[index] = {'success': True, 'image': data}
+        
+        succeeded = sum(result['success'] for result in results.values())
+        if not succeeded:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif processing_is_async():
+            response_status = status.HTTP_202_ACCEPTED
+        else:
+            response_status = status.HTTP_201_CREATED
+        return Response({
+            'created': succeeded,
+            'failed': len(files) - succeeded,
+            'results': [
+                {'index': index, 'filename': files[index].name, **results[index]}
+                for index in range(len(files))
+            ],
+        }, status=response_status)
+
+
+class UploadStatusView(APIView):
+    """
+    Poll the processing status of an uploaded file
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    model = None
+    serializer_class = None
+    lookup_url_kwarg = None
+    not_found_message = 'Upload not found or you do not have permission'
+    
+    def get(self, request, cattle_id, **kwargs):
+        try:
+            upload = self.model.objects.get(
+                id=kwargs[self.lookup_url_kwarg],
+                cattle_id=cattle_id,
+                cattle__seller=request.user
+            )
+        except self.model.DoesNotExist:
+            return Response(
+                {'error': self.not_found_message},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        data = self.serializer_class(upload, context={'request': request}).data
+        data['processing_error'] = upload.processing_error
+        data['checksum'] = upload.checksum
+        return Response(data)
+
+
+class CattleImageStatusView(UploadStatusView):
+    """
+    Poll the processing status of a cattle image
+    """
+    model = CattleImage
+    serializer_class = CattleImageSerializer
+    lookup_url_kwarg = 'image_id'
+    not_found_message = 'Image not found or you do not have permission'
+
+
 class CattleImageDeleteView(APIView):
     """
     Delete a cattle image
@@ -187,11 +686,21 @@ class HealthDocumentUploadView(APIView):
         )
         
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            document = serializer.save(processing_status='PENDING')
+            return upload_response(request, document, HealthDocumentSerializer, 'cattle:document-status')
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class HealthDocumentStatusView(UploadStatusView):
+    """
+    Poll the processing status of a health document
+    """
+    model = HealthDocument
+    serializer_class = HealthDocumentSerializer
+    lookup_url_kwarg = 'document_id'
+    not_found_message = 'Document not found or you do not have permission'
+
+
 class HealthDocumentDeleteView(APIView):
     """
     Delete a health document
@@ -16,19 +16,35 @@ API_ENDPOINTS = {
     },
     "Cattle": {
         "List All Cattle": "GET /api/cattle/",
+        "Filter Facet Counts": "GET /api/cattle/?facets=breed,region,gender,health_status,vaccination_status",
         "Create Cattle": "POST /api/cattle/",
         "Get Cattle Detail": "GET /api/cattle/<id>/",
+        "Similar Cattle": "GET /api/cattle/<id>/similar/?limit=8",
         "Update Cattle": "PUT/PATCH /api/cattle/<id>/",
         "Delete Cattle": "DELETE /api/cattle/<id>/",
         "My Listings": "GET /api/cattle/my-listings/",
+        "My Listing Stats": "GET /api/cattle/my-listings/stats/",
+        "Bulk Import (CSV/JSONL)": "POST /api/cattle/import/",
+        "Export (CSV/NDJSON)": "GET /api/cattle/export/?export_format=csv&compress=gzip",
+        "Market Price Index": "GET /api/cattle/market-stats/?breed=ZEBU&region=NORTHERN&kind=SOLD",
         "Mark as Sold": "POST /api/cattle/<id>/mark-sold/",
     },
     "Cattle Images": {
         "Upload Image": "POST /api/cattle/<cattle_id>/images/",
+        "Bulk Upload Images": "POST /api/cattle/<cattle_id>/images/bulk/",
+        "Image Status": "GET /api/cattle/<cattle_id>/images/<image_id>/status/",
         "Delete Image": "DELETE /api/cattle/<cattle_id>/images/<image_id>/",
     },
+    "Saved Searches": {
+        "List Saved Searches": "GET /api/cattle/saved-searches/",
+        "Create Saved Search": "POST /api/cattle/saved-searches/",
+        "Update/Delete Saved Search": "PUT/PATCH/DELETE /api/cattle/saved-searches/<id>/",
+        "Inbox": "GET /api/cattle/saved-searches/inbox/?since=<id>&unread=true",
+        "Mark Inbox Read": "POST /api/cattle/saved-searches/inbox/read/",
+    },
     "Health Documents": {
         "Upload Document": "POST /api/cattle/<cattle_id>/documents/",
+        "Document Status": "GET /api/cattle/<cattle_id>/documents/<document_id>/status/",
         "Delete Document": "DELETE /api/cattle/<cattle_id>/documents/<document_id>/",
     },
 }
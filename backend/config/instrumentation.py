@@ -0,0 +1,209 @@
+"""
+Per-request SQL and timing instrumentation.
+
+RequestMetricsMiddleware records for every request:
+
+- the number of SQL queries and the time spent running them, through an
+  execute_wrapper on every database connection,
+- the time spent building serializer data in views using
+  SerializerTimingMixin (or serializers passed to time_serializer; only the
+  top-level representation is timed, and queries made while serializing
+  count towards both),
+- the time spent rendering the response,
+- named timings recorded by other modules through
+  `current_metrics().record_timing()` (e.g. `revocation` for refresh-token
+  checks in users.token_revocation), and
+- the total time spent in the middleware and view stack.
+
+They are logged as one `key=value` line per request on the
+`config.instrumentation` logger (at INFO) and, when REQUEST_METRICS_HEADER
+is on, sent in a Server-Timing header. Bodies of streaming responses are
+produced after the middleware returns and are not measured.
+
+Every view has a query budget for safe (read) requests: its `query_budget`
+attribute (None for no budget), else its URL name's entry in QUERY_BUDGETS,
+else DEFAULT_QUERY_BUDGET. Writes are not budgeted, since their cost grows
+with signal work such as saved-search matching. A read over budget logs a
+warning, or raises QueryBudgetExceeded when QUERY_BUDGET_STRICT is on (as in
+config.test_settings).
+"""
+import contextvars
+import logging
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+
+logger = logging.getLogger(__name__)
+
+_current_metrics = contextvars.ContextVar('request_metrics', default=None)
+
+_NO_BUDGET = object()
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised in strict mode when a request runs more queries than its view allows"""
+
+
+class RequestMetrics:
+    """Counters for a single request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.render_time = 0.0
+        self.timings = {}
+        self.serializing = False
+        self.render_started = None
+
+    def record_query(self, execute, sql, params, many, context):
+        """Database execute_wrapper"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    def record_timing(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def rendered(self, response):
+        if self.render_started is not None:
+            self.render_time += time.perf_counter() - self.render_started
+            self.render_started = None
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def total_time(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def as_dict(self):
+        return {
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 2),
+            'serializer_ms': round(self.serializer_time * 1000, 2),
+            'render_ms': round(self.render_time * 1000, 2),
+            **{f'{name}_ms': round(seconds * 1000, 2) for name, seconds in self.timings.items()},
+            'total_ms': round(self.total_time * 1000, 2),
+        }
+
+    def server_timing(self):
+        """Return a Server-Timing header value (durations in milliseconds)"""
+        values = self.as_dict()
+        return ', '.join([
+            f'db;dur={values["db_ms"]};desc="{self.queries} queries"',
+            f'serializer;dur={values["serializer_ms"]}',
+            f'render;dur={values["render_ms"]}',
+            *[f'{name};dur={values[name + "_ms"]}' for name in self.timings],
+            f'total;dur={values["total_ms"]}',
+        ])
+
+
+def current_metrics():
+    """Return the metrics of the request being handled, or None"""
+    return _current_metrics.get()
+
+
+def time_serializer(serializer):
+    """
+    Count the serializer's representation towards the request's serializer
+    time. Only this instance is wrapped: `.data` calls its to_representation,
+    while list children and nested serializers are called through their own.
+    """
+    to_representation = serializer.to_representation
+
+    def timed_to_representation(instance):
+        metrics = _current_metrics.get()
+        if metrics is None or metrics.serializing:
+            return to_representation(instance)
+        metrics.serializing = True
+        started = time.perf_counter()
+        try:
+            return to_representation(instance)
+        finally:
+            metrics.serializer_time += time.perf_counter() - started
+            metrics.serializing = False
+
+    serializer.to_representation = timed_to_representation
+    return serializer
+
+
+class SerializerTimingMixin:
+    """Generic view mixin timing the serializers returned by get_serializer()"""
+
+    def get_serializer(self, *args, **kwargs):
+        return time_serializer(super().get_serializer(*args, **kwargs))
+
+
+def query_budget(request):
+    """Return the query budget of the view that handled a request, or None"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None or request.method not in SAFE_METHODS:
+        return None
+    view_class = getattr(match.func, 'view_class', None)
+    budget = getattr(view_class, 'query_budget', _NO_BUDGET)
+    if budget is not _NO_BUDGET:
+        return budget
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    if match.view_name in budgets:
+        return budgets[match.view_name]
+    return getattr(settings, 'DEFAULT_QUERY_BUDGET', None)
+
+
+class RequestMetricsMiddleware:
+    """Record query count and timings for each request (see module docstring)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics.record_query))
+                response = self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        metrics.finish()
+        self.report(request, response, metrics)
+        return response
+
+    def process_template_response(self, request, response):
+        # Called just before DRF responses are rendered
+        metrics = _current_metrics.get()
+        if metrics is not None:
+            metrics.render_started = time.perf_counter()
+            response.add_post_render_callback(metrics.rendered)
+        return response
+
+    def report(self, request, response, metrics):
+        match = getattr(request, 'resolver_match', None)
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else '-',
+            'status': response.status_code,
+            **metrics.as_dict(),
+        }
+        logger.info(
+            ' '.join(f'{name}={value}' for name, value in fields.items()),
+            extra={'request_metrics': fields}
+        )
+        if getattr(settings, 'REQUEST_METRICS_HEADER', False):
+            response['Server-Timing'] = metrics.server_timing()
+
+        budget = query_budget(request)
+        if budget is not None and metrics.queries > budget:
+            message = f'{fields["view"]} ran {metrics.queries} queries, over its budget of {budget}'
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message, extra={'request_metrics': fields})
@@ -59,6 +59,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'config.instrumentation.RequestMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS - must be before CommonMiddleware
     'django.middleware.common.CommonMiddleware',
@@ -158,11 +159,21 @@ AUTH_USER_MODEL = 'users.User'
 CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', 'http://localhost:5173,http://localhost:3000').split(',')
 CORS_ALLOW_CREDENTIALS = True
 
+# Cache Configuration
+# Local memory by default; set CACHE_BACKEND/CACHE_LOCATION to a shared cache
+# (e.g. django.core.cache.backends.redis.RedisCache) in production
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
 # REST Framework Configuration
 REST_FRAMEWORK = {
     # Use JWT for authentication
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     # Require authentication by default (can override per view)
     'DEFAULT_PERMISSION_CLASSES': (
@@ -185,4 +196,108 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.RevocableTokenRefreshSerializer',
 }
+
+# View Counter Settings
+# Detail views are buffered in memory and flushed in batches every
+# VIEW_COUNT_FLUSH_INTERVAL seconds (0 writes every view immediately)
+VIEW_COUNT_FLUSH_INTERVAL = int(os.getenv('VIEW_COUNT_FLUSH_INTERVAL', '60'))
+VIEW_COUNT_MAX_PENDING = int(os.getenv('VIEW_COUNT_MAX_PENDING', '1000'))
+
+# Search Settings
+# 'postgres' uses the weighted full-text search vector on PostgreSQL,
+# 'basic' uses DRF's icontains search over title, description and city
+CATTLE_SEARCH_BACKEND = os.getenv('CATTLE_SEARCH_BACKEND', 'basic')
+
+# Result Count Settings
+# Exact list counts are cached per filter set for CATTLE_COUNT_CACHE_TIMEOUT
+# seconds; on PostgreSQL, queries estimated to match at least
+# CATTLE_COUNT_ESTIMATE_THRESHOLD rows report the planner estimate (0 disables)
+CATTLE_COUNT_CACHE_TIMEOUT = int(os.getenv('CATTLE_COUNT_CACHE_TIMEOUT', '30'))
+CATTLE_COUNT_ESTIMATE_THRESHOLD = int(os.getenv('CATTLE_COUNT_ESTIMATE_THRESHOLD', '10000'))
+
+# Response Cache Settings
+# Anonymous browse/detail responses are cached for this many seconds (0 disables).
+# Caching and list ETags need a cache shared by all workers; a local-memory
+# cache is only used when CATTLE_RESPONSE_CACHE_ALLOW_LOCAL is on (single process)
+CATTLE_RESPONSE_CACHE_ALIAS = os.getenv('CATTLE_RESPONSE_CACHE_ALIAS', 'default')
+CATTLE_RESPONSE_CACHE_TIMEOUT = int(os.getenv('CATTLE_RESPONSE_CACHE_TIMEOUT', '300'))
+CATTLE_RESPONSE_CACHE_ALLOW_LOCAL = os.getenv('CATTLE_RESPONSE_CACHE_ALLOW_LOCAL', 'False') == 'True'
+
+# Upload Processing Settings
+# 'sync' verifies and processes uploads inside the request; 'async' returns
+# 202 and processes them in a local pool of UPLOAD_PROCESSING_WORKERS
+# processes (0 processes inline after commit)
+UPLOAD_PROCESSING_MODE = os.getenv('UPLOAD_PROCESSING_MODE', 'sync')
+UPLOAD_PROCESSING_WORKERS = int(os.getenv('UPLOAD_PROCESSING_WORKERS', '2'))
+UPLOAD_MAX_IMAGE_EDGE = int(os.getenv('UPLOAD_MAX_IMAGE_EDGE', '2560'))
+
+# Bulk Import Settings
+# Imported rows are inserted in batches of CATTLE_IMPORT_BATCH_SIZE; the error
+# report keeps at most CATTLE_IMPORT_MAX_ERRORS rows
+CATTLE_IMPORT_BATCH_SIZE = int(os.getenv('CATTLE_IMPORT_BATCH_SIZE', '500'))
+CATTLE_IMPORT_MAX_ERRORS = int(os.getenv('CATTLE_IMPORT_MAX_ERRORS', '1000'))
+
+# Export Settings
+# Rows fetched from the database and written per chunk of a streamed export
+CATTLE_EXPORT_CHUNK_SIZE = int(os.getenv('CATTLE_EXPORT_CHUNK_SIZE', '2000'))
+
+# Similar Listings Settings
+# Each process rebuilds its in-memory similarity index from the database once
+# it is older than this many seconds (writes in the same process apply immediately)
+SIMILARITY_INDEX_MAX_AGE = int(os.getenv('SIMILARITY_INDEX_MAX_AGE', '300'))
+
+# Saved Search Settings
+# Maximum number of saved searches per user
+SAVED_SEARCH_MAX_PER_USER = int(os.getenv('SAVED_SEARCH_MAX_PER_USER', '20'))
+
+# Seller Dashboard Settings
+# Cached dashboard statistics are dropped on the seller's writes; the timeout
+# bounds how far behind buffered view counts can be
+SELLER_STATS_CACHE_TIMEOUT = int(os.getenv('SELLER_STATS_CACHE_TIMEOUT', '300'))
+
+# Request Metrics Settings
+# Send query count and db/serializer/render/total timings in a Server-Timing header
+REQUEST_METRICS_HEADER = os.getenv('REQUEST_METRICS_HEADER', str(DEBUG)) == 'True'
+# Queries allowed per request, unless the view sets `query_budget` or is listed
+# (by URL name, e.g. 'cattle:cattle-detail') in QUERY_BUDGETS
+DEFAULT_QUERY_BUDGET = int(os.getenv('DEFAULT_QUERY_BUDGET', '20'))
+QUERY_BUDGETS = {}
+# Raise instead of logging a warning when a request goes over budget (on in config.test_settings)
+QUERY_BUDGET_STRICT = os.getenv('QUERY_BUDGET_STRICT', 'False') == 'True'
+
+# Logging
+# Set REQUEST_METRICS_LOG_LEVEL=INFO to log a metrics line for every request
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'config.instrumentation': {
+            'handlers': ['console'],
+            'level': os.getenv('REQUEST_METRICS_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
+# Authentication Settings
+# Users of read-only JWT requests are cached for this many seconds (0 disables);
+# saving or deleting a user drops the entry
+JWT_USER_CACHE_TIMEOUT = int(os.getenv('JWT_USER_CACHE_TIMEOUT', '60'))
+# Failed logins are counted in the cache over a sliding window (see users.login_throttle);
+# an email reaching LOGIN_THROTTLE_ATTEMPTS is locked for LOGIN_LOCK_MINUTES
+LOGIN_THROTTLE_ATTEMPTS = int(os.getenv('LOGIN_THROTTLE_ATTEMPTS', '5'))
+LOGIN_THROTTLE_IP_ATTEMPTS = int(os.getenv('LOGIN_THROTTLE_IP_ATTEMPTS', '20'))
+LOGIN_THROTTLE_WINDOW = int(os.getenv('LOGIN_THROTTLE_WINDOW', '1800'))
+LOGIN_THROTTLE_BUCKETS = int(os.getenv('LOGIN_THROTTLE_BUCKETS', '6'))
+LOGIN_LOCK_MINUTES = int(os.getenv('LOGIN_LOCK_MINUTES', '30'))
+# Revoked refresh tokens are looked up only when this per-process Bloom filter
+# may contain them (see users.token_revocation)
+TOKEN_REVOCATION_FILTER_CAPACITY = int(os.getenv('TOKEN_REVOCATION_FILTER_CAPACITY', '100000'))
+TOKEN_REVOCATION_FILTER_ERROR_RATE = float(os.getenv('TOKEN_REVOCATION_FILTER_ERROR_RATE', '0.01'))
@@ -0,0 +1,15 @@
+"""
+Settings for running the test suite:
+
+    python manage.py test --settings=config.test_settings
+"""
+from .settings import *  # noqa: F401,F403
+
+# Fail tests on reads that go over their view's query budget (see config.instrumentation)
+QUERY_BUDGET_STRICT = True
+
+# Tests run in one process, so the local-memory cache can back the response cache
+CATTLE_RESPONSE_CACHE_ALLOW_LOCAL = True
+
+# Run upload processing inline and leave missing renditions unqueued, without worker processes
+UPLOAD_PROCESSING_WORKERS = 0
@@ -26,15 +26,29 @@ def api_root(request):
                 'list_all': '/api/cattle/',
                 'create': '/api/cattle/',
                 'detail': '/api/cattle/<id>/',
+                'similar': '/api/cattle/<id>/similar/',
                 'my_listings': '/api/cattle/my-listings/',
+                'my_listing_stats': '/api/cattle/my-listings/stats/',
+                'import': '/api/cattle/import/',
+                'export': '/api/cattle/export/',
+                'market_stats': '/api/cattle/market-stats/',
                 'mark_sold': '/api/cattle/<id>/mark-sold/',
             },
             'cattle_images': {
                 'upload': '/api/cattle/<cattle_id>/images/',
+                'bulk_upload': '/api/cattle/<cattle_id>/images/bulk/',
+                'status': '/api/cattle/<cattle_id>/images/<image_id>/status/',
                 'delete': '/api/cattle/<cattle_id>/images/<image_id>/',
             },
+            'saved_searches': {
+                'list_create': '/api/cattle/saved-searches/',
+                'detail': '/api/cattle/saved-searches/<id>/',
+                'inbox': '/api/cattle/saved-searches/inbox/',
+                'mark_read': '/api/cattle/saved-searches/inbox/read/',
+            },
             'health_documents': {
                 'upload': '/api/cattle/<cattle_id>/documents/',
+                'status': '/api/cattle/<cattle_id>/documents/<document_id>/status/',
                 'delete': '/api/cattle/<cattle_id>/documents/<document_id>/',
             },
         },
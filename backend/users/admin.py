@@ -1,7 +1,9 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.html import format_html
-from .models import User
+from .authentication import invalidate_cached_users
+from .login_throttle import unlock_email
+from .models import RevokedToken, User
 
 
 @admin.register(User)
@@ -100,28 +102,54 @@ class UserAdmin(BaseUserAdmin):
         return obj.get_full_name()
     get_full_name.short_description = 'Full Name'
     
-    actions = ['verify_sellers', 'unverify_sellers', 'activate_users', 'deactivate_users']
+    actions = ['verify_sellers', 'unverify_sellers', 'activate_users', 'deactivate_users', 'unlock_accounts']
     
     def verify_sellers(self, request, queryset):
         """Bulk verify sellers"""
         updated = queryset.filter(user_type__in=['SELLER', 'BOTH']).update(is_verified_seller=True)
+        invalidate_cached_users(queryset.values_list('pk', flat=True))
         self.message_user(request, f'{updated} seller(s) verified successfully.')
     verify_sellers.short_description = 'Verify selected sellers'
     
     def unverify_sellers(self, request, queryset):
         """Bulk unverify sellers"""
         updated = queryset.update(is_verified_seller=False)
+        invalidate_cached_users(queryset.values_list('pk', flat=True))
         self.message_user(request, f'{updated} seller(s) unverified.')
     unverify_sellers.short_description = 'Unverify selected sellers'
     
     def activate_users(self, request, queryset):
         """Bulk activate users"""
         updated = queryset.update(is_active=True)
+        invalidate_cached_users(queryset.values_list('pk', flat=True))
         self.message_user(request, f'{updated} user(s) activated.')
     activate_users.short_description = 'Activate selected users'
     
     def deactivate_users(self, request, queryset):
         """Bulk deactivate users"""
         updated = queryset.update(is_active=False)
+        invalidate_cached_users(queryset.values_list('pk', flat=True))
         self.message_user(request, f'{updated} user(s) deactivated.')
     deactivate_users.short_description = 'Deactivate selected users'
+    
+    def unlock_accounts(self, request, queryset):
+        """Bulk clear login locks and throttled attempts"""
+        for email in queryset.values_list('email', flat=True):
+            unlock_email(email)
+        updated = queryset.update(account_locked_until=None, failed_login_attempts=0)
+        invalidate_cached_users(queryset.values_list('pk', flat=True))
+        self.message_user(request, f'{updated} account(s) unlocked.')
+    unlock_accounts.short_description = 'Unlock selected accounts'
+
+
+@admin.register(RevokedToken)
+class RevokedTokenAdmin(admin.ModelAdmin):
+    """Read-only view of revoked refresh tokens"""
+    
+    list_display = ['jti', 'revoked_at', 'expires_at']
+    search_fields = ['jti']
+    date_hierarchy = 'revoked_at'
+    readonly_fields = ['jti', 'revoked_at', 'expires_at']
+    
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,62 @@
+"""
+JWT authentication with cached user lookups for read-only requests.
+
+JWTAuthentication loads the user's row on every authenticated request.
+For safe methods (GET, HEAD, OPTIONS) CachedJWTAuthentication keeps the
+user, without the password hash, in the cache for JWT_USER_CACHE_TIMEOUT
+seconds. Writes always load the user from the database, so permission
+checks for changes (e.g. IsSellerOrReadOnly on create) see current data.
+
+Cached users are dropped whenever the row is saved or deleted (see
+users.signals), which covers profile edits, deactivation and account
+locks. Code that changes users with queryset.update() must call
+invalidate_cached_users().
+"""
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+CACHED_USER_KEY = 'users:jwt-user:{user_id}'
+
+
+def get_cache_timeout():
+    return getattr(settings, 'JWT_USER_CACHE_TIMEOUT', 60)
+
+
+def invalidate_cached_users(user_ids):
+    cache.delete_many([CACHED_USER_KEY.format(user_id=user_id) for user_id in user_ids])
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that resolves users of read-only requests from the cache"""
+
+    def authenticate(self, request):
+        self.use_cache = request.method in SAFE_METHODS and get_cache_timeout() > 0
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        # Revocation checks compare the password hash, which is not cached
+        if not self.use_cache or api_settings.CHECK_REVOKE_TOKEN:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        key = CACHED_USER_KEY.format(user_id=user_id)
+        user = cache.get(key)
+        if user is None:
+            try:
+                user = self.user_model.objects.defer('password').get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed('User not found', code='user_not_found')
+            cache.set(key, user, get_cache_timeout())
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user
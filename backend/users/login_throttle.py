@@ -0,0 +1,127 @@
+"""
+Sliding-window throttling of login attempts in the shared cache.
+
+Failed logins are counted per email address and per client IP in
+LOGIN_THROTTLE_BUCKETS cache buckets spanning LOGIN_THROTTLE_WINDOW seconds.
+Each failure is one atomic cache increment and each check one get_many, so
+credential-stuffing bursts never write to the users table. Attempts leave
+the window bucket by bucket (every window / buckets seconds).
+
+- An email with LOGIN_THROTTLE_ATTEMPTS failures in the window is locked:
+  account_locked_until is written once, with a single UPDATE, and a lock
+  marker is cached so further attempts are refused without checking the
+  password. A successful login clears the email's failures.
+- An IP with LOGIN_THROTTLE_IP_ATTEMPTS failures in the window is refused
+  until its oldest failures leave the window; nothing is persisted.
+
+Clients are identified like DRF throttles (REMOTE_ADDR, or
+X-Forwarded-For with the NUM_PROXIES setting).
+"""
+import hashlib
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import BaseThrottle
+from .authentication import invalidate_cached_users
+from .models import User
+
+ATTEMPTS_KEY = 'users:login-attempts:{scope}:{ident}:{bucket}'
+LOCK_KEY = 'users:login-locked:{ident}'
+
+
+class LoginLocked(Throttled):
+    default_detail = 'Too many failed login attempts.'
+    default_code = 'login_locked'
+
+
+def get_window():
+    return getattr(settings, 'LOGIN_THROTTLE_WINDOW', 1800)
+
+
+def get_bucket_seconds():
+    return max(1, get_window() // getattr(settings, 'LOGIN_THROTTLE_BUCKETS', 6))
+
+
+def email_ident(email):
+    """Hash normalized emails so addresses do not appear in cache keys"""
+    return hashlib.sha256(email.strip().lower().encode()).hexdigest()
+
+
+def client_ident(request):
+    return BaseThrottle().get_ident(request)
+
+
+def bucket_keys(scope, ident, now=None):
+    """Keys of the buckets covering the window, newest first"""
+    size = get_bucket_seconds()
+    current = int(now if now is not None else time.time()) // size
+    count = -(-get_window() // size)
+    return [ATTEMPTS_KEY.format(scope=scope, ident=ident, bucket=current - i) for i in range(count)]
+
+
+def count_failures(scope, ident):
+    return sum(cache.get_many(bucket_keys(scope, ident)).values())
+
+
+def add_failure(scope, ident):
+    """Count one failure and return the total in the window"""
+    keys = bucket_keys(scope, ident)
+    timeout = get_window() + get_bucket_seconds()
+    cache.add(keys[0], 0, timeout)
+    try:
+        cache.incr(keys[0])
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(keys[0], 1, timeout)
+    return count_failures(scope, ident)
+
+
+def clear_failures(scope, ident):
+    cache.delete_many(bucket_keys(scope, ident))
+
+
+def lock_remaining(email):
+    """Seconds left on a cached email lock, or None"""
+    locked_until = cache.get(LOCK_KEY.format(ident=email_ident(email)))
+    if locked_until is None:
+        return None
+    return max(1, int(locked_until - time.time()))
+
+
+def check_login_allowed(request, email):
+    """Raise LoginLocked if the email is locked or the client IP is throttled"""
+    remaining = lock_remaining(email) if email else None
+    if remaining is not None:
+        raise LoginLocked(wait=remaining)
+    if count_failures('ip', client_ident(request)) >= getattr(settings, 'LOGIN_THROTTLE_IP_ATTEMPTS', 20):
+        raise LoginLocked(wait=get_bucket_seconds())
+
+
+def lock_email(email):
+    """Persist a lock on the account with this email and cache the lock marker"""
+    duration = getattr(settings, 'LOGIN_LOCK_MINUTES', 30) * 60
+    user_ids = list(User.objects.filter(email__iexact=email.strip()).values_list('pk', flat=True))
+    if user_ids:
+        User.objects.filter(pk__in=user_ids).update(account_locked_until=timezone.now() + timedelta(seconds=duration))
+        invalidate_cached_users(user_ids)
+    # Unknown emails are locked in the cache too, so responses do not reveal which accounts exist
+    cache.set(LOCK_KEY.format(ident=email_ident(email)), time.time() + duration, duration)
+    clear_failures('email', email_ident(email))
+
+
+def record_failure(request, email):
+    add_failure('ip', client_ident(request))
+    if email and add_failure('email', email_ident(email)) >= getattr(settings, 'LOGIN_THROTTLE_ATTEMPTS', 5):
+        lock_email(email)
+
+
+def record_success(email):
+    clear_failures('email', email_ident(email))
+
+
+def unlock_email(email):
+    cache.delete(LOCK_KEY.format(ident=email_ident(email)))
+    clear_failures('email', email_ident(email))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from users.token_revocation import prune_expired, revocation_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete revoked refresh tokens that have expired, in batches, and '
+        'report the size of the revocation table'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows deleted per statement')
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between batches')
+        parser.add_argument('--stats', action='store_true', help='Only report the table size')
+
+    def handle(self, *args, **options):
+        self.write_stats('Before' if not options['stats'] else 'Revoked tokens')
+        if options['stats']:
+            return
+
+        deleted = 0
+        for deleted in prune_expired(options['batch_size'], options['pause']):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Deleted {deleted:,} expired tokens so far')
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted:,} expired revoked tokens'))
+        self.write_stats('After')
+
+    def write_stats(self, label):
+        stats = revocation_stats()
+        self.stdout.write(f'{label}: {stats["rows"]:,} rows, {stats["expired_rows"]:,} expired')
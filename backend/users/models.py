@@ -93,6 +93,12 @@ class User(AbstractBaseUser, PermissionsMixin):
         null=True,
         blank=True
     )
+    profile_picture_renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text='Generated resized WebP/JPEG variants'
+    )
     
     # User Type and Role
     user_type = models.CharField(
@@ -177,16 +183,8 @@ class User(AbstractBaseUser, PermissionsMixin):
         return self.first_name
     
     def is_account_locked(self):
-        """Check if account is temporarily locked"""
-        if self.account_locked_until:
-            if timezone.now() < self.account_locked_until:
-                return True
-            else:
-                # Lock period expired, reset
-                self.account_locked_until = None
-                self.failed_login_attempts = 0
-                self.save(update_fields=['account_locked_until', 'failed_login_attempts'])
-        return False
+        """Check if account is temporarily locked (expired locks are left in place, not cleared)"""
+        return self.account_locked_until is not None and timezone.now() < self.account_locked_until
     
     def lock_account(self, duration_minutes=30):
         """Lock account for specified duration"""
@@ -213,3 +211,18 @@ class User(AbstractBaseUser, PermissionsMixin):
     def can_buy(self):
         """Check if user can purchase cattle"""
         return self.user_type in ['BUYER', 'BOTH']
+
+
+class RevokedToken(models.Model):
+    """A revoked refresh token, kept only until the token would have expired"""
+    
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Revoked Token'
+        verbose_name_plural = 'Revoked Tokens'
+    
+    def __str__(self):
+        return self.jti
@@ -1,10 +1,32 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from django.utils import timezone
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from cattle.processing import schedule_renditions
+from cattle.renditions import rendition_urls
+from .login_throttle import LoginLocked
+from .token_revocation import RevocableRefreshToken
 
 User = get_user_model()
 
 
+class ProfilePictureRenditionsMixin:
+    """Add resized profile picture renditions and srcset strings (empty until they exist)"""
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        schedule_renditions(instance, 'profile_picture', 'profile_picture_renditions')
+        urls, srcset = rendition_urls(
+            instance.profile_picture,
+            instance.profile_picture_renditions,
+            self.context.get('request')
+        )
+        data['profile_picture_renditions'] = urls
+        data['profile_picture_srcset'] = srcset
+        return data
+
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     """Serializer for user registration"""
     password = serializers.CharField(
@@ -60,7 +82,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return user
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(ProfilePictureRenditionsMixin, serializers.ModelSerializer):
     """Serializer for user profile"""
     full_name = serializers.CharField(source='get_full_name', read_only=True)
     can_sell = serializers.BooleanField(read_only=True)
@@ -139,7 +161,7 @@ class ChangePasswordSerializer(serializers.Serializer):
         return value
 
 
-class UserListSerializer(serializers.ModelSerializer):
+class UserListSerializer(ProfilePictureRenditionsMixin, serializers.ModelSerializer):
     """Minimal serializer for user lists (e.g., seller info on cattle listings)"""
     full_name = serializers.CharField(source='get_full_name', read_only=True)
     
@@ -157,3 +179,19 @@ class UserListSerializer(serializers.ModelSerializer):
             'profile_picture',
         ]
         read_only_fields = fields
+
+
+class LoginSerializer(TokenObtainPairSerializer):
+    """Obtain a token pair, refusing accounts with a persisted lock"""
+    
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        if self.user.is_account_locked():
+            remaining = (self.user.account_locked_until - timezone.now()).total_seconds()
+            raise LoginLocked(wait=max(1, int(remaining)))
+        return data
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refresh a token pair, revoking the used refresh token (see users.token_revocation)"""
+    token_class = RevocableRefreshToken
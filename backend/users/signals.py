@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from cattle.renditions import ensure_renditions
+from .authentication import invalidate_cached_users
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def create_profile_picture_renditions(sender, instance, **kwargs):
+    """Generate resized renditions for new or replaced profile pictures"""
+    ensure_renditions(instance, 'profile_picture', 'profile_picture_renditions')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drop the cached user used by read-only JWT requests"""
+    invalidate_cached_users([instance.pk])
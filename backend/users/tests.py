@@ -1,3 +1,242 @@
-from django.test import TestCase
+from unittest import mock
+from datetime import timedelta
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from . import login_throttle
+from .models import RevokedToken, User
+from .token_revocation import BloomFilter, revocation_filter
 
-# Create your tests here.
+
+def create_user(email='kofi@example.com', phone_number='+233201234567', **kwargs):
+    """Create an account for tests"""
+    fields = {
+        'first_name': 'Kofi',
+        'last_name': 'Mensah',
+        'phone_number': phone_number,
+        'user_type': 'SELLER',
+    }
+    fields.update(kwargs)
+    return User.objects.create_user(email=email, password='StrongPass123!', **fields)
+
+
+def user_queries(queries):
+    return [query['sql'] for query in queries.captured_queries if '"users_user"' in query['sql']]
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    """User lookups for JWT-authenticated requests"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.url = reverse('users:profile')
+
+    def get_profile(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        return response, user_queries(queries)
+
+    def test_read_requests_use_the_cache(self):
+        response, queries = self.get_profile()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"password"', queries[0])
+
+        response, queries = self.get_profile()
+        self.assertEqual(response.data['email'], 'kofi@example.com')
+        self.assertEqual(queries, [])
+
+    def test_save_invalidates(self):
+        self.get_profile()
+        self.user.first_name = 'Kwame'
+        self.user.save()
+        response, queries = self.get_profile()
+        self.assertEqual(response.data['first_name'], 'Kwame')
+        self.assertEqual(len(queries), 1)
+
+    def test_deactivated_users_are_rejected(self):
+        self.get_profile()
+        self.user.is_active = False
+        self.user.save(update_fields=['is_active'])
+        response, _ = self.get_profile()
+        self.assertEqual(response.status_code, 401)
+
+    def test_writes_load_the_user(self):
+        self.get_profile()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                reverse('users:profile-update'), {'city': 'Tamale'}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(any('"password"' in sql for sql in user_queries(queries)))
+
+
+class LoginThrottleTests(APITestCase):
+    """Sliding-window login throttling"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.url = reverse('users:login')
+
+    def login(self, password='wrong-password', email='kofi@example.com', ip='10.0.0.1'):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                self.url, {'email': email, 'password': password}, format='json', REMOTE_ADDR=ip
+            )
+        writes = [sql for sql in user_queries(queries) if sql.startswith('UPDATE')]
+        return response, writes
+
+    def test_failures_do_not_write_until_locked(self):
+        for _ in range(4):
+            response, writes = self.login()
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(writes, [])
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.account_locked_until)
+        self.assertEqual(self.user.failed_login_attempts, 0)
+
+        response, writes = self.login()
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(len(writes), 1)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_account_locked())
+
+        response, writes = self.login(password='StrongPass123!')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(writes, [])
+        self.assertIn('Retry-After', response)
+
+    def test_success_clears_failures(self):
+        for _ in range(4):
+            self.login()
+        response, _ = self.login(password='StrongPass123!')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.data)
+        for _ in range(4):
+            response, _ = self.login()
+        self.assertEqual(response.status_code, 401)
+
+    def test_email_is_normalized(self):
+        for _ in range(5):
+            self.login(email='KOFI@example.com ')
+        response, _ = self.login(password='StrongPass123!')
+        self.assertEqual(response.status_code, 429)
+
+    def test_persisted_lock_survives_cache_loss(self):
+        for _ in range(5):
+            self.login()
+        cache.clear()
+        response, _ = self.login(password='StrongPass123!')
+        self.assertEqual(response.status_code, 429)
+
+    def test_unknown_emails_lock_like_accounts(self):
+        for _ in range(5):
+            response, writes = self.login(email='nobody@example.com')
+            self.assertEqual(writes, [])
+        response, _ = self.login(email='nobody@example.com')
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(LOGIN_THROTTLE_IP_ATTEMPTS=6)
+    def test_ip_throttle(self):
+        for i in range(6):
+            self.login(email=f'user{i}@example.com')
+        response, _ = self.login(password='StrongPass123!')
+        self.assertEqual(response.status_code, 429)
+        response, _ = self.login(password='StrongPass123!', ip='10.0.0.2')
+        self.assertEqual(response.status_code, 200)
+
+    def test_failures_leave_the_window(self):
+        started = 1_000_000_000
+        with mock.patch.object(login_throttle.time, 'time', return_value=started):
+            for _ in range(4):
+                self.login()
+        with mock.patch.object(login_throttle.time, 'time', return_value=started + 1800):
+            response, writes = self.login()
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(writes, [])
+
+
+class TokenRevocationTests(APITestCase):
+    """Refresh-token rotation against the revocation store"""
+
+    def setUp(self):
+        revocation_filter.reset()
+        self.user = create_user()
+        self.refresh = str(RefreshToken.for_user(self.user))
+        self.url = reverse('users:token_refresh')
+
+    def refresh_token(self, token):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {'refresh': token}, format='json')
+        revocation_queries = [query['sql'] for query in queries.captured_queries if 'users_revokedtoken' in query['sql']]
+        return response, revocation_queries
+
+    def test_rotation_revokes_with_one_insert(self):
+        response, queries = self.refresh_token(self.refresh)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data['refresh'], self.refresh)
+        self.assertEqual(len(queries), 2)  # the filter load, then the insert
+        self.assertTrue(queries[1].startswith('INSERT'))
+        self.assertEqual(RevokedToken.objects.count(), 1)
+
+        response, queries = self.refresh_token(response.data['refresh'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(queries[0].startswith('INSERT'))
+
+    def test_reuse_is_rejected(self):
+        self.refresh_token(self.refresh)
+        response, _ = self.refresh_token(self.refresh)
+        self.assertEqual(response.status_code, 401)
+
+    def test_reuse_through_another_process_fails_at_the_insert(self):
+        self.refresh_token(self.refresh)
+        revocation_filter.bloom = revocation_filter.new_bloom()
+        response, _ = self.refresh_token(self.refresh)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(RevokedToken.objects.count(), 1)
+
+    def test_filter_is_loaded_from_unexpired_rows(self):
+        self.refresh_token(self.refresh)
+        revocation_filter.reset()
+        response, queries = self.refresh_token(self.refresh)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(len(queries), 2)  # the filter load, then the confirming lookup
+        self.assertNotIn('INSERT', queries[1])
+
+    def test_revocation_time_is_reported(self):
+        with self.settings(REQUEST_METRICS_HEADER=True):
+            response = self.client.post(self.url, {'refresh': self.refresh}, format='json')
+        self.assertIn('revocation;dur=', response['Server-Timing'])
+
+    def test_bloom_filter(self):
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(f'jti-{i}')
+        self.assertTrue(all(f'jti-{i}' in bloom for i in range(1000)))
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_prune_deletes_expired_rows_in_batches(self):
+        now = timezone.now()
+        RevokedToken.objects.bulk_create(
+            [RevokedToken(jti=f'expired-{i}', expires_at=now - timedelta(minutes=i + 1)) for i in range(7)]
+            + [RevokedToken(jti='live', expires_at=now + timedelta(hours=1))]
+        )
+        output = StringIO()
+        call_command('prune_revoked_tokens', batch_size=3, verbosity=2, stdout=output)
+        self.assertEqual(list(RevokedToken.objects.values_list('jti', flat=True)), ['live'])
+        self.assertIn('Deleted 3 expired tokens so far', output.getvalue())
+        self.assertIn('Deleted 7 expired revoked tokens', output.getvalue())
+        self.assertIn('After: 1 rows, 0 expired', output.getvalue())
@@ -0,0 +1,204 @@
+"""
+Refresh-token revocation with a bounded store.
+
+Revoked refresh tokens are stored as RevokedToken rows (a unique JTI and
+the token's expiry) only until the token would have expired anyway;
+`manage.py prune_revoked_tokens` deletes expired rows in batches, so the
+table holds at most one refresh-token lifetime of rotations.
+
+Membership checks go through a per-process Bloom filter first. A miss
+means the token was not revoked through this process, so the SELECT is
+skipped; a hit is confirmed against the table. The filter is never
+trusted to accept a token: revoking is an INSERT on the unique JTI, so a
+token replayed through another process, or by two concurrent refreshes,
+fails at the insert. Each rotation is therefore one INSERT instead of the
+lookups and writes of simplejwt's blacklist app.
+
+Check and revoke times are recorded on the request metrics (see
+config.instrumentation) as `revocation_ms`; revocation_stats() reports the
+table size and this process's filter counters.
+"""
+import hashlib
+import math
+import threading
+import time
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+from config.instrumentation import current_metrics
+from .models import RevokedToken
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings"""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        for position in self.positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(value))
+
+
+class RevocationFilter:
+    """The process's Bloom filter, loaded lazily from unexpired rows and reset when full"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bloom = None
+        self.checks = 0
+        self.skipped = 0
+        self.false_positives = 0
+
+    def new_bloom(self):
+        return BloomFilter(
+            getattr(settings, 'TOKEN_REVOCATION_FILTER_CAPACITY', 100000),
+            getattr(settings, 'TOKEN_REVOCATION_FILTER_ERROR_RATE', 0.01)
+        )
+
+    def load(self):
+        bloom = self.new_bloom()
+        jtis = (
+            RevokedToken.objects.filter(expires_at__gt=timezone.now())
+            .order_by('-expires_at')
+            .values_list('jti', flat=True)[:bloom.capacity]
+        )
+        for jti in jtis.iterator(chunk_size=5000):
+            bloom.add(jti)
+        return bloom
+
+    def get(self):
+        with self.lock:
+            if self.bloom is None:
+                self.bloom = self.load()
+            return self.bloom
+
+    def add(self, jti):
+        bloom = self.get()
+        with self.lock:
+            if bloom.count >= bloom.capacity:
+                # A full filter loses precision; tokens revoked elsewhere are caught by the insert anyway
+                self.bloom = bloom = self.new_bloom()
+            bloom.add(jti)
+
+    def reset(self):
+        with self.lock:
+            self.bloom = None
+
+
+revocation_filter = RevocationFilter()
+
+
+def record_time(started):
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics.record_timing('revocation', time.perf_counter() - started)
+
+
+def is_revoked(jti):
+    """Return whether a JTI is revoked, querying the table only on a filter hit"""
+    started = time.perf_counter()
+    try:
+        revocation_filter.checks += 1
+        if jti not in revocation_filter.get():
+            revocation_filter.skipped += 1
+            return False
+        revoked = RevokedToken.objects.filter(jti=jti).exists()
+        if not revoked:
+            revocation_filter.false_positives += 1
+        return revoked
+    finally:
+        record_time(started)
+
+
+def revoke(jti, expires_at):
+    """Revoke a JTI; return False if it was already revoked"""
+    started = time.perf_counter()
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(jti=jti, expires_at=expires_at)
+    except IntegrityError:
+        return False
+    finally:
+        record_time(started)
+    revocation_filter.add(jti)
+    return True
+
+
+def table_size():
+    """Number of revoked-token rows (the planner estimate on PostgreSQL)"""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [RevokedToken._meta.db_table]
+            )
+            row = cursor.fetchone()
+        if row and row[0] >= 0:
+            return row[0]
+    return RevokedToken.objects.count()
+
+
+def revocation_stats():
+    bloom = revocation_filter.bloom
+    return {
+        'rows': table_size(),
+        'expired_rows': RevokedToken.objects.filter(expires_at__lte=timezone.now()).count(),
+        'filter_entries': bloom.count if bloom else 0,
+        'filter_capacity': bloom.capacity if bloom else None,
+        'checks': revocation_filter.checks,
+        'checks_skipped': revocation_filter.skipped,
+        'false_positives': revocation_filter.false_positives,
+    }
+
+
+def prune_expired(batch_size=5000, pause=0.0):
+    """Delete expired rows in batches of batch_size, yielding the running total after each batch"""
+    deleted = 0
+    while True:
+        ids = list(
+            RevokedToken.objects.filter(expires_at__lte=timezone.now())
+            .order_by('expires_at')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return
+        deleted += RevokedToken.objects.filter(pk__in=ids).delete()[0]
+        yield deleted
+        if pause:
+            time.sleep(pause)
+
+
+class RevocableRefreshToken(RefreshToken):
+    """Refresh token checked against and revoked into the RevokedToken store"""
+
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        self.check_blacklist()
+
+    def check_blacklist(self):
+        if is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        """Revoke this token; raises TokenError if it was already revoked"""
+        if not revoke(self.payload[api_settings.JTI_CLAIM], datetime_from_epoch(self.payload['exp'])):
+            raise TokenError(_('Token is blacklisted'))
@@ -1,9 +1,17 @@
+from functools import partial
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import get_user_model
+from config.instrumentation import SerializerTimingMixin
+from cattle.conditional import conditional_response, list_etag
+from cattle.pagination import CattleKeysetPagination
+from . import login_throttle
 from .serializers import (
+    LoginSerializer,
     UserRegistrationSerializer,
     UserProfileSerializer,
     UserUpdateSerializer,
@@ -37,7 +45,24 @@ class UserRegistrationView(generics.CreateAPIView):
         }, status=status.HTTP_201_CREATED)
 
 
-class UserProfileView(generics.RetrieveAPIView):
+class LoginView(TokenObtainPairView):
+    """Obtain a JWT pair, throttling failed attempts per email and client IP (see users.login_throttle)"""
+    serializer_class = LoginSerializer
+    
+    def post(self, request, *args, **kwargs):
+        email = request.data.get('email')
+        email = email if isinstance(email, str) else ''
+        login_throttle.check_login_allowed(request, email)
+        try:
+            response = super().post(request, *args, **kwargs)
+        except AuthenticationFailed:
+            login_throttle.record_failure(request, email)
+            raise
+        login_throttle.record_success(email)
+        return response
+
+
+class UserProfileView(SerializerTimingMixin, generics.RetrieveAPIView):
     """Get current user profile"""
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -88,9 +113,11 @@ class ChangePasswordView(APIView):
         }, status=status.HTTP_200_OK)
 
 
-class UserCattleListView(generics.ListAPIView):
+class UserCattleListView(SerializerTimingMixin, generics.ListAPIView):
     """Get cattle listings for a specific user"""
     permission_classes = [permissions.AllowAny]
+    pagination_class = CattleKeysetPagination
+    query_budget = 6
     
     def get_queryset(self):
         from cattle.models import Cattle
@@ -98,8 +125,15 @@ class UserCattleListView(generics.ListAPIView):
         return Cattle.objects.filter(
             seller_id=user_id,
             is_active=True
-        ).select_related('seller').prefetch_related('images')
+        ).select_related('seller').with_primary_image().with_document_flags()
     
     def get_serializer_class(self):
         from cattle.serializers import CattleListSerializer
         return CattleListSerializer
+    
+    def list(self, request, *args, **kwargs):
+        return conditional_response(
+            request,
+            partial(super().list, request, *args, **kwargs),
+            etag=list_etag(request, 'user-cattle')
+        )